@@ -3,3 +3,7 @@ from .process import router as process
 from .results import router as results
 from .user import router as user
 from .comparison import router as comparison
+from .clauses import router as clauses
+from .health import router as health
+from .llm import router as llm
+from .versions import router as versions
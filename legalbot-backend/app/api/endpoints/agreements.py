@@ -1,10 +1,10 @@
-from fastapi import APIRouter, UploadFile, File as FastAPIFile, HTTPException
+from fastapi import APIRouter, UploadFile, File as FastAPIFile, Form, HTTPException
 from app.db.database import database
-from sqlalchemy import insert
+from sqlalchemy import insert, select
 import uuid
-import shutil
 from pathlib import Path
-from app.db.models import files
+from app.db.models import files, uploads
+from app.services.file_manager import save_upload_file, UploadTooLargeError
 
 router = APIRouter()
 ALLOWED_EXTENSIONS = {".pdf", ".docx"}
@@ -15,14 +15,27 @@ UPLOAD_DIR.mkdir(exist_ok=True, parents=True)
 @router.post("/upload/agreements")
 async def upload_agreements(
     owner_file: UploadFile = FastAPIFile(...),
-    tenant_file: UploadFile = FastAPIFile(...)
+    tenant_file: UploadFile = FastAPIFile(...),
+    previous_upload_id: str = Form(None)
 ):
-    """Upload two agreement files and return an upload ID"""
+    """
+    Upload two agreement files and return an upload ID. With
+    `previous_upload_id` both files become new versions of that upload's
+    owner and tenant files, so only their changed paragraphs are re-analyzed.
+    """
     
     # Validate file types
     for file in [owner_file, tenant_file]:
         if not any(file.filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS):
             raise HTTPException(status_code=400, detail="Unsupported file format")
+
+    previous = None
+    if previous_upload_id:
+        previous = await database.fetch_one(
+            select(uploads.c.owner_file_id, uploads.c.tenant_file_id).where(uploads.c.id == previous_upload_id)
+        )
+        if previous is None:
+            raise HTTPException(status_code=404, detail="Previous upload not found")
     
     # Generate upload ID
     upload_id = str(uuid.uuid4())
@@ -38,29 +51,39 @@ async def upload_agreements(
     tenant_file_path = UPLOAD_DIR / tenant_filename
     
     try:
-        # Save owner file
-        with owner_file_path.open("wb") as buffer:
-            shutil.copyfileobj(owner_file.file, buffer)
-        
-        # Save tenant file
-        with tenant_file_path.open("wb") as buffer:
-            shutil.copyfileobj(tenant_file.file, buffer)
-        
-        # Store file records
-        owner_query = insert(files).values(
-            id=owner_file_id, 
-            filename=owner_filename, 
-            original_name=owner_file.filename
-        )
-        tenant_query = insert(files).values(
-            id=tenant_file_id, 
-            filename=tenant_filename, 
-            original_name=tenant_file.filename
-        )
-        
-        await database.execute(owner_query)
-        await database.execute(tenant_query)
+        # Stream both files to disk, hashing while writing
+        owner_stored = await save_upload_file(owner_file, str(owner_file_path))
+        tenant_stored = await save_upload_file(tenant_file, str(tenant_file_path))
         
+        # File and upload records go in together: two multi-row statements in one transaction
+        async with database.transaction():
+            await database.insert_many(files, [
+                {
+                    "id": owner_file_id,
+                    "filename": owner_filename,
+                    "original_name": owner_file.filename,
+                    "sha256": owner_stored["sha256"],
+                    "size": owner_stored["size"],
+                    "previous_file_id": previous["owner_file_id"] if previous else None,
+                },
+                {
+                    "id": tenant_file_id,
+                    "filename": tenant_filename,
+                    "original_name": tenant_file.filename,
+                    "sha256": tenant_stored["sha256"],
+                    "size": tenant_stored["size"],
+                    "previous_file_id": previous["tenant_file_id"] if previous else None,
+                },
+            ])
+            await database.execute(insert(uploads).values(
+                id=upload_id,
+                owner_file_id=owner_file_id,
+                tenant_file_id=tenant_file_id
+            ))
+
+    except UploadTooLargeError as e:
+        owner_file_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     
@@ -68,5 +91,6 @@ async def upload_agreements(
         "uploadId": upload_id,
         "ownerFileId": owner_file_id,
         "tenantFileId": tenant_file_id,
+        "previousUploadId": previous_upload_id,
         "message": "Files uploaded successfully"
     }
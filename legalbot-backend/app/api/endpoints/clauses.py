@@ -0,0 +1,13 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.services.clause_index import clause_index
+
+router = APIRouter()
+
+@router.get("/clauses/similar")
+async def find_similar_clauses(q: str = Query(..., min_length=1), k: int = Query(10, ge=1, le=100)):
+    """Find stored clauses from past agreements that are near-identical to `q`."""
+    try:
+        results = await clause_index.search(q, k)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Clause search error: {str(e)}")
+    return {"query": q, "results": results}
@@ -1,31 +1,262 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from pydantic import BaseModel
-from app.services.nlp_processing import process_document, compare_documents
-from app.db import database  # if you need to fetch stored process results (optional)
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import List
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Body, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from app.db.database import database
+from app.db.models import process_jobs, ProcessingStatus
+from app.services.nlp_processing import process_document, compare_documents, compare_inputs
+from app.services.executor import run_nlp
+from app.services.analysis_store import count_analyses, load_analysis, load_tokens
+from app.services.analysis_cache import cache_key
+from app.services.batch_compare import stream_batch_comparison
+from app.services.similarity import METRICS, portfolio_similarity
+from app.services.report_export import FORMATS, export_report, iter_chunks
+from app.core.config import (
+    COMPARE_MODE, COMPARE_MODES, COMPARE_BATCH_MAX_CANDIDATES, SIMILARITY_MAX_DOCUMENTS,
+    SIMILARITY_MATRIX_MAX_DOCUMENTS
+)
+from app.services.file_manager import save_upload_file, UploadTooLargeError
+from app.core import metrics
+from app.core.responses import FastJSONResponse, dumps, parse_fields, project
 
 router = APIRouter()
 
+# The upload_id_* names predate per-file storage: they take file IDs (ownerFileId /
+# tenantFileId from the upload response, or /upload's file_id), not upload IDs
+_FILE_ID_HELP = "File ID of a processed file (ownerFileId/tenantFileId or file_id from the upload response)"
+
 class CompareRequest(BaseModel):
-    upload_id_a: str | None = None
-    upload_id_b: str | None = None
+    upload_id_a: str = Field(..., description=_FILE_ID_HELP)
+    upload_id_b: str = Field(..., description=_FILE_ID_HELP)
+
+# Top-level fields of a comparison report, for `fields=` selectors
+REPORT_FIELDS = (
+    'aligned_clauses', 'missing_clauses_in_b', 'missing_clauses_in_a', 'risk_a', 'risk_b',
+    'entities_only_in_a', 'entities_only_in_b', 'dates_only_in_a', 'dates_only_in_b', 'summary',
+    'overall_similarity', 'similarity_percent', 'adjusted_similarity_percent', 'diagnostics',
+    'can_do_agreement', 'cache',
+)
+_FIELDS_QUERY = Query(None, description="Comma-separated report fields to return, e.g. similarity_percent,diagnostics.mode")
+
+class SimilarityMatrixRequest(BaseModel):
+    file_ids: List[str] = None  # every analyzed file when omitted
+    metric: str = "jaccard"
+    threshold: float = Field(0.9, gt=0.0, le=1.0)
+    include_matrix: bool = False
+
+
+def _check_mode(mode: str) -> None:
+    if mode not in COMPARE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(COMPARE_MODES)}")
+
+
+async def _load_stored_pair(file_id_a: str, file_id_b: str, paths: List[str] = None):
+    """
+    Fetch the stored analyses of two uploaded files; no NLP runs here. With
+    report field paths only the analysis fields those need are read; the
+    clause, token and unit lists left out are empty so nothing is re-parsed.
+    """
+    inputs = compare_inputs(paths) if paths is not None else None
+    doc_a, doc_b = await asyncio.gather(load_analysis(file_id_a, inputs), load_analysis(file_id_b, inputs))
+    missing = [i for i, d in ((file_id_a, doc_a), (file_id_b, doc_b)) if d is None]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"No stored analysis for: {', '.join(missing)}; process the files first")
+    empty = {'clauses': [], 'tokens': [], 'units': []}
+    return {**empty, **doc_a}, {**empty, **doc_b}
+
 
 @router.post("/compare")
-async def compare_two_files(owner_file: UploadFile = File(None), tenant_file: UploadFile = File(None), body: CompareRequest | None = None):
+async def compare_two_files(owner_file: UploadFile = File(None), tenant_file: UploadFile = File(None),
+                            upload_id_a: str = Form(None, description=_FILE_ID_HELP),
+                            upload_id_b: str = Form(None, description=_FILE_ID_HELP),
+                            mode: str = Query(COMPARE_MODE), profile: bool = Query(False),
+                            fields: str = _FIELDS_QUERY):
     """
-    Compare two documents. Accepts upload files (owner_file & tenant_file) OR upload IDs in JSON body.
+    Compare two documents. Accepts upload files (owner_file & tenant_file) OR the
+    file IDs of two already processed uploads (upload_id_a & upload_id_b).
     Returns structured comparison with similarity_percent and diagnostics.
+    `mode=legacy` keeps the original whole-text SequenceMatcher score.
+    `profile=true` adds per-stage timings (seconds) to diagnostics['profile'].
+    `fields` returns only the named report fields (dotted paths allowed).
     """
+    _check_mode(mode)
+    paths = parse_fields(fields, REPORT_FIELDS)
+    started = time.perf_counter()
     try:
         if owner_file is not None and tenant_file is not None:
             doc_a = await process_document(owner_file)
             doc_b = await process_document(tenant_file)
-        elif body and body.upload_id_a and body.upload_id_b:
-            # optional: load previously processed results from DB using ids
-            # example: doc_a = await load_result_by_upload_id(body.upload_id_a)
-            raise HTTPException(status_code=501, detail="Compare-by-id not implemented; send files for now")
+            cache = {'doc_a': doc_a.get('cache'), 'doc_b': doc_b.get('cache')}
+        elif upload_id_a and upload_id_b:
+            doc_a, doc_b = await _load_stored_pair(upload_id_a, upload_id_b, paths)
+            cache = {'doc_a': 'stored', 'doc_b': 'stored'}
         else:
             raise HTTPException(status_code=400, detail="Provide both owner_file and tenant_file or two upload IDs")
-        report = compare_documents(doc_a, doc_b)
-        return report
+        prepared = time.perf_counter()
+        report = metrics.record_comparison(await run_nlp(compare_documents, doc_a, doc_b, mode, profile), profile)
+        if profile:
+            report['diagnostics']['profile'].update(
+                prepare_documents=prepared - started, compare_total=time.perf_counter() - prepared
+            )
+        report['cache'] = cache
+        return FastJSONResponse(project(report, paths))
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/compare/by-id")
+async def compare_by_id(body: CompareRequest, mode: str = Query(COMPARE_MODE), profile: bool = Query(False),
+                        fields: str = _FIELDS_QUERY):
+    """
+    Compare two processed uploads by file ID using their stored analyses.
+    With `fields` only the analysis fields the named report fields need are
+    read from the database.
+    """
+    _check_mode(mode)
+    paths = parse_fields(fields, REPORT_FIELDS)
+    doc_a, doc_b = await _load_stored_pair(body.upload_id_a, body.upload_id_b, paths)
+    try:
+        report = metrics.record_comparison(await run_nlp(compare_documents, doc_a, doc_b, mode, profile), profile)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    report['cache'] = {'doc_a': 'stored', 'doc_b': 'stored'}
+    return FastJSONResponse(project(report, paths))
+
+
+@router.post("/compare/batch")
+async def compare_batch(candidates: List[UploadFile] = File(...), reference_file: UploadFile = File(None),
+                        reference_id: str = Form(None), mode: str = Query(COMPARE_MODE)):
+    """
+    Compare one reference (uploaded file or processed file ID) against many
+    candidate agreements. The reference is analyzed once. Results stream back
+    as NDJSON, one line per candidate as it completes, followed by a summary
+    line ranking all candidates by adjusted_similarity_percent.
+    """
+    _check_mode(mode)
+    if len(candidates) > COMPARE_BATCH_MAX_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"At most {COMPARE_BATCH_MAX_CANDIDATES} candidates per batch")
+
+    try:
+        if reference_file is not None:
+            reference = await process_document(reference_file)
+        elif reference_id:
+            reference = await load_analysis(reference_id)
+            if reference is None:
+                raise HTTPException(status_code=404, detail=f"No stored analysis for: {reference_id}")
+        else:
+            raise HTTPException(status_code=400, detail="Provide reference_file or reference_id")
+
+        # Store candidates before streaming starts; uploads are closed once the handler returns
+        work_dir = tempfile.mkdtemp(prefix="compare-batch-")
+        stored = []
+        try:
+            for index, candidate in enumerate(candidates):
+                suffix = os.path.splitext(candidate.filename or "")[1]
+                path = os.path.join(work_dir, f"{index}{suffix}")
+                saved = await save_upload_file(candidate, path)
+                stored.append({"filename": candidate.filename, "path": path, "cache_key": cache_key(saved["sha256"])})
+        except BaseException:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def lines():
+        try:
+            async for item in stream_batch_comparison(reference, stored, mode):
+                yield dumps(item) + b"\n"
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/compare/matrix")
+async def compare_matrix(body: SimilarityMatrixRequest):
+    """
+    Token-set similarity across many processed files at once, from their
+    stored analyses. Returns the pairs scoring at least `threshold` (Jaccard
+    or cosine) and the groups of near-duplicate agreements they form;
+    `include_matrix=true` adds the full pairwise matrix for smaller sets.
+    """
+    if body.metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(METRICS)}")
+    if body.file_ids is not None and len(body.file_ids) > SIMILARITY_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {SIMILARITY_MAX_DOCUMENTS} files per request")
+
+    # every analyzed file: refuse before any token list is read
+    if body.file_ids is None and await count_analyses() > SIMILARITY_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {SIMILARITY_MAX_DOCUMENTS} files per request; pass file_ids")
+
+    tokens = await load_tokens(body.file_ids)
+    if body.file_ids is not None:
+        missing = [file_id for file_id in body.file_ids if file_id not in tokens]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"No stored analysis for: {', '.join(missing)}; process the files first")
+    if len(tokens) > SIMILARITY_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {SIMILARITY_MAX_DOCUMENTS} files per request; pass file_ids")
+    if body.include_matrix and len(tokens) > SIMILARITY_MATRIX_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"include_matrix is limited to {SIMILARITY_MATRIX_MAX_DOCUMENTS} files")
+
+    try:
+        return await asyncio.to_thread(
+            portfolio_similarity, tokens, body.metric, body.threshold, body.include_matrix
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _export_response(request: Request, report: dict, fmt: str):
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    try:
+        payload, key, tier = await export_report(report, fmt)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400", "X-Export-Cache": tier or "miss"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="comparison-report.{fmt}"'
+    headers["Content-Length"] = str(len(payload))
+    return StreamingResponse(iter_chunks(payload), media_type=FORMATS[fmt], headers=headers)
+
+
+@router.post("/compare/export")
+async def export_comparison(request: Request, report: dict = Body(...), format: str = Query("pdf")):
+    """
+    Render a report returned by /compare (diagnostics, missing and aligned
+    clauses, risk, entity/date differences) as a PDF or XLSX download.
+    Renders are cached by report hash, so exporting the same report again is
+    served from the cache; the ETag lets browsers skip even that.
+    """
+    return await _export_response(request, report, format)
+
+
+@router.get("/compare/export/{process_id}")
+async def export_job_comparison(request: Request, process_id: str, format: str = Query("pdf")):
+    """The comparison of a finished owner/tenant job, exported like /compare/export."""
+    job = await database.fetch_one(
+        select(process_jobs.c.status, process_jobs.c.result).where(process_jobs.c.id == process_id)
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Results not found")
+    result = json.loads(job['result']) if job['result'] else {}
+    if 'comparisonResults' not in result:
+        raise HTTPException(status_code=409, detail=f"Analysis is {ProcessingStatus(job['status']).value}")
+    return await _export_response(request, result['comparisonResults'], format)
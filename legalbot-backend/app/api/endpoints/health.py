@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.config import NLP_WARM_ON_STARTUP
+from app.db.database import database
+from app.services.executor import warm_status
+
+router = APIRouter()
+
+@router.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness():
+    """Ready once the database is connected and (when warm-up is enabled) the NLP models are loaded."""
+    models = warm_status()
+    checks = {
+        "database": database.is_connected,
+        "models": models["warm"] or not NLP_WARM_ON_STARTUP,
+    }
+    body = {"status": "ready" if all(checks.values()) else "starting", "checks": checks}
+    if models["error"]:
+        body["model_error"] = models["error"]
+    return JSONResponse(body, status_code=200 if all(checks.values()) else 503)
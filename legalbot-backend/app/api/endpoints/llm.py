@@ -0,0 +1,55 @@
+import json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, constr
+from app.services.llm_service import llm_service, LLMQueueFullError
+
+router = APIRouter()
+
+class GenerateRequest(BaseModel):
+    prompt: constr(min_length=1)
+    max_tokens: int = Field(512, ge=1)
+    temperature: float = Field(0.7, ge=0.0, le=2.0)
+
+
+def _submit(body: GenerateRequest):
+    try:
+        return llm_service.submit(body.prompt, body.max_tokens, body.temperature)
+    except LLMQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def _event(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router.post("/llm/generate")
+async def generate(body: GenerateRequest):
+    """Generate a completion and return it whole."""
+    request = _submit(body)
+    try:
+        text = await request.text()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"LLM error: {str(e)}")
+    return {"text": text, "cached": request.cached}
+
+
+@router.post("/llm/stream")
+async def stream(body: GenerateRequest):
+    """
+    Stream a completion as server-sent events: one `data: {"token": ...}`
+    event per token, then `event: done` (or `event: error`).
+    """
+    request = _submit(body)
+
+    async def events():
+        try:
+            async for token in request.tokens():
+                yield _event({"token": token})
+        except Exception as e:
+            yield _event({"detail": str(e)}, "error")
+            return
+        yield _event({"cached": request.cached}, "done")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
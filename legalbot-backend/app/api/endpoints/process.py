@@ -1,16 +1,23 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, constr
 from pathlib import Path
 from app.db.database import database
-from app.db.models import files, process_jobs, ProcessingStatus  # Core Table objects
-from app.services.nlp_processing import (
-    extract_text_from_pdf, extract_text_from_docx,
-    extract_clauses, analyze_risk, extract_keywords, summarize_text
-)
+from app.db.models import files, uploads, process_jobs, ProcessingStatus  # Core Table objects
+from app.services.versioning import cached_version_analysis
+from app.services import job_queue
+from app.services.job_events import job_events, is_terminal
+from app.core.config import JOB_EVENTS_KEEPALIVE_S
+from app.services.analysis_cache import hash_file
+from app.services.analysis_store import save_analysis
+from app.core.responses import dumps
+from sqlalchemy import select
+import asyncio
 import uuid
 
 router = APIRouter()
 ALLOWED_EXTENSIONS = {".pdf", ".docx"}
+UPLOAD_DIR = Path("uploads")
 
 class ProcessRequest(BaseModel):
     filename: constr(min_length=1)
@@ -20,23 +27,67 @@ class StartAnalysisRequest(BaseModel):
 
 @router.post("/process/start")
 async def start_analysis(request: StartAnalysisRequest):
-    """Start analysis process using upload ID"""
-    
+    """Queue owner and tenant analysis for an upload ID"""
+
     upload_id = request.uploadId
     if not upload_id:
         raise HTTPException(status_code=400, detail="Upload ID is required")
-    
-    # For now, we'll simulate the process by creating a mock process ID
-    # In a real implementation, you'd store the upload ID and associated file IDs
-    # and retrieve them here to start processing both files
-    
+
+    if job_queue.is_full():
+        raise HTTPException(status_code=503, detail="Analysis queue is full, try again later")
+
+    # The upload and both of its file rows in one round trip
+    owner, tenant = files.alias("owner"), files.alias("tenant")
+    query = (
+        select(
+            uploads.c.owner_file_id, uploads.c.tenant_file_id,
+            owner.c.filename.label("owner_filename"), tenant.c.filename.label("tenant_filename"),
+        )
+        .select_from(
+            uploads.outerjoin(owner, owner.c.id == uploads.c.owner_file_id)
+            .outerjoin(tenant, tenant.c.id == uploads.c.tenant_file_id)
+        )
+        .where(uploads.c.id == upload_id)
+    )
+    try:
+        upload = await database.fetch_one(query)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"DB error: {str(e)}")
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    owner_path = UPLOAD_DIR / upload["owner_filename"] if upload["owner_filename"] else None
+    tenant_path = UPLOAD_DIR / upload["tenant_filename"] if upload["tenant_filename"] else None
+    if not owner_path or not tenant_path or not owner_path.exists() or not tenant_path.exists():
+        raise HTTPException(status_code=404, detail="Uploaded files not found on disk")
+
     process_id = str(uuid.uuid4())
-    
-    # Mock response for now
+    await database.execute(process_jobs.insert().values(
+        id=process_id,
+        file_id=upload["owner_file_id"],
+        upload_id=upload_id,
+        status=ProcessingStatus.pending,
+        stage="queued"
+    ))
+    job_events.publish(process_id, status=ProcessingStatus.pending.value, stage="queued")
+
+    try:
+        job_queue.enqueue(
+            process_id,
+            {"id": upload["owner_file_id"], "path": str(owner_path)},
+            {"id": upload["tenant_file_id"], "path": str(tenant_path)}
+        )
+    except job_queue.QueueFullError as e:
+        await database.execute(process_jobs.update().where(process_jobs.c.id == process_id).values(
+            status=ProcessingStatus.failed
+        ))
+        job_events.publish(process_id, status=ProcessingStatus.failed.value, error=str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+
     return {
         "processId": process_id,
-        "status": "processing",
-        "message": "Analysis started successfully"
+        "status": ProcessingStatus.pending,
+        "message": "Analysis queued"
     }
 
 @router.post("/process/")
@@ -51,7 +102,7 @@ async def start_processing(request: ProcessRequest):
     if not file_record:
         raise HTTPException(status_code=404, detail="File not found in database")
 
-    file_path = Path("uploads") / file_record["filename"]
+    file_path = UPLOAD_DIR / file_record["filename"]
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found on disk")
 
@@ -61,36 +112,37 @@ async def start_processing(request: ProcessRequest):
     process_id = str(uuid.uuid4())
 
     try:
+        # Reuse a cached analysis of identical bytes, otherwise extract text and
+        # run NLP in the worker pool, off the event loop, on the paragraphs that
+        # changed since the file's previous version
+        content_hash = file_record["sha256"] or await asyncio.to_thread(hash_file, str(file_path))
+        analysis, tier = await cached_version_analysis(file_record["id"], str(file_path), content_hash)
+        # chunked analyses of very large files keep the units instead of the text
+        snippet = (analysis.get('text') or ' '.join(analysis['units'][:50]))[:500]
+        clauses = analysis['clauses']
+        risk = analysis['risk']
+        keywords_list = analysis['keywords']
+        summary_text = analysis['summary']
+
+        # The job is only returned once finished, so its row is written once, completed,
+        # in the same transaction as the text, artifact and clause/entity/date rows
+        async with database.transaction():
+            await database.execute(process_jobs.insert().values(
+                id=process_id,
+                file_id=file_record["id"],
+                status=ProcessingStatus.completed,
+                extracted_clauses='; '.join(clauses),
+                risk_level=risk['level'],  # Save only risk level string here
+                keywords=', '.join(keywords_list),
+                summary=summary_text
+            ))
+            index_clauses = await save_analysis(file_record["id"], process_id, analysis)
+        index_clauses()
+
+    except Exception as e:
         await database.execute(process_jobs.insert().values(
             id=process_id,
             file_id=file_record["id"],
-            status=ProcessingStatus.processing
-        ))
-
-        # Extract text
-        if file_path.suffix.lower() == ".pdf":
-            text = extract_text_from_pdf(str(file_path))
-        else:
-            text = extract_text_from_docx(str(file_path))
-
-        # NLP enhancements
-        clauses = extract_clauses(text)
-        risk = analyze_risk(text)
-        keywords_list = extract_keywords(text)
-        summary_text = summarize_text(text)
-
-        # Save results to DB, properly saving risk level string
-        await database.execute(process_jobs.update().where(process_jobs.c.id == process_id).values(
-            status=ProcessingStatus.completed,
-            extracted_text=text,
-            extracted_clauses='; '.join(clauses),
-            risk_level=risk['level'],  # Save only risk level string here
-            keywords=', '.join(keywords_list),
-            summary=summary_text
-        ))
-
-    except Exception as e:
-        await database.execute(process_jobs.update().where(process_jobs.c.id == process_id).values(
             status=ProcessingStatus.failed
         ))
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
@@ -98,49 +150,91 @@ async def start_processing(request: ProcessRequest):
     return {
         "process_id": process_id,
         "status": "completed",
-        "extracted_text_snippet": text[:500],
+        "extracted_text_snippet": snippet,
         "clauses": clauses,
         "risk_level": risk['level'],
         "keywords": keywords_list,
-        "summary": summary_text
+        "summary": summary_text,
+        "cache": tier or "miss"
     }
 
-@router.get("/process/status/{process_id}")
-async def get_processing_status(process_id: str):
+async def _job_state(process_id: str):
+    """Latest known state of a job: from the event bus while it is live, else from its row."""
+    state = job_events.state(process_id)
+    if state is not None:
+        return state
     try:
-        query = process_jobs.select().where(process_jobs.c.id == process_id)
+        query = select(process_jobs.c.status, process_jobs.c.stage).where(process_jobs.c.id == process_id)
         job = await database.fetch_one(query)
-        
-        # For mock data, return completed status
-        if not job:
-            return {"status": "completed"}
-            
     except Exception as e:
-        # For mock data, return completed status
-        return {"status": "completed"}
-
-    return {"process_id": process_id, "status": job["status"]}
-
-@router.get("/results/{process_id}")
-async def get_analysis_results(process_id: str):
-    """Get analysis results by process ID"""
-    
-    # For now, return mock data
-    # In a real implementation, you'd fetch from the database
-    
-    mock_results = {
-        "ownerResults": {
-            "risk_level": "Medium",
-            "summary": "This is a sample owner agreement with standard terms and conditions including liability limitations and termination clauses.",
-            "clauses": "termination clause; liability limitation; confidentiality agreement",
-            "keywords": "agreement, liability, termination, confidentiality, indemnity"
-        },
-        "tenantResults": {
-            "risk_level": "Low",
-            "summary": "This tenant agreement contains basic rental terms with standard tenant obligations and property maintenance requirements.",
-            "clauses": "rental terms; tenant obligations; property maintenance",
-            "keywords": "rental, obligations, maintenance, property, terms"
-        }
-    }
-    
-    return mock_results
+        raise HTTPException(status_code=500, detail=f"DB error: {str(e)}")
+    if not job:
+        return None
+    return {"process_id": process_id, "status": ProcessingStatus(job["status"]).value, "stage": job["stage"]}
+
+
+async def _job_updates(process_id: str, state: dict):
+    """
+    The job's current state, then every published update until the job
+    finishes; yields None after JOB_EVENTS_KEEPALIVE_S without one.
+    """
+    with job_events.subscribe(process_id) as subscription:
+        if not subscription.has_state:
+            yield state
+            if is_terminal(state):
+                return
+        while True:
+            event = await subscription.next(JOB_EVENTS_KEEPALIVE_S)
+            yield event
+            if event is not None and is_terminal(event):
+                return
+
+
+@router.get("/process/status/{process_id}")
+async def get_processing_status(process_id: str):
+    state = await _job_state(process_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Process not found")
+
+    return {"process_id": process_id, "status": state["status"], "stage": state["stage"]}
+
+
+@router.get("/process/events/{process_id}")
+async def stream_processing_status(process_id: str):
+    """
+    Server-sent events for a queued analysis: the current state, then one
+    `data:` event per stage transition with any partial results (clauses
+    found, risk scores), ending with the completed or failed event.
+    """
+    state = await _job_state(process_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Process not found")
+
+    async def events():
+        async for event in _job_updates(process_id, state):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                event_type = f"event: {event['status']}\n" if is_terminal(event) else ""
+                yield f"{event_type}data: {dumps(event).decode()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.websocket("/process/ws/{process_id}")
+async def process_status_socket(websocket: WebSocket, process_id: str):
+    """The same updates as /process/events as JSON messages; closed once the job finishes."""
+    await websocket.accept()
+    state = await _job_state(process_id)
+    if not state:
+        await websocket.close(code=4404, reason="Process not found")
+        return
+    try:
+        async for event in _job_updates(process_id, state):
+            if event is None:
+                await websocket.send_json({"process_id": process_id, "keepalive": True})
+            else:
+                await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
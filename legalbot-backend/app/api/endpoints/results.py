@@ -1,25 +1,103 @@
-from fastapi import APIRouter, HTTPException
-from app.db.database import database
-from app.db.models import process_jobs
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+from sqlalchemy import select
+from app.core.responses import FastJSONResponse, parse_fields, set_path
+from app.db.database import database, json_field
+from app.db.models import process_jobs, uploads
+from app.services.analysis_store import SECTIONS, load_section, load_text_snippet
 
 router = APIRouter()
 
+# Legacy single-file jobs: response field -> column (the text comes from the stored analysis)
+_LEGACY_FIELDS = {
+    "clauses": process_jobs.c.extracted_clauses,
+    "risk_level": process_jobs.c.risk_level,
+    "keywords": process_jobs.c.keywords,
+    "summary": process_jobs.c.summary,
+}
+LEGACY_RESULT_FIELDS = ("process_id", "extracted_text", *_LEGACY_FIELDS)
+# Owner/tenant jobs: top-level keys of the stored result JSON; paths may go deeper
+UPLOAD_RESULT_FIELDS = ("ownerResults", "tenantResults", "comparisonResults")
+
+
+def _legacy_result(process_id: str, job: dict, paths, text):
+    result = {"process_id": process_id, "extracted_text": text or ""}
+    for name in _LEGACY_FIELDS:
+        if name in job:
+            result[name] = job[name] if name == "risk_level" else (job[name] or "")
+    return {name: result[name] for name in (paths or LEGACY_RESULT_FIELDS) if name in result}
+
+
 @router.get("/results/{process_id}")
-async def get_analysis_results(process_id: str):
+async def get_analysis_results(process_id: str, fields: str = Query(
+        None, description="Comma-separated fields to return; dotted paths select inside owner/tenant results")):
+    """
+    The results of a job. With `fields` only the named parts are read from
+    the database and sent, e.g. `comparisonResults.similarity_percent`;
+    paths that are not in an owner/tenant result come back as null.
+    """
+    paths = parse_fields(fields, LEGACY_RESULT_FIELDS + UPLOAD_RESULT_FIELDS)
+    json_paths = [path for path in paths or () if path.split(".")[0] in UPLOAD_RESULT_FIELDS]
+    columns = [process_jobs.c.status, process_jobs.c.upload_id, process_jobs.c.file_id]
+    columns += [column.label(name) for name, column in _LEGACY_FIELDS.items() if paths is None or name in paths]
+    if paths is None:
+        columns.append(process_jobs.c.result)
+    else:
+        columns += [
+            json_field(process_jobs.c.result, tuple(path.split("."))).label(f"path_{i}")
+            for i, path in enumerate(json_paths)
+        ]
+        columns.append((process_jobs.c.result.isnot(None)).label("has_result"))
     try:
-        query = process_jobs.select().where(process_jobs.c.id == process_id)
-        job = await database.fetch_one(query)
+        job = await database.fetch_one(select(*columns).where(process_jobs.c.id == process_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB error: {str(e)}")
 
     if not job:
         raise HTTPException(status_code=404, detail="Results not found")
 
-    return {
-        "process_id": process_id,
-        "extracted_text": (job['extracted_text'] or "")[:1000],
-        "clauses": (job['extracted_clauses'] or ""),
-        "risk_level": job['risk_level'],
-        "keywords": (job['keywords'] or ""),
-        "summary": (job['summary'] or "")
-    }
+    # Owner/tenant jobs queued through /process/start keep their results as JSON
+    if job['upload_id']:
+        stored = job['result'] if paths is None else job['has_result']
+        if not stored or job['status'] != "completed":
+            raise HTTPException(status_code=409, detail=f"Analysis is {job['status']}")
+        if paths is None:
+            # already JSON: sent as stored, without decoding and encoding it again
+            return Response(content=job['result'], media_type="application/json")
+        result = {}
+        for i, path in enumerate(json_paths):
+            set_path(result, path, job[f"path_{i}"])
+        return FastJSONResponse(result)
+
+    job = dict(job)
+    text = None
+    if paths is None or "extracted_text" in paths:
+        text = await load_text_snippet(job['file_id'], 1000)
+    return FastJSONResponse(_legacy_result(process_id, job, paths, text))
+
+@router.get("/results/{process_id}/{section}")
+async def get_result_section(process_id: str, section: str, role: str = Query("owner", pattern="^(owner|tenant)$"),
+                             offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """
+    Page through the clauses, entities or dates of a job's document. For
+    owner/tenant jobs `role` picks the document.
+    """
+    if section not in SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown section; use one of {', '.join(SECTIONS)}")
+    job = await database.fetch_one(
+        select(process_jobs.c.file_id, process_jobs.c.upload_id).where(process_jobs.c.id == process_id)
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Results not found")
+
+    file_id = job['file_id']
+    if job['upload_id'] and role == "tenant":
+        upload = await database.fetch_one(
+            select(uploads.c.tenant_file_id).where(uploads.c.id == job['upload_id'])
+        )
+        file_id = upload['tenant_file_id'] if upload else None
+    if file_id is None:
+        raise HTTPException(status_code=404, detail="Results not found")
+
+    page = await load_section(file_id, section, offset, limit)
+    return {"process_id": process_id, "file_id": file_id, "section": section, **page}
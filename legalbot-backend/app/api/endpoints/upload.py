@@ -1,10 +1,10 @@
-from fastapi import APIRouter, UploadFile, File as FastAPIFile, HTTPException
+from fastapi import APIRouter, UploadFile, File as FastAPIFile, Form, HTTPException
 from app.db.database import database
-from sqlalchemy import insert
+from sqlalchemy import insert, select
 import uuid
-import shutil
 from pathlib import Path
 from app.db.models import files  # Core table object named 'files'
+from app.services.file_manager import save_upload_file, UploadTooLargeError
 
 router = APIRouter()
 ALLOWED_EXTENSIONS = {".pdf", ".docx"}
@@ -13,22 +13,35 @@ UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True, parents=True)
 
 @router.post("/upload/")
-async def upload_file(file: UploadFile = FastAPIFile(...)):
+async def upload_file(file: UploadFile = FastAPIFile(...), previous_file_id: str = Form(None)):
+    """
+    Store a file. `previous_file_id` marks it as a new version of an earlier
+    upload, whose unchanged paragraphs are then not analyzed again.
+    """
     if not any(file.filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS):
         raise HTTPException(status_code=400, detail="Unsupported file format")
+    if previous_file_id and not await database.fetch_val(select(files.c.id).where(files.c.id == previous_file_id)):
+        raise HTTPException(status_code=404, detail="Previous version not found")
 
     file_id = str(uuid.uuid4())
     filename = f"{file_id}_{file.filename}"
     file_path = UPLOAD_DIR / filename
 
     try:
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        stored = await save_upload_file(file, str(file_path))
 
-        query = insert(files).values(id=file_id, filename=filename, original_name=file.filename)
+        query = insert(files).values(
+            id=file_id, filename=filename, original_name=file.filename,
+            sha256=stored["sha256"], size=stored["size"], previous_file_id=previous_file_id
+        )
         await database.execute(query)
 
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-    return {"file_id": file_id, "filename": filename}
+    return {
+        "file_id": file_id, "filename": filename, "sha256": stored["sha256"], "size": stored["size"],
+        "previous_file_id": previous_file_id,
+    }
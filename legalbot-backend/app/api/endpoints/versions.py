@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.services.versioning import previous_version, version_chain, version_diff
+
+router = APIRouter()
+
+
+@router.get("/versions/{file_id}")
+async def list_versions(file_id: str):
+    """The file and the earlier versions it revises, newest first."""
+    chain = await version_chain(file_id)
+    if not chain:
+        raise HTTPException(status_code=404, detail="File not found")
+    return {"file_id": file_id, "versions": chain}
+
+
+@router.get("/versions/{file_id}/diff")
+async def diff_versions(file_id: str, against: str = Query(None)):
+    """
+    Paragraphs inserted, deleted or replaced since `against` (by default the
+    version this file revises), computed from stored segment hashes without
+    re-reading either document.
+    """
+    old_id = against or await previous_version(file_id)
+    if not old_id:
+        raise HTTPException(status_code=404, detail="No previous version to compare with")
+    diff = await version_diff(old_id, file_id)
+    if diff is None:
+        raise HTTPException(status_code=409, detail="Both versions must be analyzed first")
+    return diff
@@ -0,0 +1,105 @@
+import anyio.to_thread
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import (
+    DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware, GZipResponder, IdentityResponder
+)
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; clients then get gzip
+    brotli = None
+
+# Already compressed downloads (report exports) are sent as they are
+EXCLUDED_CONTENT_TYPES = DEFAULT_EXCLUDED_CONTENT_TYPES + (
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+)
+
+
+def accepted_encodings(header: str) -> dict:
+    """{coding: q} from an Accept-Encoding header; codings with q=0 are refused."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(header: str, brotli_available: bool = None):
+    """The coding to answer an Accept-Encoding header with: "br", "gzip" or None (identity)."""
+    if brotli_available is None:
+        brotli_available = brotli is not None
+    accepted = accepted_encodings(header or "")
+    wildcard = accepted.get("*", 0.0)
+    offers = ["br", "gzip"] if brotli_available else ["gzip"]
+    scored = [(accepted.get(coding, wildcard), -rank, coding) for rank, coding in enumerate(offers)]
+    q, _, coding = max(scored)
+    return coding if q > 0 else None
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int = 5, *, thread_minimum_size: int = 128 * 1024,
+                 exclude_content_types=EXCLUDED_CONTENT_TYPES):
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self.quality = quality
+        self.thread_minimum_size = thread_minimum_size
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= self.thread_minimum_size:
+            # like GZipResponder, keep large bodies off the event loop
+            return await anyio.to_thread.run_sync(self._compress_body, body, more_body)
+        return self._compress_body(body, more_body)
+
+    def _compress_body(self, body: bytes, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        if more_body:
+            # flush so each streamed chunk reaches the client right away
+            return self._compressor.process(body) + self._compressor.flush()
+        return self._compressor.process(body) + self._compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that negotiates the encoding from Accept-Encoding: brotli
+    when the client prefers or equally accepts it (and the brotli package is
+    installed), else gzip. Small bodies, event streams and already compressed
+    downloads are sent uncompressed.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        super().__init__(app, minimum_size, compresslevel=gzip_level, exclude_content_types=EXCLUDED_CONTENT_TYPES)
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "br":
+            responder = BrotliResponder(
+                self.app, self.minimum_size, self.brotli_quality,
+                thread_minimum_size=self.thread_minimum_size, exclude_content_types=self.exclude_content_types,
+            )
+        elif encoding == "gzip":
+            responder = GZipResponder(
+                self.app, self.minimum_size, compresslevel=self.compresslevel,
+                thread_minimum_size=self.thread_minimum_size, exclude_content_types=self.exclude_content_types,
+            )
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size, exclude_content_types=self.exclude_content_types)
+        await responder(scope, receive, send)
@@ -0,0 +1,152 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from app.core.config import METRICS_ENABLED
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+_lock = threading.Lock()
+_histograms = {}  # name -> {labels: [bucket counts..., sum, count]}
+_counters = {}  # name -> {labels: value}
+_gauges = {}  # name -> callable returning the current value
+_help = {}
+_buckets = {}
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def observe(name: str, value: float, buckets=LATENCY_BUCKETS, help: str = "", **labels) -> None:
+    if not METRICS_ENABLED:
+        return
+    key = _labels(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        _buckets.setdefault(name, buckets)
+        _help.setdefault(name, help)
+        state = series.get(key)
+        if state is None:
+            state = series[key] = [0] * (len(buckets) + 2)
+        for i, bound in enumerate(_buckets[name]):
+            if value <= bound:
+                state[i] += 1
+        state[-2] += value
+        state[-1] += 1
+
+
+def inc(name: str, amount: float = 1, help: str = "", **labels) -> None:
+    if not METRICS_ENABLED:
+        return
+    key = _labels(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        _help.setdefault(name, help)
+        series[key] = series.get(key, 0) + amount
+
+
+def gauge(name: str, read, help: str = "") -> None:
+    """Register a gauge whose value is read from `read()` when metrics are scraped."""
+    _gauges[name] = read
+    _help[name] = help
+
+
+@contextmanager
+def timed(profile: dict, stage: str):
+    """Add the block's wall time (seconds) to profile[stage]; profile may be None."""
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile[stage] = profile.get(stage, 0.0) + time.perf_counter() - start
+
+
+def record_profile(profile: dict, kind: str) -> None:
+    """Feed stage timings collected (possibly in a worker process) into the histograms."""
+    for stage, seconds in (profile or {}).items():
+        observe("legalbot_stage_seconds", seconds, help="NLP pipeline stage latency", kind=kind, stage=stage)
+
+
+def record_analysis(analysis: dict) -> dict:
+    """Pop the private profile/stats keys an analysis carries back from the worker and record them."""
+    profile = analysis.pop('_profile', None)
+    stats = analysis.pop('_stats', None)
+    if METRICS_ENABLED:
+        record_profile(profile, "analysis")
+        if stats:
+            observe("legalbot_document_chars", stats['chars'], SIZE_BUCKETS, help="Extracted document size in characters")
+            observe("legalbot_document_tokens", stats['tokens'], SIZE_BUCKETS, help="spaCy tokens per document")
+    return analysis
+
+
+def record_comparison(report: dict, keep_profile: bool = False) -> dict:
+    """Record compare_documents' stage timings; diagnostics keep them only if keep_profile."""
+    diagnostics = report.get('diagnostics', {})
+    profile = diagnostics.get('profile') if keep_profile else diagnostics.pop('profile', None)
+    record_profile(profile, "compare")
+    return report
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request by route template, method and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            observe(
+                "legalbot_http_request_seconds", time.perf_counter() - start,
+                help="HTTP request latency until the response is fully sent",
+                path=getattr(route, "path", "unmatched"), method=scope["method"], status=status[0],
+            )
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in items) + "}"
+
+
+def render() -> str:
+    """Prometheus text exposition format (0.0.4)."""
+    lines = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            lines.append(f"# HELP {name} {_help.get(name, '')}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        for name, series in sorted(_histograms.items()):
+            lines.append(f"# HELP {name} {_help.get(name, '')}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, state in series.items():
+                for bound, count in zip(_buckets[name], state):
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', bound),))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {state[-1]}")
+                lines.append(f"{name}_sum{_format_labels(key)} {state[-2]}")
+                lines.append(f"{name}_count{_format_labels(key)} {state[-1]}")
+    for name, read in sorted(_gauges.items()):
+        lines.append(f"# HELP {name} {_help.get(name, '')}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {read()}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,73 @@
+from typing import Any, Iterable, List, Optional
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """JSON bytes via orjson; numpy values, enums and sets included."""
+    return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson. Endpoints that return one directly also
+    skip FastAPI's jsonable_encoder pass over the content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str] = None) -> Optional[List[str]]:
+    """
+    The paths of a `fields=` selector ("a,b.c" -> ["a", "b.c"]), or None when
+    it is absent. With `allowed`, the first component of each path must be
+    one of them (400 otherwise).
+    """
+    if fields is None:
+        return None
+    paths = list(dict.fromkeys(path.strip() for path in fields.split(",") if path.strip()))
+    if not paths:
+        raise HTTPException(status_code=400, detail="fields must name at least one field")
+    if allowed is not None:
+        allowed = set(allowed)
+        unknown = [path for path in paths if path.split(".")[0] not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}; use {', '.join(sorted(allowed))}",
+            )
+    return paths
+
+
+def set_path(target: dict, path: str, value: Any) -> None:
+    keys = path.split(".")
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+
+def project(content: dict, paths: Optional[List[str]]) -> dict:
+    """The parts of content named by dotted paths, nested as in content; missing paths are left out."""
+    if paths is None:
+        return content
+    projected = {}
+    for path in paths:
+        value = content
+        for key in path.split("."):
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            set_path(projected, path, value)
+    return projected
@@ -1,25 +1,157 @@
-from databases import Database
-from sqlalchemy import create_engine, MetaData, select
-from app.core.config import DATABASE_URL
-from app.db.models import process_jobs  # Use ProcessJob if Document model doesn't exist
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import time
 
-database = Database(DATABASE_URL)
+from databases import Database, DatabaseURL
+from databases.backends.sqlite import SQLiteBackend, SQLitePool
+from sqlalchemy import JSON, cast, type_coerce
+from app.core.config import (
+    DATABASE_URL, METRICS_ENABLED, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_STATEMENT_CACHE_SIZE,
+    DB_INSERT_BATCH_ROWS, DB_MAX_BIND_PARAMS
+)
+from app.core import metrics
 
-# For Alembic and SQLAlchemy sync engine, remove async driver prefix from DATABASE_URL
-engine = create_engine(DATABASE_URL.replace("asyncpg", "psycopg2"))
 
-metadata = MetaData()
+class PooledSQLitePool(SQLitePool):
+    """
+    Keeps up to max_size aiosqlite connections open and hands them out again,
+    where the stock pool opens (and starts a thread for) a new connection per
+    query. Reused connections also keep their prepared statement cache.
+    """
 
-print("Database URL used by engine:", DATABASE_URL)
-print("Engine created with URL:", engine.url)
+    def __init__(self, url: DatabaseURL, min_size: int = 1, max_size: int = 5, **options):
+        super().__init__(url, **options)
+        self.min_size = min_size
+        self.max_size = max_size
+        self._idle = []
+        self._slots = None
+        self._file_backed = self._database != ":memory:" and "mode=memory" not in self._database
 
-# Create async session factory for DB access in async methods
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async def _open(self):
+        connection = await super().acquire()
+        if self._file_backed:
+            # readers no longer block the writer, so concurrent requests do not serialize
+            async with connection.execute("PRAGMA journal_mode=WAL") as cursor:
+                await cursor.fetchall()
+        return connection
 
+    async def open(self) -> None:
+        while len(self._idle) < self.min_size:
+            self._idle.append(await self._open())
 
-async def get_document_by_process_id(process_id: str, session: AsyncSession):
-    stmt = select(process_jobs).where(process_jobs.c.id == process_id)
-    result = await session.execute(stmt)
-    return result.scalar_one_or_none()
+    async def acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_size)
+        await self._slots.acquire()
+        try:
+            return self._idle.pop() if self._idle else await self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, connection) -> None:
+        try:
+            if connection.in_transaction:
+                await connection.rollback()
+            self._idle.append(connection)
+        except Exception:
+            await super().release(connection)
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await super().release(connection)
+
+
+class PooledSQLiteBackend(SQLiteBackend):
+    def __init__(self, database_url, min_size: int = 1, max_size: int = 5, **options):
+        super().__init__(database_url, **options)
+        self._pool = PooledSQLitePool(self._database_url, min_size, max_size, **options)
+
+    async def connect(self) -> None:
+        await self._pool.open()
+
+    async def disconnect(self) -> None:
+        await self._pool.close()
+        await super().disconnect()
+
+
+def pool_options(url: str) -> dict:
+    """
+    Pool sizing and statement caching for the backend behind url. Options
+    already given as URL query parameters take precedence.
+    """
+    url = DatabaseURL(url)
+    if url.dialect == "sqlite":
+        options = {"min_size": DB_POOL_MIN_SIZE, "max_size": DB_POOL_MAX_SIZE,
+                   "cached_statements": DB_STATEMENT_CACHE_SIZE}
+    elif url.dialect in ("postgresql", "postgres") and url.driver in (None, "", "asyncpg"):
+        # asyncpg prepares every query and keeps the statements per connection
+        options = {"min_size": DB_POOL_MIN_SIZE, "max_size": DB_POOL_MAX_SIZE,
+                   "statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    else:
+        options = {}
+    return {key: value for key, value in options.items() if key not in url.options}
+
+
+class AppDatabase(Database):
+    """The one async database handle: pooled connections plus batched writes."""
+
+    SUPPORTED_BACKENDS = {**Database.SUPPORTED_BACKENDS, "sqlite": "app.db.database:PooledSQLiteBackend"}
+
+    async def insert_many(self, table, rows: list) -> None:
+        """
+        Insert rows (dicts with the same keys) as multi-row INSERT statements
+        of at most DB_INSERT_BATCH_ROWS rows, all in one transaction, instead
+        of one statement and round trip per row as execute_many does.
+        """
+        if not rows:
+            return
+        batch = max(1, min(DB_INSERT_BATCH_ROWS, DB_MAX_BIND_PARAMS // max(1, len(rows[0]))))
+        async with self.transaction():
+            for start in range(0, len(rows), batch):
+                await self.execute(table.insert().values(rows[start:start + batch]))
+
+
+class InstrumentedDatabase(AppDatabase):
+    """Database that records the latency of each query method in metrics."""
+
+    async def _timed(self, op: str, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            metrics.observe("legalbot_db_seconds", time.perf_counter() - start, help="Database call latency", op=op)
+
+    async def execute(self, *args, **kwargs):
+        return await self._timed("execute", super().execute(*args, **kwargs))
+
+    async def execute_many(self, *args, **kwargs):
+        return await self._timed("execute_many", super().execute_many(*args, **kwargs))
+
+    async def fetch_one(self, *args, **kwargs):
+        return await self._timed("fetch_one", super().fetch_one(*args, **kwargs))
+
+    async def fetch_all(self, *args, **kwargs):
+        return await self._timed("fetch_all", super().fetch_all(*args, **kwargs))
+
+    async def fetch_val(self, *args, **kwargs):
+        return await self._timed("fetch_val", super().fetch_val(*args, **kwargs))
+
+
+database = (InstrumentedDatabase if METRICS_ENABLED else AppDatabase)(DATABASE_URL, **pool_options(DATABASE_URL))
+
+
+def json_field(column, path):
+    """
+    The value at path (a key or tuple of keys) inside a Text column holding
+    JSON, extracted by the database so only that part is read and sent back.
+    Postgres needs the text cast to json first; SQLite's JSON functions read
+    the text as it is.
+    """
+    if database.url.dialect in ("postgresql", "postgres"):
+        document = cast(column, JSON)
+    else:
+        document = type_coerce(column, JSON)
+    return document[path]
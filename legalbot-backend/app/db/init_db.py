@@ -1,9 +1,10 @@
-from sqlalchemy import create_engine
-from app.core.config import DATABASE_URL
-from app.db.models import metadata  # Import metadata from your models
+from pathlib import Path
 
-engine = create_engine(DATABASE_URL.replace("asyncpg", "psycopg2"))
+from alembic import command
+from alembic.config import Config
 
-metadata.create_all(engine)
+# Create or upgrade the schema through the migrations in migrations/
+config = Config(str(Path(__file__).resolve().parents[2] / "alembic.ini"))
+command.upgrade(config, "head")
 
 print("Tables created successfully!")
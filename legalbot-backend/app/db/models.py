@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, String, Text, Enum, MetaData
+from sqlalchemy import Table, Column, String, Text, Enum, Integer, LargeBinary, MetaData, Index
 import enum
 
 metadata = MetaData()
@@ -13,8 +13,19 @@ files = Table(
     "files",
     metadata,
     Column("id", String, primary_key=True),
-    Column("filename", String, nullable=False),
+    Column("filename", String, nullable=False, index=True),
     Column("original_name", String, nullable=False),
+    Column("sha256", String(64), nullable=True),
+    Column("size", Integer, nullable=True),
+    Column("previous_file_id", String, nullable=True, index=True),  # the version this file revises
+)
+
+uploads = Table(
+    "uploads",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("owner_file_id", String, nullable=False),
+    Column("tenant_file_id", String, nullable=False),
 )
 
 process_jobs = Table(
@@ -23,9 +34,88 @@ process_jobs = Table(
     Column("id", String, primary_key=True),
     Column("file_id", String, nullable=False),
     Column("status", Enum(ProcessingStatus), nullable=False),
-    Column("extracted_text", Text, nullable=True),
     Column("extracted_clauses", Text, nullable=True),
     Column("risk_level", String(10), nullable=True),
     Column("keywords", Text, nullable=True),
     Column("summary", Text, nullable=True),
+    Column("upload_id", String, nullable=True),
+    Column("stage", String(20), nullable=True),
+    Column("result", Text, nullable=True),  # JSON payload for owner/tenant jobs
+    Index("ix_process_jobs_upload_id", "upload_id"),
+)
+
+# Extracted text lives apart from job rows so status/result queries never load it
+document_texts = Table(
+    "document_texts",
+    metadata,
+    Column("file_id", String, primary_key=True),
+    Column("process_id", String, nullable=False),
+    Column("chars", Integer, nullable=False),
+    Column("text", Text, nullable=False),
+)
+
+document_analyses = Table(
+    "document_analyses",
+    metadata,
+    Column("file_id", String, primary_key=True),
+    Column("process_id", String, nullable=False),
+    Column("analysis", Text, nullable=False),  # JSON: clauses, entities, dates, tokens, ...
+)
+
+analysis_clauses = Table(
+    "analysis_clauses",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("file_id", String, nullable=False),
+    Column("position", Integer, nullable=False),
+    Column("page", Integer, nullable=True),
+    Column("clause", Text, nullable=False),
+    Index("ix_analysis_clauses_file_position", "file_id", "position"),
+)
+
+analysis_entities = Table(
+    "analysis_entities",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("file_id", String, nullable=False),
+    Column("entity", String, nullable=False),
+    Column("occurrences", Integer, nullable=False),
+    Index("ix_analysis_entities_file_entity", "file_id", "entity"),
+    Index("ix_analysis_entities_entity", "entity"),
+)
+
+analysis_dates = Table(
+    "analysis_dates",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("file_id", String, nullable=False),
+    Column("kind", String(10), nullable=False),  # date, duration or deadline
+    Column("value", String, nullable=False),  # ISO date, or "<n> <unit>" for durations/deadlines
+    Column("detail", Text, nullable=True),  # JSON of the structured duration/deadline
+    Index("ix_analysis_dates_file_kind", "file_id", "kind"),
+    Index("ix_analysis_dates_value", "value"),
+)
+
+# Per-paragraph results of a file's analysis, reused when a later version keeps the paragraph
+document_segments = Table(
+    "document_segments",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("file_id", String, nullable=False),
+    Column("position", Integer, nullable=False),
+    Column("segment_hash", String(64), nullable=False),
+    Column("page", Integer, nullable=True),
+    Column("chars", Integer, nullable=False),
+    Column("pipeline", String, nullable=False),  # analysis_cache.pipeline_tag() the result was made with
+    Column("analysis", Text, nullable=False),  # JSON: clause spans, entities, dates, risk counts, ...
+    Index("ix_document_segments_file_position", "file_id", "position"),
+)
+
+clause_signatures = Table(
+    "clause_signatures",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("file_id", String, nullable=False, index=True),
+    Column("clause", Text, nullable=False),
+    Column("signature", LargeBinary, nullable=False),  # int32 MinHash values
 )
@@ -1,10 +1,22 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import upload, process, results, user, comparison
+from fastapi.responses import PlainTextResponse
+from app.api.endpoints import upload, process, results, user, comparison, clauses, health, llm, versions
 from app.api.endpoints.agreements import router as agreements_router
 from app.db.database import database
+from app.core.config import (
+    NLP_WARM_ON_STARTUP, METRICS_ENABLED, COMPRESSION_MIN_BYTES, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
+)
+from app.core import metrics
+from app.core.compression import CompressionMiddleware
+from app.core.responses import FastJSONResponse
+from app.services.executor import shutdown_executor, warm_up
+from app.services import job_queue
+from app.services.clause_index import clause_index
+from app.services.llm_service import llm_service
 
-app = FastAPI(title="LegalBot Backend")
+app = FastAPI(title="LegalBot Backend", default_response_class=FastJSONResponse)
 
 origins = [
     "http://localhost:4200",  # your frontend origin
@@ -18,21 +30,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_BYTES,
+    gzip_level=COMPRESSION_GZIP_LEVEL,
+    brotli_quality=COMPRESSION_BROTLI_QUALITY,
+)
+
+if METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(upload, prefix="/api")
 app.include_router(process, prefix="/api")
 app.include_router(results, prefix="/api")
 app.include_router(user, prefix="/api")
 app.include_router(comparison, prefix="/api")
+app.include_router(clauses, prefix="/api")
+app.include_router(health, prefix="/api")
+app.include_router(llm, prefix="/api")
+app.include_router(versions, prefix="/api")
 app.include_router(agreements_router, prefix="/api")
 
 @app.on_event("startup")
 async def startup():
     await database.connect()
+    await job_queue.start_workers()
+    await llm_service.start()
+    # Build the clause search index in the background so the first search doesn't wait for it
+    app.state.clause_index_task = asyncio.create_task(clause_index.load())
+    if NLP_WARM_ON_STARTUP:
+        # Load models in the background so the worker accepts requests right away
+        app.state.warm_task = asyncio.create_task(warm_up())
 
 @app.on_event("shutdown")
 async def shutdown():
+    await job_queue.stop_workers()
+    await llm_service.stop()
     await database.disconnect()
+    shutdown_executor()
 
 @app.get("/")
 async def root():
     return {"message": "LegalBot backend up and running!"}
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape target; 404 when METRICS_ENABLED is off."""
+    if not METRICS_ENABLED:
+        return PlainTextResponse("metrics disabled", status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from importlib import metadata
+from pathlib import Path
+
+from app.core.config import (
+    NLP_MODEL, ANALYSIS_CACHE_DIR, ANALYSIS_CACHE_MEMORY_MB, ANALYSIS_CACHE_DISK_MB
+)
+from app.core import metrics
+
+# Bump whenever analyze_text output changes so stale entries are never served
+PIPELINE_VERSION = "10"
+
+_CACHE_HELP = "Analysis cache lookups by the tier that answered (or miss)"
+
+
+def _model_version() -> str:
+    try:
+        return metadata.version(NLP_MODEL)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def pipeline_tag() -> str:
+    """Pipeline and spaCy model versions; results made under another tag are never reused."""
+    return f"{PIPELINE_VERSION}:{NLP_MODEL}:{_model_version()}"
+
+
+def cache_key(content_hash: str, kind: str = "file") -> str:
+    """
+    Key an analysis by file content, pipeline version and spaCy model version.
+    `kind` keeps apart analyses of the same bytes made differently: "file"
+    (analyze_file) and "revision" (analyze_revision, with per-segment results).
+    """
+    return hashlib.sha256(f"{content_hash}:{kind}:{pipeline_tag()}".encode()).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Two-tier cache of analysis results: an in-memory LRU bounded by total
+    bytes, backed by JSON files on disk evicted oldest-access-first once the
+    directory grows past its byte budget. A budget of 0 disables a tier.
+    get_bytes/put_bytes store opaque payloads (e.g. rendered exports).
+    """
+
+    def __init__(self, directory: str, memory_bytes: int, disk_bytes: int, suffix: str = ".json"):
+        self.memory_bytes = memory_bytes
+        self.suffix = suffix
+        self.disk_bytes = disk_bytes
+        self.directory = Path(directory)
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = None
+        self._lock = threading.Lock()
+
+    # memory tier
+
+    def _memory_get(self, key: str):
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+            return payload
+
+    def _memory_put(self, key: str, payload: bytes) -> None:
+        if len(payload) > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= len(old)
+            self._memory[key] = payload
+            self._memory_size += len(payload)
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    # disk tier (blocking, always called through a thread)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _disk_get(self, key: str):
+        path = self._path(key)
+        try:
+            payload = path.read_bytes()
+            os.utime(path)  # mark as recently used for eviction
+        except FileNotFoundError:
+            # missing, or evicted by a concurrent put between the read and utime
+            return None
+        return payload
+
+    def _disk_put(self, key: str, payload: bytes) -> None:
+        if len(payload) > self.disk_bytes:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(p.stat().st_size for p in self.directory.glob(f"*{self.suffix}"))
+            path = self._path(key)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(payload)
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+            self._disk_size += len(payload) - previous
+            if self._disk_size > self.disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = sorted(self.directory.glob(f"*{self.suffix}"), key=lambda p: p.stat().st_mtime)
+        for path in entries:
+            if self._disk_size <= self.disk_bytes:
+                break
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                self._disk_size -= size
+            except FileNotFoundError:
+                continue
+
+    # public API
+
+    async def get_bytes(self, key: str):
+        """Return (payload, tier) where tier is "memory", "disk" or None on a miss."""
+        if self.memory_bytes:
+            payload = self._memory_get(key)
+            if payload is not None:
+                return payload, "memory"
+        if self.disk_bytes:
+            payload = await asyncio.to_thread(self._disk_get, key)
+            if payload is not None:
+                if self.memory_bytes:
+                    self._memory_put(key, payload)
+                return payload, "disk"
+        return None, None
+
+    async def put_bytes(self, key: str, payload: bytes) -> None:
+        if self.memory_bytes:
+            self._memory_put(key, payload)
+        if self.disk_bytes:
+            await asyncio.to_thread(self._disk_put, key, payload)
+
+    async def get(self, key: str):
+        """Return (analysis, tier) where tier is "memory", "disk" or None on a miss."""
+        payload, tier = await self.get_bytes(key)
+        metrics.inc("legalbot_analysis_cache_total", help=_CACHE_HELP, result=tier or "miss")
+        return (json.loads(payload) if payload is not None else None), tier
+
+    async def put(self, key: str, analysis: dict) -> None:
+        await self.put_bytes(key, json.dumps(analysis).encode())
+
+analysis_cache = AnalysisCache(
+    ANALYSIS_CACHE_DIR,
+    ANALYSIS_CACHE_MEMORY_MB * 1024 * 1024,
+    ANALYSIS_CACHE_DISK_MB * 1024 * 1024,
+)
@@ -0,0 +1,189 @@
+import asyncio
+import json
+from collections import Counter
+
+from sqlalchemy import Text, func, select, type_coerce
+
+from app.db.database import database, json_field
+from app.db.models import (
+    document_analyses, document_texts, analysis_clauses, analysis_entities, analysis_dates, document_segments
+)
+from app.services.analysis_cache import pipeline_tag
+from app.services.clause_index import clause_index
+
+# Structured per-document results kept for later comparisons. The raw text is stored
+# separately (document_texts); `units` is that text split into sentences, for the clause diff
+ARTIFACT_FIELDS = (
+    'clauses', 'clause_pages', 'risk', 'keywords', 'summary', 'entities', 'dates', 'durations', 'deadlines',
+    'tokens', 'units',
+)
+
+
+def to_artifact(analysis: dict) -> dict:
+    artifact = {field: analysis.get(field) for field in ARTIFACT_FIELDS}
+    artifact['entities'] = sorted(set(analysis.get('entities') or []))
+    return artifact
+
+
+def _date_rows(file_id: str, analysis: dict) -> list:
+    rows = [{"file_id": file_id, "kind": "date", "value": iso, "detail": None} for iso in analysis.get('dates') or []]
+    for kind in ("duration", "deadline"):
+        for item in analysis.get(kind + 's') or []:
+            rows.append({
+                "file_id": file_id, "kind": kind,
+                "value": f"{item['value']} {item['unit']}", "detail": json.dumps(item),
+            })
+    return rows
+
+
+async def save_analysis(file_id: str, process_id: str, analysis: dict):
+    """
+    Store (or replace) everything derived from a file in one transaction: the
+    JSON artifact used for comparisons, the extracted text, the clause,
+    entity and date rows that results pages are read from, the per-segment
+    results later versions reuse and the clause similarity signatures.
+
+    Returns a function that adds the clauses to the in-memory similarity
+    index; callers run it after their enclosing transaction commits, so a
+    rollback never leaves clauses indexed that were not stored.
+    """
+    artifact = to_artifact(analysis)
+    # chunked analyses of very large files keep the units instead of the text
+    text = analysis.get('text') or ' '.join(analysis.get('units') or [])
+    clause_pages = artifact.get('clause_pages') or {}
+    clause_rows = [
+        {"file_id": file_id, "position": i, "page": clause_pages.get(clause), "clause": clause}
+        for i, clause in enumerate(artifact.get('clauses') or [])
+    ]
+    entity_rows = [
+        {"file_id": file_id, "entity": entity, "occurrences": count}
+        for entity, count in Counter(analysis.get('entities') or []).items()
+    ]
+    date_rows = _date_rows(file_id, analysis)
+    clauses = analysis.get('clauses') or []
+    # only analyze_revision results carry segments
+    pipeline = pipeline_tag()
+    segment_rows = [
+        {
+            "file_id": file_id, "position": i, "segment_hash": segment['hash'], "page": segment['page'],
+            "chars": segment['chars'], "pipeline": pipeline, "analysis": json.dumps(segment['result']),
+        }
+        for i, segment in enumerate(analysis.get('_segments') or [])
+    ]
+
+    async with database.transaction():
+        for table in (
+            document_analyses, document_texts, analysis_clauses, analysis_entities, analysis_dates, document_segments
+        ):
+            await database.execute(table.delete().where(table.c.file_id == file_id))
+        await database.execute(document_analyses.insert().values(
+            file_id=file_id,
+            process_id=process_id,
+            analysis=json.dumps(artifact)
+        ))
+        await database.execute(document_texts.insert().values(
+            file_id=file_id, process_id=process_id, chars=len(text), text=text
+        ))
+        for table, rows in (
+            (analysis_clauses, clause_rows), (analysis_entities, entity_rows), (analysis_dates, date_rows),
+            (document_segments, segment_rows),
+        ):
+            await database.insert_many(table, rows)
+        signatures = await clause_index.store_document(file_id, clauses)
+    return lambda: clause_index.index_document(file_id, clauses, signatures)
+
+
+async def load_analysis(file_id: str, fields=None):
+    """
+    Return the stored artifact for a file, or None if it was never analyzed.
+    With `fields` only those artifact fields are extracted by the database
+    and returned; the rest of the artifact is not read or decoded.
+    """
+    if fields is None:
+        query = select(document_analyses.c.analysis).where(document_analyses.c.file_id == file_id)
+        row = await database.fetch_one(query)
+        return json.loads(row["analysis"]) if row else None
+    query = select(
+        document_analyses.c.file_id,
+        *(json_field(document_analyses.c.analysis, field).label(field) for field in fields),
+    ).where(document_analyses.c.file_id == file_id)
+    row = await database.fetch_one(query)
+    return {field: row[field] for field in fields if row[field] is not None} if row else None
+
+
+async def count_analyses(file_ids=None) -> int:
+    """How many of the given files (or files in total) have a stored artifact."""
+    query = select(func.count()).select_from(document_analyses)
+    if file_ids is not None:
+        query = query.where(document_analyses.c.file_id.in_(file_ids))
+    return await database.fetch_val(query)
+
+
+async def load_tokens(file_ids=None) -> dict:
+    """
+    {file_id: token list} from the stored artifacts of the given files, or of
+    every analyzed file. Only the token lists are read from the database.
+    """
+    # undecoded JSON text; decoding thousands of lists would stall the event loop
+    tokens = type_coerce(json_field(document_analyses.c.analysis, 'tokens'), Text).label("tokens")
+    query = select(document_analyses.c.file_id, tokens).order_by(document_analyses.c.file_id)
+    if file_ids is not None:
+        query = query.where(document_analyses.c.file_id.in_(file_ids))
+    rows = await database.fetch_all(query)
+    return await asyncio.to_thread(
+        lambda: {row["file_id"]: json.loads(row["tokens"] or 'null') or [] for row in rows}
+    )
+
+
+async def load_segment_results(file_ids) -> dict:
+    """
+    {segment hash: stored segment result as JSON} of the given files, limited
+    to results made by the current pipeline. Left undecoded for the worker.
+    """
+    query = (
+        select(document_segments.c.segment_hash, document_segments.c.analysis)
+        .where(document_segments.c.file_id.in_(file_ids))
+        .where(document_segments.c.pipeline == pipeline_tag())
+    )
+    return {row["segment_hash"]: row["analysis"] for row in await database.fetch_all(query)}
+
+
+async def load_text_snippet(file_id: str, length: int = 1000):
+    """The first `length` characters of a file's stored text, cut in the database."""
+    query = select(func.substr(document_texts.c.text, 1, length).label("snippet")).where(
+        document_texts.c.file_id == file_id
+    )
+    row = await database.fetch_one(query)
+    return row["snippet"] if row else None
+
+
+# section -> (table, columns returned, ordering)
+SECTIONS = {
+    "clauses": (analysis_clauses, ("position", "page", "clause"), ("position",)),
+    "entities": (analysis_entities, ("entity", "occurrences"), ("occurrences desc", "entity")),
+    "dates": (analysis_dates, ("kind", "value", "detail"), ("kind", "value")),
+}
+
+
+async def load_section(file_id: str, section: str, offset: int = 0, limit: int = 50) -> dict:
+    """One page of a file's clauses, entities or dates, plus the total row count."""
+    table, columns, ordering = SECTIONS[section]
+    order_by = [
+        table.c[name.split()[0]].desc() if name.endswith(" desc") else table.c[name] for name in ordering
+    ]
+    query = (
+        select(*(table.c[name] for name in columns))
+        .where(table.c.file_id == file_id)
+        .order_by(*order_by)
+        .offset(offset)
+        .limit(limit)
+    )
+    rows = await database.fetch_all(query)
+    total = await database.fetch_val(
+        select(func.count()).select_from(table).where(table.c.file_id == file_id)
+    )
+    items = [{name: row[name] for name in columns} for row in rows]
+    for item in items:
+        if item.get("detail"):
+            item["detail"] = json.loads(item["detail"])
+    return {"items": items, "total": total, "offset": offset, "limit": limit}
@@ -0,0 +1,91 @@
+import asyncio
+from typing import List
+
+from app.core.config import COMPARE_BATCH_SIZE
+from app.core import metrics
+from app.services.analysis_cache import analysis_cache
+from app.services.executor import run_nlp
+from app.services.nlp_processing import analyze_files, compare_documents
+
+# Report fields sent per candidate; aligned_clauses is left out to keep lines small
+RESULT_FIELDS = (
+    'similarity_percent', 'adjusted_similarity_percent', 'can_do_agreement',
+    'missing_clauses_in_b', 'missing_clauses_in_a', 'risk_b', 'diagnostics',
+)
+
+
+def _result(filename: str, report: dict) -> dict:
+    result = {'type': 'result', 'filename': filename}
+    result.update({field: report[field] for field in RESULT_FIELDS})
+    return result
+
+
+def analyze_and_compare(reference: dict, file_paths: List[str], mode: str, batch_size: int) -> List[tuple]:
+    """Worker-side: analyze a batch of candidates with nlp.pipe and compare each to the reference."""
+    analyses = analyze_files(file_paths, batch_size=batch_size)
+    return [(analysis, compare_documents(reference, analysis, mode)) for analysis in analyses]
+
+
+def compare_analyzed(reference: dict, analyses: List[dict], mode: str) -> List[dict]:
+    return [compare_documents(reference, analysis, mode) for analysis in analyses]
+
+
+async def stream_batch_comparison(reference: dict, candidates: List[dict], mode: str):
+    """
+    Compare one analyzed reference against many stored candidates, each
+    {"filename", "path", "cache_key"}. Candidates already in the analysis
+    cache skip NLP; the rest go to the worker pool in batches of
+    COMPARE_BATCH_SIZE, so batches run on all cores at once. Yields one result
+    per candidate as its batch finishes, then a summary ranked by
+    adjusted_similarity_percent.
+    """
+    cached, pending = [], []
+    for candidate in candidates:
+        analysis, _ = await analysis_cache.get(candidate['cache_key'])
+        if analysis is None:
+            pending.append(candidate)
+        else:
+            cached.append((candidate, analysis))
+
+    async def run_cached(batch):
+        try:
+            reports = await run_nlp(compare_analyzed, reference, [a for _, a in batch], mode)
+        except Exception as e:
+            return [(c, None, {'error': str(e)}) for c, _ in batch]
+        return [(c, None, r) for (c, _), r in zip(batch, reports)]
+
+    async def run_pending(batch):
+        try:
+            outputs = await run_nlp(
+                analyze_and_compare, reference, [c['path'] for c in batch], mode, COMPARE_BATCH_SIZE
+            )
+        except Exception as e:
+            return [(c, None, {'error': str(e)}) for c in batch]
+        return [(c, analysis, report) for c, (analysis, report) in zip(batch, outputs)]
+
+    tasks = [
+        run_cached(cached[i:i + COMPARE_BATCH_SIZE]) for i in range(0, len(cached), COMPARE_BATCH_SIZE)
+    ] + [
+        run_pending(pending[i:i + COMPARE_BATCH_SIZE]) for i in range(0, len(pending), COMPARE_BATCH_SIZE)
+    ]
+
+    ranking = []
+    for next_batch in asyncio.as_completed(tasks):
+        for candidate, analysis, report in await next_batch:
+            if 'error' in report:
+                yield {'type': 'error', 'filename': candidate['filename'], 'detail': report['error']}
+                continue
+            metrics.record_comparison(report)
+            if analysis is not None:
+                metrics.record_analysis(analysis)
+                await analysis_cache.put(candidate['cache_key'], analysis)
+            result = _result(candidate['filename'], report)
+            ranking.append({
+                'filename': candidate['filename'],
+                'adjusted_similarity_percent': report['adjusted_similarity_percent'],
+                'similarity_percent': report['similarity_percent'],
+            })
+            yield result
+
+    ranking.sort(key=lambda r: r['adjusted_similarity_percent'], reverse=True)
+    yield {'type': 'summary', 'count': len(ranking), 'ranking': ranking}
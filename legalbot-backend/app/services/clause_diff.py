@@ -0,0 +1,125 @@
+import re
+import zlib
+from typing import List
+
+# Units whose shingle sets overlap at least this much are reported as "modified"
+MODIFIED_THRESHOLD = 0.5
+SHINGLE_SIZE = 3
+NUM_PERM = 32
+BANDS = 8  # NUM_PERM / BANDS rows per band
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (1 + 2 * i * 0x9E3779B1 % _MERSENNE_PRIME, (i * 0x85EBCA77 + 0xC2B2AE3D) % _MERSENNE_PRIME)
+    for i in range(NUM_PERM)
+]
+_UNIT_SPLIT = re.compile(r'(?<=[.!?;])\s+|\n\s*\n')
+_WORD = re.compile(r'\w+')
+
+
+def split_units(text: str) -> List[str]:
+    """Split text into sentence/clause units with a single linear regex pass."""
+    units = []
+    for part in _UNIT_SPLIT.split(text or ''):
+        unit = re.sub(r'\s+', ' ', part).strip()
+        if _WORD.search(unit):
+            units.append(unit)
+    return units
+
+
+def shingles(unit: str, size: int = SHINGLE_SIZE) -> set:
+    """Hashed word n-grams of a unit. crc32 keeps hashes stable across processes."""
+    words = _WORD.findall(unit.lower())
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode())}
+    return {zlib.crc32(' '.join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+
+def minhash(shingle_set: set) -> tuple:
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) for h in shingle_set)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def _bands(signature: tuple):
+    rows = NUM_PERM // BANDS
+    for band in range(BANDS):
+        yield band, signature[band * rows:(band + 1) * rows]
+
+
+def _jaccard(set_a: set, set_b: set) -> float:
+    union = len(set_a | set_b)
+    return len(set_a & set_b) / union if union else 1.0
+
+
+def diff_units(units_a: List[str], units_b: List[str]) -> dict:
+    """
+    Align two lists of units. Identical units are anchored through a hash map;
+    the rest are paired through MinHash LSH buckets and verified with the exact
+    shingle Jaccard, so the work grows with the number of units rather than
+    with the product of the two text lengths.
+    """
+    exact_b = {}
+    for j, unit in enumerate(units_b):
+        exact_b.setdefault(unit.lower(), []).append(j)
+
+    pairs = []
+    used_b = set()
+    pending_a = []
+    for i, unit in enumerate(units_a):
+        candidates = exact_b.get(unit.lower())
+        if candidates:
+            j = candidates.pop(0)
+            used_b.add(j)
+            pairs.append({'status': 'matched', 'a': unit, 'b': units_b[j], 'similarity': 1.0})
+        else:
+            pending_a.append(i)
+
+    pending_b = [j for j in range(len(units_b)) if j not in used_b]
+    shingles_b = {j: shingles(units_b[j]) for j in pending_b}
+    buckets = {}
+    for j in pending_b:
+        for band in _bands(minhash(shingles_b[j])):
+            buckets.setdefault(band, []).append(j)
+
+    for i in pending_a:
+        unit = units_a[i]
+        unit_shingles = shingles(unit)
+        best_j, best_score = None, 0.0
+        seen = set()
+        for band in _bands(minhash(unit_shingles)):
+            for j in buckets.get(band, ()):
+                if j in used_b or j in seen:
+                    continue
+                seen.add(j)
+                score = _jaccard(unit_shingles, shingles_b[j])
+                if score > best_score:
+                    best_j, best_score = j, score
+        if best_j is not None and best_score >= MODIFIED_THRESHOLD:
+            used_b.add(best_j)
+            pairs.append({'status': 'modified', 'a': unit, 'b': units_b[best_j], 'similarity': best_score})
+        else:
+            pairs.append({'status': 'missing_in_b', 'a': unit, 'b': None, 'similarity': 0.0})
+
+    for j in pending_b:
+        if j not in used_b:
+            pairs.append({'status': 'missing_in_a', 'a': None, 'b': units_b[j], 'similarity': 0.0})
+
+    # Character-weighted share of both documents that found a counterpart
+    total = sum(len(u) for u in units_a) + sum(len(u) for u in units_b)
+    covered = sum(
+        p['similarity'] * (len(p['a']) + len(p['b']))
+        for p in pairs if p['a'] is not None and p['b'] is not None
+    )
+    similarity = covered / total if total else 1.0
+
+    counts = {'matched': 0, 'modified': 0, 'missing_in_b': 0, 'missing_in_a': 0}
+    for p in pairs:
+        counts[p['status']] += 1
+
+    return {'pairs': pairs, 'similarity': similarity, 'counts': counts}
+
+
+def diff_texts(text_a: str, text_b: str) -> dict:
+    return diff_units(split_units(text_a), split_units(text_b))
@@ -0,0 +1,173 @@
+import asyncio
+import threading
+from typing import List
+
+import numpy as np
+from sqlalchemy import select
+
+from app.db.database import database
+from app.db.models import clause_signatures, files
+from app.services.clause_diff import shingles
+
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240501)  # fixed so stored signatures stay comparable
+_A = _rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.int64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.int64)
+
+
+def clause_signature(clause: str) -> np.ndarray:
+    """MinHash signature over the same hashed word shingles used by clause_diff."""
+    hashes = np.fromiter(shingles(clause), dtype=np.int64) % _PRIME
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1).astype(np.int32)
+
+
+def _band_keys(signature: np.ndarray):
+    rows = NUM_PERM // BANDS
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(BANDS)]
+
+
+class ClauseIndex:
+    """
+    MinHash LSH index over every stored clause. Signatures persist in the
+    clause_signatures table; the in-memory matrix and band buckets are built
+    from it in a worker thread on first query (or at startup) and then kept
+    up to date as documents are added. Re-indexing a file tombstones its old
+    rows and prunes them from their buckets; the space is reclaimed on the
+    next load.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loading = asyncio.Lock()
+        self._loaded = False
+        self._updates = None  # index_document calls made while the table is being read
+        self._signatures = np.zeros((0, NUM_PERM), dtype=np.int32)
+        self._pending = []
+        self._meta = []  # (file_id, clause) per row, None once the row is removed
+        self._file_rows = {}  # file_id -> its rows
+        self._buckets = {}
+
+    def _append(self, file_id: str, clause: str, signature: np.ndarray) -> None:
+        row = len(self._meta)
+        self._meta.append((file_id, clause))
+        self._file_rows.setdefault(file_id, []).append(row)
+        self._pending.append(signature)
+        for key in _band_keys(signature):
+            self._buckets.setdefault(key, set()).add(row)
+
+    def _matrix(self) -> np.ndarray:
+        if self._pending:
+            self._signatures = np.vstack([self._signatures, np.stack(self._pending)])
+            self._pending = []
+        return self._signatures
+
+    def _signature(self, row: int) -> np.ndarray:
+        stacked = len(self._signatures)
+        return self._signatures[row] if row < stacked else self._pending[row - stacked]
+
+    def _remove(self, file_id: str) -> None:
+        """Tombstone a file's rows and take them out of their band buckets."""
+        for row in self._file_rows.pop(file_id, ()):
+            for key in _band_keys(self._signature(row)):
+                bucket = self._buckets[key]
+                bucket.discard(row)
+                if not bucket:
+                    del self._buckets[key]
+            self._meta[row] = None
+
+    def _index(self, file_id: str, clauses: List[str], signatures: list) -> None:
+        self._remove(file_id)
+        for clause, signature in zip(clauses, signatures):
+            self._append(file_id, clause, signature)
+
+    @staticmethod
+    def _build(rows) -> "ClauseIndex":
+        built = ClauseIndex()
+        for row in rows:
+            built._append(row["file_id"], row["clause"], np.frombuffer(row["signature"], dtype=np.int32))
+        built._matrix()
+        return built
+
+    async def load(self) -> None:
+        """Build the in-memory index from the clause_signatures table, once."""
+        if self._loaded:
+            return
+        async with self._loading:
+            if self._loaded:
+                return
+            with self._lock:
+                self._updates = []
+            try:
+                rows = await database.fetch_all(select(
+                    clause_signatures.c.file_id, clause_signatures.c.clause, clause_signatures.c.signature
+                ).order_by(clause_signatures.c.id))
+                built = await asyncio.to_thread(self._build, rows)
+                with self._lock:
+                    self._signatures, self._pending = built._signatures, built._pending
+                    self._meta, self._file_rows, self._buckets = built._meta, built._file_rows, built._buckets
+                    self._loaded = True
+                    # documents stored while the table was read may be missing from the rows
+                    for update in self._updates:
+                        self._index(*update)
+            finally:
+                with self._lock:
+                    self._updates = None
+
+    async def store_document(self, file_id: str, clauses: List[str]) -> list:
+        """
+        Replace the stored signatures of a document's clauses. Returns the
+        signatures for index_document, to be called once the surrounding
+        transaction has committed.
+        """
+        signatures = await asyncio.to_thread(lambda: [clause_signature(c) for c in clauses])
+        async with database.transaction():
+            await database.execute(clause_signatures.delete().where(clause_signatures.c.file_id == file_id))
+            await database.insert_many(clause_signatures, [
+                {"file_id": file_id, "clause": c, "signature": s.tobytes()}
+                for c, s in zip(clauses, signatures)
+            ])
+        return signatures
+
+    def index_document(self, file_id: str, clauses: List[str], signatures: list) -> None:
+        """Put a stored document's clauses in the in-memory index, replacing its old ones."""
+        with self._lock:
+            if self._loaded:
+                self._index(file_id, clauses, signatures)
+            elif self._updates is not None:
+                self._updates.append((file_id, clauses, signatures))
+
+    async def add_document(self, file_id: str, clauses: List[str]) -> None:
+        """Index a document's clauses, replacing anything stored for the same file."""
+        self.index_document(file_id, clauses, await self.store_document(file_id, clauses))
+
+    async def search(self, text: str, k: int = 10) -> List[dict]:
+        """Top-k stored clauses by estimated Jaccard similarity to `text`."""
+        await self.load()
+        query = clause_signature(text)
+        with self._lock:
+            candidates = set()
+            for key in _band_keys(query):
+                candidates.update(self._buckets.get(key, ()))
+            if not candidates:
+                return []
+            rows = np.fromiter(candidates, dtype=np.int64)
+            scores = (self._matrix()[rows] == query).mean(axis=1)
+            top = np.argsort(-scores, kind="stable")[:k]
+            hits = [(self._meta[rows[i]], float(scores[i])) for i in top]
+
+        names = {}
+        file_ids = list({file_id for (file_id, _), _ in hits})
+        if file_ids:
+            for row in await database.fetch_all(
+                select(files.c.id, files.c.original_name).where(files.c.id.in_(file_ids))
+            ):
+                names[row["id"]] = row["original_name"]
+        return [
+            {"clause": clause, "file_id": file_id, "original_name": names.get(file_id), "score": score}
+            for (file_id, clause), score in hits
+        ]
+
+
+clause_index = ClauseIndex()
@@ -0,0 +1,168 @@
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from app.core.config import DATE_CACHE_SIZE
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+    "nineteen": 19, "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60,
+    "seventy": 70, "eighty": 80, "ninety": 90, "hundred": 100, "a": 1, "an": 1,
+}
+
+_MONTH = "(" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+_ORDINAL = r"(\d{1,2})(?:st|nd|rd|th)?"
+# (pattern, fields, whether an impossible month means the day came first)
+_DATE_PATTERNS = [
+    # 2024-01-05
+    (re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})"), ("y", "m", "d"), False),
+    # January 5, 2024 / Jan. 5th 2024
+    (re.compile(_MONTH + r"\s+" + _ORDINAL + r",?\s+(\d{4})"), ("month", "d", "y"), False),
+    # 5 January 2024 / 5th day of January, 2024
+    (re.compile(_ORDINAL + r"\s+(?:day\s+of\s+)?" + _MONTH + r",?\s+(\d{4})"), ("d", "month", "y"), False),
+    # 01/05/2024, month first like dateutil's default
+    (re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})"), ("m", "d", "y"), True),
+    # 01.05.2024 / 01-05-2024, month first and never swapped
+    (re.compile(r"(\d{1,2})[.-](\d{1,2})[.-](\d{4})"), ("m", "d", "y"), False),
+]
+_NUMBER_WORD = "|".join(sorted(NUMBER_WORDS, key=len, reverse=True))
+# "thirty (30) days", "30 business days", "six months", "forty-five (45) calendar days"
+_DURATION = re.compile(
+    r"(?:(?P<words>(?:(?:" + _NUMBER_WORD + r")[\s-]*)+))?"
+    r"(?:\(?\s*(?P<digits>\d+)\s*\)?)?\s*"
+    r"(?P<kind>business|working|calendar)?\s*"
+    r"(?P<unit>day|week|month|year)s?\b",
+    re.IGNORECASE,
+)
+_DEADLINE_CUE = re.compile(
+    r"(?P<cue>no later than|not later than|within|at least|before|after|prior to|following|"
+    r"upon|up to|not less than|not more than)\s*$",
+    re.IGNORECASE,
+)
+_ANCHOR = re.compile(
+    r"^\s*(?P<relation>after|from|of|following|prior to|before)\s+(?P<anchor>(?:the\s+)?[\w\s'-]{1,60}?)"
+    r"(?=[.,;:()]|\s+(?:and|or|unless|provided)\b|$)",
+    re.IGNORECASE,
+)
+_STRIP = re.compile(r"^(?:on|the|dated|as of)\s+", re.IGNORECASE)
+
+
+def _words_to_int(words: str) -> Optional[int]:
+    total = 0
+    for word in re.split(r"[\s-]+", words.strip().lower()):
+        if not word:
+            continue
+        value = NUMBER_WORDS.get(word)
+        if value is None:
+            return None
+        total = max(total, 1) * 100 if value == 100 else total + value
+    return total
+
+
+def _fast_date(text: str):
+    """(matched, ISO date or None): a matched pattern that is not a valid date is rejected outright."""
+    for pattern, fields, day_first_fallback in _DATE_PATTERNS:
+        match = pattern.fullmatch(text)
+        if not match:
+            continue
+        parts = dict(zip(fields, match.groups()))
+        month = MONTHS[parts["month"].lower()] if "month" in parts else int(parts["m"])
+        day = int(parts["d"])
+        if day_first_fallback and month > 12 >= day:
+            month, day = day, month  # 25/12/2024 can only be day first
+        try:
+            return True, date(int(parts["y"]), month, day).isoformat()
+        except ValueError:
+            return True, None
+    return False, None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_duration(text: str) -> Optional[dict]:
+    """{"value", "unit", "business_days"} for phrases like "thirty (30) days"; None otherwise."""
+    match = _DURATION.fullmatch(text.strip())
+    if not match or not (match.group("words") or match.group("digits")):
+        return None
+    value = int(match.group("digits")) if match.group("digits") else _words_to_int(match.group("words"))
+    if value is None:
+        return None
+    kind = (match.group("kind") or "").lower()
+    return {"value": value, "unit": match.group("unit").lower(), "business_days": kind in ("business", "working")}
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(text: str) -> Optional[str]:
+    """
+    ISO date for an absolute date expression. Common legal formats are matched
+    by compiled patterns; anything else with a digit in it falls back to fuzzy
+    dateutil parsing. Durations and digit-free phrases ("monthly") are not dates.
+    """
+    cleaned = _STRIP.sub("", text.strip()).strip(" ,.")
+    matched, fast = _fast_date(cleaned)
+    if matched:
+        # dateutil would read an out-of-range month as the day instead
+        return fast
+    if not any(ch.isdigit() for ch in cleaned) or parse_duration(cleaned) is not None:
+        return None
+    import dateutil.parser
+    try:
+        return dateutil.parser.parse(cleaned, fuzzy=True).strftime('%Y-%m-%d')
+    except (ValueError, OverflowError):
+        return None
+
+
+def normalize_dates(entities: Iterable[str]) -> List[str]:
+    """Distinct ISO dates among DATE entity texts."""
+    return list({iso for iso in map(parse_date, entities) if iso is not None})
+
+
+def parse_deadline(text: str, before: str = "", after: str = "") -> Optional[dict]:
+    """
+    A duration together with the words around it, e.g. "within" + "thirty (30)
+    days" + "after termination". Returns None unless the text is a duration.
+    """
+    duration = parse_duration(text)
+    if duration is None:
+        return None
+    deadline = dict(duration, text=text.strip(), cue=None, relation=None, anchor=None)
+    cue = _DEADLINE_CUE.search(before[-40:])
+    if cue:
+        deadline["cue"] = cue.group("cue").lower()
+    anchor = _ANCHOR.match(after[:80])
+    if anchor:
+        deadline["relation"] = anchor.group("relation").lower()
+        deadline["anchor"] = anchor.group("anchor").strip()
+    if deadline["cue"]:
+        deadline["text"] = " ".join(filter(None, [deadline["cue"], text.strip(), anchor.group(0).strip() if anchor else ""]))
+    return deadline
+
+
+def temporal_expressions(date_entities: Iterable[tuple]) -> dict:
+    """
+    Split (text, before, after) DATE entities into absolute dates, durations
+    and deadlines (durations introduced by a cue such as "within" or "no
+    later than"). Each structured entry appears once.
+    """
+    dates, durations, deadlines = set(), {}, {}
+    for text, before, after in date_entities:
+        iso = parse_date(text)
+        if iso is not None:
+            dates.add(iso)
+            continue
+        deadline = parse_deadline(text, before, after)
+        if deadline is None:
+            continue
+        duration = {k: deadline[k] for k in ("value", "unit", "business_days")}
+        durations.setdefault(text.strip().lower(), dict(duration, text=text.strip()))
+        if deadline["cue"]:
+            deadlines.setdefault(deadline["text"].lower(), deadline)
+    return {"dates": list(dates), "durations": list(durations.values()), "deadlines": list(deadlines.values())}
@@ -0,0 +1,176 @@
+import posixpath
+import re
+import zipfile
+from typing import Iterator, List, NamedTuple, Tuple
+
+from lxml import etree
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_RELATIONSHIP = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_P, _R_RUN, _T, _TBL, _TR, _TC = W + "p", W + "r", W + "t", W + "tbl", W + "tr", W + "tc"
+_TAB, _PTAB, _BR, _CR, _NO_BREAK_HYPHEN = W + "tab", W + "ptab", W + "br", W + "cr", W + "noBreakHyphen"
+_BR_TYPE = W + "type"
+# Only block-level elements raise parser events; run text is read per finished paragraph
+_BLOCK_TAGS = (_P, _TBL, _TR, _TC, _FALLBACK)
+_TEXT_TAGS = (_T, _TAB, _PTAB, _BR, _CR, _NO_BREAK_HYPHEN)
+
+DOCUMENT_PART = "word/document.xml"
+PAGE_BREAK = "\f"
+CELL_SEPARATOR = " | "
+
+
+class DocxBlock(NamedTuple):
+    """
+    One unit of a DOCX part, in document order: a paragraph, or a table row
+    with its cells. part is "header", "body" or "footer"; table and row
+    number the tables of that part and the rows of each table (from 0).
+    Hard page breaks appear in text as PAGE_BREAK.
+    """
+    part: str
+    kind: str
+    text: str
+    cells: Tuple[str, ...] = ()
+    table: int = None
+    row: int = None
+
+
+def _header_footer_parts(archive: zipfile.ZipFile) -> Tuple[List[str], List[str]]:
+    """Header and footer part names in the order the main document references them."""
+    headers, footers = [], []
+    try:
+        rels = etree.fromstring(archive.read("word/_rels/document.xml.rels"))
+    except KeyError:
+        rels = None
+    if rels is not None:
+        for rel in rels.iter(_RELATIONSHIP):
+            kind = rel.get("Type", "").rsplit("/", 1)[-1]
+            if kind in ("header", "footer") and rel.get("TargetMode") != "External":
+                target = rel.get("Target", "")
+                name = target.lstrip("/") if target.startswith("/") else posixpath.normpath("word/" + target)
+                (headers if kind == "header" else footers).append(name)
+    else:
+        names = archive.namelist()
+        number = lambda name: int(re.sub(r"\D", "", name) or 0)
+        headers = sorted((n for n in names if re.fullmatch(r"word/header\d*\.xml", n)), key=number)
+        footers = sorted((n for n in names if re.fullmatch(r"word/footer\d*\.xml", n)), key=number)
+    present = set(archive.namelist())
+    return [n for n in headers if n in present], [n for n in footers if n in present]
+
+
+def _release(elem) -> None:
+    # Drop finished elements so the tree never holds more than the open block
+    elem.clear(keep_tail=True)
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def _paragraph_text(paragraph) -> str:
+    parts = []
+    for node in paragraph.iter(_TEXT_TAGS):
+        tag = node.tag
+        if tag == _T:
+            parts.append(node.text or "")
+        elif node.getparent().tag != _R_RUN:
+            continue  # w:tab also defines tab stops in paragraph properties
+        elif tag == _BR or tag == _CR:
+            parts.append(PAGE_BREAK if node.get(_BR_TYPE) == "page" else "\n")
+        elif tag == _NO_BREAK_HYPHEN:
+            parts.append("-")
+        else:
+            parts.append("\t")
+    return "".join(parts)
+
+
+def _iter_part(stream, part: str) -> Iterator[DocxBlock]:
+    depth = 0        # open w:p; text box paragraphs nest inside the paragraph that anchors them
+    cells = []       # paragraph texts of each open w:tc
+    rows = []        # cell texts of each open w:tr
+    tables = []      # [table number, next row number] of each open w:tbl
+    table_count = 0
+
+    for event, elem in etree.iterparse(stream, events=("start", "end"), tag=_BLOCK_TAGS, huge_tree=True):
+        tag = elem.tag
+        if event == "start":
+            if tag == _P:
+                depth += 1
+            elif tag == _TC:
+                cells.append([])
+            elif tag == _TR:
+                rows.append([])
+            elif tag == _TBL:
+                tables.append([table_count, 0])
+                table_count += 1
+            continue
+
+        if tag == _P:
+            depth -= 1
+            if depth:
+                continue  # read as part of the enclosing paragraph
+            text = _paragraph_text(elem)
+            if cells:
+                cells[-1].append(text)
+            else:
+                yield DocxBlock(part, "paragraph", text)
+            _release(elem)
+        elif tag == _FALLBACK:
+            # mc:Fallback repeats the content of the mc:Choice before it
+            elem.clear()
+        elif tag == _TC:
+            cell = " ".join(t.strip() for t in cells.pop() if t.strip())
+            if rows:
+                rows[-1].append(cell)
+            _release(elem)
+        elif tag == _TR:
+            row_cells = tuple(rows.pop())
+            if tables and any(row_cells):
+                table = tables[-1]
+                text = CELL_SEPARATOR.join(c for c in row_cells if c)
+                yield DocxBlock(part, "row", text, row_cells, table[0], table[1])
+                table[1] += 1
+            _release(elem)
+        elif tag == _TBL:
+            tables.pop()
+            _release(elem)
+
+
+def iter_docx_blocks(file_path: str) -> Iterator[DocxBlock]:
+    """
+    Stream the paragraphs and table rows of a DOCX file without building its
+    object model: header parts first, then the body, then footer parts.
+    Header and footer paragraphs repeated across parts (first page, even
+    pages...) are yielded once.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        headers, footers = _header_footer_parts(archive)
+        for part, names in (("header", headers), ("body", [DOCUMENT_PART]), ("footer", footers)):
+            seen = set()
+            for name in names:
+                with archive.open(name) as stream:
+                    for block in _iter_part(stream, part):
+                        if part != "body":
+                            if not block.text.strip() or block.text in seen:
+                                continue
+                            seen.add(block.text)
+                        yield block
+
+
+def docx_pages(file_path: str) -> List[str]:
+    """
+    Text per page, split at hard page breaks: one line per paragraph or table
+    row, headers at the start of the first page and footers at the end of
+    the last. Joined, the pages give docx_text.
+    """
+    pages = [[]]
+    for index, block in enumerate(iter_docx_blocks(file_path)):
+        segments = block.text.split(PAGE_BREAK)
+        pages[-1].append(segments[0] if index == 0 else "\n" + segments[0])
+        for segment in segments[1:]:
+            pages.append([segment])
+    return ["".join(page) for page in pages]
+
+
+def docx_text(file_path: str) -> str:
+    return "".join(docx_pages(file_path))
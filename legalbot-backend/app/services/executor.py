@@ -0,0 +1,62 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import NLP_WORKERS, NLP_START_METHOD
+
+_executor = None
+_warm = False
+_warm_error = None
+
+
+def _init_worker():
+    # Load the spaCy model once per worker process, before it takes any work
+    from app.services.model_registry import warm_worker
+    warm_worker()
+
+
+def get_executor():
+    """Return the shared process pool, creating it on first use (None when disabled)."""
+    global _executor
+    if _executor is None and NLP_WORKERS > 0:
+        _executor = ProcessPoolExecutor(
+            max_workers=NLP_WORKERS,
+            mp_context=multiprocessing.get_context(NLP_START_METHOD),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+async def run_nlp(func, *args):
+    """
+    Run a CPU-bound nlp_processing function off the event loop. `func` and its
+    arguments must be picklable (module-level functions, plain data).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def warm_up():
+    """
+    Start every pool worker (each loads spaCy in its initializer), or load the
+    model in-process when the pool is disabled. Meant to run in the background
+    at startup so the app can accept requests immediately.
+    """
+    global _warm, _warm_error
+    from app.services.model_registry import warm_worker
+    try:
+        await asyncio.gather(*(run_nlp(warm_worker) for _ in range(max(NLP_WORKERS, 1))))
+        _warm, _warm_error = True, None
+    except Exception as e:
+        _warm_error = str(e)
+
+
+def warm_status() -> dict:
+    return {"warm": _warm, "error": _warm_error}
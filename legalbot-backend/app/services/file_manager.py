@@ -1,7 +1,48 @@
-import shutil
+import asyncio
+import hashlib
+import os
 from fastapi import UploadFile
 
-async def save_upload_file(upload_file: UploadFile, destination: str) -> None:
-    with open(destination, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
-    upload_file.file.close()
+from app.core.config import MAX_UPLOAD_MB
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_MB."""
+
+
+async def save_upload_file(upload_file: UploadFile, destination: str, max_bytes: int = MAX_UPLOAD_BYTES) -> dict:
+    """
+    Stream an upload to `destination` one chunk at a time, hashing as it is
+    written, so memory use stays at one chunk whatever the file size. Returns
+    the stored path, size in bytes and SHA-256 hex digest. A partially written
+    file is removed if the upload is too large or the copy fails.
+    """
+    if upload_file.size is not None and upload_file.size > max_bytes:
+        raise UploadTooLargeError(f"File exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(destination, "wb") as buffer:
+            while True:
+                chunk = await upload_file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(chunk)
+                await asyncio.to_thread(buffer.write, chunk)
+    except BaseException:
+        try:
+            os.unlink(destination)
+        except OSError:
+            pass
+        raise
+    finally:
+        await upload_file.close()
+
+    return {"path": str(destination), "size": size, "sha256": digest.hexdigest()}
@@ -0,0 +1,100 @@
+import asyncio
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+from app.core.config import JOB_EVENTS_RETAIN, JOB_EVENTS_SUBSCRIBER_QUEUE
+from app.core import metrics
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def is_terminal(state: dict) -> bool:
+    return state.get("status") in TERMINAL_STATUSES
+
+
+class JobSubscription:
+    """Events for one job, starting with its current state when one is known."""
+
+    def __init__(self, process_id: str, queue: asyncio.Queue):
+        self.process_id = process_id
+        self._queue = queue
+
+    @property
+    def has_state(self) -> bool:
+        return not self._queue.empty()
+
+    async def next(self, timeout: float = None) -> Optional[dict]:
+        """The next event, or None if nothing arrived within timeout seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalJobEvents:
+    """
+    In-process pub/sub for analysis job progress. Every publish is merged into
+    the job's latest state, so a subscriber that connects mid-job (or shortly
+    after it finished) starts from where the job is, then receives each later
+    update. This stands in for an external broker: a multi-process deployment
+    would provide the same publish/state/subscribe interface over one.
+    """
+
+    def __init__(self, retain: int = JOB_EVENTS_RETAIN, queue_size: int = JOB_EVENTS_SUBSCRIBER_QUEUE):
+        self.retain = retain
+        self.queue_size = queue_size
+        self._states = OrderedDict()
+        self._subscribers = defaultdict(set)
+
+    def state(self, process_id: str) -> Optional[dict]:
+        state = self._states.get(process_id)
+        return dict(state) if state is not None else None
+
+    def publish(self, process_id: str, **update) -> dict:
+        """Merge update into the job's state and send it to every subscriber of the job."""
+        state = self._states.pop(process_id, None) or {"process_id": process_id, "status": None, "stage": None}
+        for key, value in update.items():
+            if isinstance(value, dict) and isinstance(state.get(key), dict):
+                value = {**state[key], **value}
+            state[key] = value
+        self._states[process_id] = state
+        while len(self._states) > self.retain:
+            self._states.popitem(last=False)
+
+        event = {"process_id": process_id, "status": state["status"], "stage": state["stage"], **update}
+        for queue in self._subscribers.get(process_id, ()):
+            self._offer(queue, event)
+        return event
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: dict) -> None:
+        # A slow subscriber loses its oldest updates rather than holding up the job;
+        # the newest (and so the terminal) event is always delivered
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    @contextmanager
+    def subscribe(self, process_id: str):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        state = self._states.get(process_id)
+        if state is not None:
+            queue.put_nowait(dict(state))
+        self._subscribers[process_id].add(queue)
+        try:
+            yield JobSubscription(process_id, queue)
+        finally:
+            subscribers = self._subscribers.get(process_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[process_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+job_events = LocalJobEvents()
+metrics.gauge("legalbot_job_event_subscribers", job_events.subscriber_count,
+              help="Open job progress streams")
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import time
+
+from app.core.config import JOB_CONCURRENCY, JOB_QUEUE_SIZE
+from app.core import metrics
+from app.core.responses import dumps
+from app.db.database import database
+from app.db.models import process_jobs, ProcessingStatus
+from app.services.executor import run_nlp
+from app.services.analysis_store import save_analysis
+from app.services.job_events import job_events
+from app.services.nlp_processing import extract_pages_parallel, analyze_revision, analyze_risk, compare_documents
+from app.services.versioning import reusable_segments
+
+_queue = None
+_workers = []
+# clauses sent with the progress event once parsing finishes
+PARTIAL_CLAUSES = 5
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity and cannot accept more work."""
+
+
+def is_full() -> bool:
+    return _queue is not None and _queue.full()
+
+
+def depth() -> int:
+    """Jobs waiting in the queue (not counting the ones being worked on)."""
+    return _queue.qsize() if _queue is not None else 0
+
+
+metrics.gauge("legalbot_job_queue_depth", depth, help="Analysis jobs waiting in the queue")
+
+
+def enqueue(process_id: str, owner_file: dict, tenant_file: dict) -> None:
+    """
+    Queue an owner/tenant analysis; each file is {"id": file_id, "path": path}.
+    Raises QueueFullError instead of blocking.
+    """
+    if _queue is None:
+        raise RuntimeError("Job workers are not running")
+    try:
+        _queue.put_nowait((process_id, owner_file, tenant_file))
+    except asyncio.QueueFull:
+        raise QueueFullError("Analysis queue is full, try again later")
+
+
+async def _write_job(process_id: str, **values) -> None:
+    await database.execute(
+        process_jobs.update().where(process_jobs.c.id == process_id).values(**values)
+    )
+
+
+def _publish(process_id: str, values: dict, partial: dict = None) -> None:
+    update = dict(partial or {})
+    if "status" in values:
+        update["status"] = ProcessingStatus(values["status"]).value
+    if "stage" in values:
+        update["stage"] = values["stage"]
+    job_events.publish(process_id, **update)
+
+
+async def _update_job(process_id: str, partial: dict = None, **values) -> None:
+    """Write the job row, then push the new status/stage (and any partial results) to subscribers."""
+    await _write_job(process_id, **values)
+    _publish(process_id, values, partial)
+
+
+def _parsed(analysis: dict) -> dict:
+    return {
+        "clauses_found": len(analysis['clauses']),
+        "clauses": analysis['clauses'][:PARTIAL_CLAUSES],
+        "segments": analysis.get('segments'),
+    }
+
+
+def _scored(risk: dict) -> dict:
+    return {"risk": {"level": risk['level'], "score": risk['score']}}
+
+
+def _document_results(analysis: dict) -> dict:
+    return {
+        "risk_level": analysis['risk']['level'],
+        "summary": analysis['summary'],
+        "clauses": '; '.join(analysis['clauses']),
+        "keywords": ', '.join(analysis['keywords']),
+    }
+
+
+def _comparable(analysis: dict) -> dict:
+    # the per-segment results are only needed by save_analysis; don't ship them to the worker
+    return {key: value for key, value in analysis.items() if key != '_segments'}
+
+
+async def _score(analysis: dict) -> dict:
+    # Chunked analyses of very large documents score risk while parsing and carry no text
+    if analysis.get('risk') is not None:
+        return analysis['risk']
+    return await run_nlp(analyze_risk, analysis['text'])
+
+
+async def run_job(process_id: str, owner_file: dict, tenant_file: dict) -> None:
+    """Analyze both agreements, recording each stage in process_jobs and publishing it to job_events."""
+    started = time.perf_counter()
+    stages = {}
+    try:
+        await _update_job(process_id, status=ProcessingStatus.processing, stage="extracting")
+        with metrics.timed(stages, "extracting"):
+            owner_pages, tenant_pages, owner_reusable, tenant_reusable = await asyncio.gather(
+                extract_pages_parallel(owner_file["path"]), extract_pages_parallel(tenant_file["path"]),
+                reusable_segments(owner_file["id"]), reusable_segments(tenant_file["id"]),
+            )
+
+        # Only paragraphs that changed since the previous version of each file are parsed
+        await _update_job(process_id, stage="parsing")
+        with metrics.timed(stages, "parsing"):
+            owner, tenant = await asyncio.gather(
+                run_nlp(analyze_revision, owner_pages, owner_reusable),
+                run_nlp(analyze_revision, tenant_pages, tenant_reusable),
+            )
+        metrics.record_analysis(owner)
+        metrics.record_analysis(tenant)
+
+        await _update_job(process_id, stage="scoring", partial={"owner": _parsed(owner), "tenant": _parsed(tenant)})
+        with metrics.timed(stages, "scoring"):
+            owner['risk'], tenant['risk'] = await asyncio.gather(_score(owner), _score(tenant))
+
+        await _update_job(
+            process_id, stage="comparing",
+            partial={"owner": _scored(owner['risk']), "tenant": _scored(tenant['risk'])}
+        )
+        with metrics.timed(stages, "comparing"):
+            comparison = metrics.record_comparison(
+                await run_nlp(compare_documents, _comparable(owner), _comparable(tenant))
+            )
+
+        result = {
+            "ownerResults": _document_results(owner),
+            "tenantResults": _document_results(tenant),
+            "comparisonResults": comparison,
+        }
+        done = {"status": ProcessingStatus.completed, "stage": "done", "result": dumps(result).decode()}
+        # Both analyses and the finished job row are committed together; subscribers
+        # hear about completion only once the results can be read
+        with metrics.timed(stages, "saving"):
+            async with database.transaction():
+                index_owner = await save_analysis(owner_file["id"], process_id, owner)
+                index_tenant = await save_analysis(tenant_file["id"], process_id, tenant)
+                await _write_job(process_id, **done)
+            index_owner()
+            index_tenant()
+        _publish(process_id, done, {
+            "similarity_percent": comparison.get('similarity_percent'),
+            "can_do_agreement": comparison.get('can_do_agreement'),
+        })
+        metrics.record_profile(stages, "job")
+        metrics.observe("legalbot_job_seconds", time.perf_counter() - started, help="Queued analysis job duration")
+    except Exception as e:
+        await _update_job(
+            process_id,
+            status=ProcessingStatus.failed,
+            result=json.dumps({"error": str(e)}),
+            partial={"error": str(e)},
+        )
+
+
+async def _worker() -> None:
+    while True:
+        process_id, owner_file, tenant_file = await _queue.get()
+        try:
+            await run_job(process_id, owner_file, tenant_file)
+        except Exception:
+            # run_job records failures itself; never let one job kill the worker
+            pass
+        finally:
+            _queue.task_done()
+
+
+async def start_workers() -> None:
+    global _queue
+    _queue = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+    for _ in range(JOB_CONCURRENCY):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
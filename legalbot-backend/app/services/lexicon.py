@@ -0,0 +1,106 @@
+import json
+import re
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+from app.core.config import LEXICON_PATH
+
+DEFAULT_LEXICON = {
+    "risk": {
+        "high": ["penalty", "liquidated damages", "indemnify", "exclusive remedy"],
+        "medium": ["warranty", "limitation of liability", "termination"],
+        "low": ["force majeure", "notification", "confidentiality"],
+    },
+    "clause": ["termination", "liability", "confidentiality", "indemnity", "warranty", "notice", "penalty", "obligation"],
+    "summary": ["termination", "liability", "confidentiality", "risk", "warranty", "indemnity"],
+}
+
+
+def _trie_pattern(node: dict) -> str:
+    alternatives = []
+    terminal = False
+    for ch in sorted(node):
+        if ch == "":
+            terminal = True
+        else:
+            alternatives.append(re.escape(ch) + _trie_pattern(node[ch]))
+    if not alternatives:
+        return ""
+    pattern = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    return "(?:" + pattern + ")?" if terminal else pattern
+
+
+class KeywordMatcher:
+    """
+    Substring matcher for a fixed set of lowercase terms. The terms are folded
+    into one trie-shaped regular expression, so a single scan of the text finds
+    every occurrence no matter how many terms there are.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = {t.lower() for t in terms if t}
+        self._lengths = sorted({len(t) for t in self.terms}, reverse=True)
+        trie = {}
+        for term in self.terms:
+            node = trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        # The lookahead makes matches zero-width so overlapping terms are all found
+        self._regex = re.compile("(?=(" + _trie_pattern(trie) + "))") if self.terms else None
+
+    def find_all(self, text_lower: str) -> List[Tuple[int, str]]:
+        """Return (offset, term) for every occurrence, in text order. Expects lowercased text."""
+        if self._regex is None:
+            return []
+        found = []
+        for m in self._regex.finditer(text_lower):
+            longest = m.group(1)
+            start = m.start()
+            # shorter terms that are prefixes of the longest match also occur here
+            for length in self._lengths:
+                if length <= len(longest) and longest[:length] in self.terms:
+                    found.append((start, longest[:length]))
+        return found
+
+    def count(self, text_lower: str) -> Counter:
+        return Counter(term for _, term in self.find_all(text_lower))
+
+
+def terms_in_span(matches: List[Tuple[int, str]], starts: List[int], span_start: int, span_end: int) -> set:
+    """Distinct terms fully inside [span_start, span_end), given sorted find_all output and its offsets."""
+    terms = set()
+    i = bisect_left(starts, span_start)
+    while i < len(matches) and starts[i] < span_end:
+        start, term = matches[i]
+        if start + len(term) <= span_end:
+            terms.add(term)
+        i += 1
+    return terms
+
+
+def load_lexicon(path: str = LEXICON_PATH) -> dict:
+    """The built-in lexicon, with any sections overridden by the JSON file at LEXICON_PATH."""
+    lexicon = dict(DEFAULT_LEXICON)
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            lexicon.update(json.load(fh))
+    return lexicon
+
+
+@lru_cache(maxsize=None)
+def get_matchers() -> dict:
+    """Build the matchers once per process."""
+    lexicon = load_lexicon()
+    risk_levels = {}
+    for level, terms in lexicon["risk"].items():
+        for term in terms:
+            risk_levels.setdefault(term.lower(), level)
+    return {
+        "risk": KeywordMatcher(risk_levels),
+        "risk_levels": risk_levels,
+        "clause": KeywordMatcher(lexicon["clause"]),
+        "summary": KeywordMatcher(lexicon["summary"]),
+    }
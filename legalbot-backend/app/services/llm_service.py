@@ -1,8 +1,239 @@
-from gpt4all import GPT4All
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from app.core.config import (
+    LLM_MODEL_PATH, LLM_BACKEND, LLM_BACKENDS, LLM_QUEUE_SIZE, LLM_MAX_BATCH,
+    LLM_BATCH_WAIT_MS, LLM_MAX_TOKENS, LLM_CACHE_SIZE
+)
+from app.core import metrics
+
+_DONE = object()
+
+
+class LLMQueueFullError(Exception):
+    """Raised when the generation queue is at capacity and cannot accept more work."""
+
+
+@lru_cache(maxsize=1)
+def get_llm_model():
+    """Load the GPT4All model on first use rather than at import time."""
+    from gpt4all import GPT4All
+    return GPT4All(LLM_MODEL_PATH)
+
+
+class GPT4AllBackend:
+    name = "gpt4all"
+
+    def stream(self, prompt: str, max_tokens: int, temperature: float):
+        yield from get_llm_model().generate(prompt, max_tokens=max_tokens, temp=temperature, streaming=True)
+
+
+class StubBackend:
+    """Deterministic offline backend: echoes the prompt back one word per token."""
+    name = "stub"
+
+    def stream(self, prompt: str, max_tokens: int, temperature: float):
+        words = f"[stub t={temperature}] {prompt}".split()
+        for i, word in enumerate(words[:max_tokens]):
+            yield word if i == 0 else " " + word
+
+
+def get_backend(name: str = LLM_BACKEND):
+    if name not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {name}")
+    return StubBackend() if name == "stub" else GPT4AllBackend()
+
+
+class LLMRequest:
+    """One submitted generation; iterate tokens() or await text()."""
+
+    def __init__(self, key: str, prompt: str, params: dict, cached_text: str = None):
+        self.key = key
+        self.prompt = prompt
+        self.params = params
+        self.cached = cached_text is not None
+        self._tokens = asyncio.Queue()
+        if self.cached:
+            self._tokens.put_nowait(cached_text)
+            self._tokens.put_nowait(_DONE)
+
+    def _push(self, item) -> None:
+        self._tokens.put_nowait(item)
+
+    async def tokens(self):
+        while True:
+            item = await self._tokens.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    async def text(self) -> str:
+        return "".join([token async for token in self.tokens()])
+
+
+class LLMService:
+    """
+    A single model instance behind a bounded queue. The worker collects up to
+    max_batch requests (waiting at most batch_wait seconds after the first),
+    answers identical prompts in the batch with one generation, and runs the
+    rest one after another on the model's own thread while streaming tokens
+    back to each waiting request. Finished texts go into an LRU cache keyed by
+    prompt and sampling parameters.
+    """
+
+    def __init__(self, backend=None, queue_size: int = LLM_QUEUE_SIZE, max_batch: int = LLM_MAX_BATCH,
+                 batch_wait: float = LLM_BATCH_WAIT_MS / 1000, cache_size: int = LLM_CACHE_SIZE):
+        self._backend = backend
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._executor = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
+
+    # cache
+
+    def _key(self, prompt: str, params: dict) -> str:
+        tag = json.dumps({"backend": self.backend.name, "prompt": prompt, **params}, sort_keys=True)
+        return hashlib.sha256(tag.encode()).hexdigest()
+
+    def _cache_get(self, key: str):
+        with self._cache_lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+            return text
+
+    def _cache_put(self, key: str, text: str) -> None:
+        if not self.cache_size:
+            return
+        with self._cache_lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # lifecycle
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        # The model is not thread-safe: every generation runs on this one thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # public API
+
+    def submit(self, prompt: str, max_tokens: int = 512, temperature: float = 0.7) -> LLMRequest:
+        """
+        Queue a generation, or answer it from the cache. Raises
+        LLMQueueFullError instead of blocking when the queue is full.
+        """
+        if self._queue is None:
+            raise RuntimeError("LLM service is not running")
+        params = {"max_tokens": max(1, min(int(max_tokens), LLM_MAX_TOKENS)), "temperature": float(temperature)}
+        key = self._key(prompt, params)
+        cached = self._cache_get(key)
+        metrics.inc("legalbot_llm_cache_total", help="LLM prompt cache lookups", result="hit" if cached else "miss")
+        request = LLMRequest(key, prompt, params, cached)
+        if not request.cached:
+            try:
+                self._queue.put_nowait(request)
+            except asyncio.QueueFull:
+                raise LLMQueueFullError("LLM queue is full, try again later")
+        return request
+
+    async def generate(self, prompt: str, max_tokens: int = 512, temperature: float = 0.7) -> str:
+        return await self.submit(prompt, max_tokens, temperature).text()
+
+    # worker
+
+    async def _next_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _generate(self, requests: list, loop) -> str:
+        """Runs on the model thread; streams each token to every request sharing the prompt."""
+        first = requests[0]
+        parts = []
+        for token in self.backend.stream(first.prompt, **first.params):
+            parts.append(token)
+            for request in requests:
+                loop.call_soon_threadsafe(request._push, token)
+        return "".join(parts)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            groups = OrderedDict()
+            for request in batch:
+                groups.setdefault(request.key, []).append(request)
+            metrics.observe("legalbot_llm_batch_size", len(batch), (1, 2, 4, 8, 16, 32), help="Requests per LLM batch")
+            for key, requests in groups.items():
+                started = time.perf_counter()
+                try:
+                    # an earlier batch may have produced this text while the request waited
+                    text = self._cache_get(key)
+                    if text is not None:
+                        for request in requests:
+                            request._push(text)
+                    else:
+                        text = await loop.run_in_executor(self._executor, self._generate, requests, loop)
+                        self._cache_put(key, text)
+                    for request in requests:
+                        request._push(_DONE)
+                except Exception as e:
+                    for request in requests:
+                        request._push(e)
+                finally:
+                    metrics.observe("legalbot_llm_generation_seconds", time.perf_counter() - started,
+                                    help="LLM generation latency")
+                    for _ in requests:
+                        self._queue.task_done()
+
+
+llm_service = LLMService()
+metrics.gauge("legalbot_llm_queue_depth", llm_service.depth, help="LLM generations waiting in the queue")
 
-# Use your actual path to the downloaded model file
-model_path = r"D:\gpt4\download\mistral-7b-instruct-v0.1.Q4_0.gguf"
-gpt4all_model = GPT4All(model_path)
 
 def generate_llm_response(prompt: str, max_tokens=512):
-    return gpt4all_model.generate(prompt, max_tokens=max_tokens)
+    """Blocking, uncached generation for scripts; API handlers should use llm_service."""
+    return "".join(get_backend().stream(prompt, max_tokens=max_tokens, temperature=0.7))
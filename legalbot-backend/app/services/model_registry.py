@@ -0,0 +1,31 @@
+import threading
+
+from app.core.config import NLP_MODEL
+
+_models = {}
+_lock = threading.Lock()
+
+
+def get_nlp(exclude: tuple = ()):
+    """
+    Return the spaCy pipeline for NLP_MODEL, loading it on first use. Each
+    distinct `exclude` set is loaded once per process and then reused; spaCy
+    itself is only imported here so importing the app stays cheap.
+    """
+    key = tuple(sorted(exclude))
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                import spacy
+                # ensure model installed: python -m spacy download en_core_web_sm
+                model = spacy.load(NLP_MODEL, exclude=list(key))
+                _models[key] = model
+    return model
+
+
+def warm_worker() -> bool:
+    """Load the default pipeline in the calling (worker) process."""
+    get_nlp()
+    return True
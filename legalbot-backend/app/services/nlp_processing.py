@@ -1,79 +1,130 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import os
 import re
-from typing import List
+import time
+from bisect import bisect_right
+from typing import Iterable, List
 from collections import Counter
 from difflib import SequenceMatcher
 
-import spacy
 import fitz  # PyMuPDF
-from docx import Document
-import dateutil.parser
 
-# Load spaCy English model (ensure model installed: python -m spacy download en_core_web_sm)
-nlp = spacy.load("en_core_web_sm")
+from app.core.config import (
+    COMPARE_MODE, COMPARE_MODES, PDF_PARALLEL_MIN_PAGES, PDF_PAGES_PER_TASK, METRICS_ENABLED,
+    ANALYSIS_STREAMING_MIN_CHARS, ANALYSIS_CHUNK_CHARS, ANALYSIS_CHUNK_OVERLAP_CHARS, ANALYSIS_CHUNK_BATCH,
+    VERSION_SEGMENT_MAX_CHARS, VERSION_SEGMENT_BATCH
+)
+from app.core.metrics import timed, record_analysis
+from app.services.executor import run_nlp
+from app.services.model_registry import get_nlp
+from app.services.clause_diff import diff_units, split_units
+from app.services.analysis_cache import analysis_cache, cache_key
+from app.services.file_manager import save_upload_file
+from app.services.lexicon import get_matchers, terms_in_span
+from app.services.dates import temporal_expressions
+from app.services.docx_extractor import docx_pages, docx_text
+
+
+
+def iter_pdf_pages(file_path: str, start: int = 0, stop: int = None):
+    """Yield (page_number, text) for pages [start, stop), 1-based page numbers."""
+    with fitz.open(file_path) as doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        for index in range(start, stop):
+            yield index + 1, doc[index].get_text()
+
+
+def extract_pdf_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    return [text for _, text in iter_pdf_pages(file_path, start, stop)]
+
+
+def pdf_page_count(file_path: str) -> int:
+    with fitz.open(file_path) as doc:
+        return doc.page_count
 
 
 def extract_text_from_pdf(file_path: str) -> str:
-    doc = fitz.open(file_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+    return "".join(extract_pdf_page_range(file_path, 0, None))
 
 
 def extract_text_from_docx(file_path: str) -> str:
-    doc = Document(file_path)
-    full_text = []
-    for para in doc.paragraphs:
-        full_text.append(para.text)
-    return "\n".join(full_text)
+    """Paragraphs, table rows, headers and footers, streamed from the package XML."""
+    return docx_text(file_path)
 
 
-def extract_clauses(text: str) -> List[str]:
+def parse_text(text: str):
     """
-    Use spaCy sentence segmentation and return normalized, deduplicated clauses
-    that contain keywords of legal interest.
+    Run the spaCy pipeline once. The returned Doc can be passed to every
+    extractor below through its `doc` argument instead of re-parsing the text.
+    """
+    return get_nlp()(text)
+
+
+def _keyword_matches(matcher, text: str):
+    matches = matcher.find_all(text.lower())
+    return matches, [start for start, _ in matches]
+
+
+def _clause_spans(doc, sents=None):
+    """
+    Yield (normalized clause, start_char) for sentences of legal interest,
+    using one clause-lexicon scan over the whole Doc.
     """
-    keywords = {"termination", "liability", "confidentiality", "indemnity", "warranty", "notice", "penalty", "obligation"}
-    clauses = []
-    doc = nlp(text)
-    for sent in doc.sents:
-        sent_text = sent.text.strip()
-        sent_lower = sent_text.lower()
-        if any(kw in sent_lower for kw in keywords):
-            normalized = re.sub(r'\s+', ' ', sent_text).strip()
-            clauses.append(normalized)
+    matches, starts = _keyword_matches(get_matchers()['clause'], doc.text)
+    for sent in (doc.sents if sents is None else sents):
+        if terms_in_span(matches, starts, sent.start_char, sent.end_char):
+            normalized = re.sub(r'\s+', ' ', sent.text).strip()
+            # a sentence may start with the line break that ended the previous page
+            yield normalized, sent.start_char + len(sent.text) - len(sent.text.lstrip())
+
+
+def _dedupe_clauses(spans):
     # dedupe while preserving order
     seen = set()
     out = []
-    for c in clauses:
+    for c, start in spans:
         key = c.lower()
         if key not in seen:
             seen.add(key)
-            out.append(c)
+            out.append((c, start))
     return out
 
 
+def extract_clauses(text: str, doc=None) -> List[str]:
+    """
+    Use spaCy sentence segmentation and return normalized, deduplicated clauses
+    that contain keywords of legal interest.
+    """
+    if doc is None:
+        doc = get_nlp()(text)
+    return [c for c, _ in _dedupe_clauses(_clause_spans(doc))]
+
+
 def analyze_risk(text: str) -> dict:
     """
     Count occurrences of risk keywords, compute normalized score and level.
+    The score weighs each distinct keyword once; `occurrences` holds how often
+    each one appears.
     """
-    risk_keywords = {
-        "high": ["penalty", "liquidated damages", "indemnify", "exclusive remedy"],
-        "medium": ["warranty", "limitation of liability", "termination"],
-        "low": ["force majeure", "notification", "confidentiality"]
-    }
-    text_lower = text.lower()
+    return _score_risk(get_matchers()['risk'].count(text.lower()), len(text))
+
+
+def _score_risk(occurrences: Counter, text_length: int) -> dict:
+    matchers = get_matchers()
     counts = {"high": 0, "medium": 0, "low": 0}
     found = []
-    for level, kws in risk_keywords.items():
-        for kw in kws:
-            if kw in text_lower:
-                counts[level] += 1
-                found.append(f"{kw} ({level})")
+    for kw, level in matchers['risk_levels'].items():
+        if occurrences[kw]:
+            counts[level] = counts.get(level, 0) + 1
+            found.append(f"{kw} ({level})")
     # normalized score: weighted by level and scaled to 0..100
     raw_score = counts["high"] * 3 + counts["medium"] * 2 + counts["low"] * 1
     # scale factor: guard against long docs -> divide by sqrt(len)/50 heuristic
-    length_factor = max(1.0, (len(text) ** 0.5) / 50.0)
+    length_factor = max(1.0, (text_length ** 0.5) / 50.0)
     score = int(min(100, (raw_score / length_factor) * 10))
     if score >= 60:
         level = "High"
@@ -83,27 +134,25 @@ def analyze_risk(text: str) -> dict:
         level = "Low"
     else:
         level = "Unknown"
-    return {"level": level, "score": score, "found": found}
+    return {"level": level, "score": score, "found": found, "occurrences": dict(occurrences)}
 
 
-def extract_keywords(text: str, top_n: int = 10) -> List[str]:
-    doc = nlp(text.lower())
-    candidates = [chunk.text.strip() for chunk in doc.noun_chunks]
+def extract_keywords(text: str, top_n: int = 10, doc=None) -> List[str]:
+    if doc is None:
+        doc = get_nlp()(text)
+    # Chunks come from the shared cased parse and are lowercased afterwards; the model
+    # is trained on cased text, so this tags better than parsing a lowercased copy
+    candidates = [chunk.text.strip().lower() for chunk in doc.noun_chunks]
     freq = Counter(candidates)
     most_common = freq.most_common(top_n)
     keywords = [kw for kw, _ in most_common]
     return keywords
 
 
-def summarize_text(text: str, max_sentences: int = 3) -> str:
-    doc = nlp(text)
-    keywords = ['termination', 'liability', 'confidentiality', 'risk', 'warranty', 'indemnity']
-    sent_scores = []
-    for sent in doc.sents:
-        score = sum(kw in sent.text.lower() for kw in keywords)
-        score += len([ent for ent in sent.ents])
-        sent_scores.append((score, sent.text))
-    sent_scores.sort(reverse=True)
+def summarize_text(text: str, max_sentences: int = 3, doc=None) -> str:
+    if doc is None:
+        doc = get_nlp()(text)
+    sent_scores = sorted(_summary_scores(doc), reverse=True)
     top_sents = [s for _, s in sent_scores[:max_sentences]]
     if top_sents:
         return " ".join(top_sents)
@@ -112,56 +161,481 @@ def summarize_text(text: str, max_sentences: int = 3) -> str:
         return ' '.join(sentences[:max_sentences]).strip()
 
 
-def normalize_dates(entities: list) -> list:
-    date_entities = []
-    for ent in entities:
-        try:
-            dt = dateutil.parser.parse(ent, fuzzy=True)
-            date_entities.append(dt.strftime('%Y-%m-%d'))
-        except Exception:
-            continue
-    return list(set(date_entities))
+def _summary_scores(doc, sents=None):
+    """(score, sentence text) per sentence: distinct summary terms plus entity count."""
+    matches, starts = _keyword_matches(get_matchers()['summary'], doc.text)
+    for sent in (doc.sents if sents is None else sents):
+        score = len(terms_in_span(matches, starts, sent.start_char, sent.end_char))
+        score += len([ent for ent in sent.ents])
+        yield score, sent.text
+
+
+def _date_entities(doc, low: int = 0, high: int = None):
+    """(text, preceding text, following text) for DATE entities starting in [low, high)."""
+    text = doc.text
+    for ent in doc.ents:
+        if ent.label_ == 'DATE' and low <= ent.start_char < (len(text) if high is None else high):
+            yield ent.text, text[max(0, ent.start_char - 40):ent.start_char], text[ent.end_char:ent.end_char + 80]
+
+
+def extract_text(file_path: str) -> str:
+    suffix = os.path.splitext(file_path)[1].lower()
+    if suffix == '.pdf':
+        return extract_text_from_pdf(file_path)
+    if suffix == '.docx':
+        return extract_text_from_docx(file_path)
+    if suffix == '.txt':
+        with open(file_path, encoding='utf-8') as fh:
+            return fh.read()
+    return ''
+
+
+def extract_pages(file_path: str) -> List[str]:
+    """Text per page (DOCX pages end at hard page breaks); other formats come back as a single page."""
+    suffix = os.path.splitext(file_path)[1].lower()
+    if suffix == '.pdf':
+        return extract_pdf_page_range(file_path, 0, None)
+    if suffix == '.docx':
+        return docx_pages(file_path)
+    return [extract_text(file_path)]
+
+
+async def extract_pages_parallel(file_path: str) -> List[str]:
+    """
+    Like extract_pages, but large PDFs are split into page ranges that are
+    extracted concurrently in the worker pool.
+    """
+    if os.path.splitext(file_path)[1].lower() != '.pdf':
+        return await run_nlp(extract_pages, file_path)
+    page_count = await run_nlp(pdf_page_count, file_path)
+    if page_count < PDF_PARALLEL_MIN_PAGES:
+        return await run_nlp(extract_pdf_page_range, file_path, 0, page_count)
+    ranges = [
+        run_nlp(extract_pdf_page_range, file_path, start, start + PDF_PAGES_PER_TASK)
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ]
+    return [page for chunk in await asyncio.gather(*ranges) for page in chunk]
+
+
+def _page_starts(pages: List[str]) -> List[int]:
+    page_starts = []
+    offset = 0
+    for page in pages:
+        page_starts.append(offset)
+        offset += len(page)
+    return page_starts
+
+
+def _new_profile():
+    return {} if METRICS_ENABLED else None
+
+
+def analyze_pages(pages: List[str], with_risk: bool = True, profile: dict = None) -> dict:
+    """
+    analyze_text over the joined pages, also recording each clause's page.
+    Texts of ANALYSIS_STREAMING_MIN_CHARS or more go through analyze_chunks.
+    """
+    if sum(len(page) for page in pages) >= ANALYSIS_STREAMING_MIN_CHARS:
+        return analyze_chunks(pages, profile=profile)
+    return analyze_text("".join(pages), with_risk, page_starts=_page_starts(pages), profile=profile)
+
+
+_CHUNK_BOUNDARY = re.compile(r'(?<=[.!?;])\s+|\n\s*\n')
+
+
+def _cut_point(text: str, low: int, target: int) -> int:
+    """The last sentence boundary in text[low:target], or target when there is none."""
+    window_start = max(low, target - ANALYSIS_CHUNK_CHARS // 2)
+    cut = None
+    for match in _CHUNK_BOUNDARY.finditer(text, window_start, target):
+        cut = match.end()
+    return cut if cut is not None and cut > low else target
+
+
+def sentence_chunks(pages: Iterable[str], page_starts: List[int], chunk_chars: int = ANALYSIS_CHUNK_CHARS,
+                    overlap_chars: int = ANALYSIS_CHUNK_OVERLAP_CHARS):
+    """
+    Yield (chunk_text, (offset, own_start, own_end)) while pages are consumed.
+    Consecutive chunks own adjacent, sentence-aligned ranges [own_start, own_end)
+    of the full text and carry up to overlap_chars of context on both sides, so
+    sentences and entities at a boundary are seen whole. Offsets are into the
+    full text; page_starts is filled in as pages are read. Only about one chunk
+    of text is buffered at a time.
+    """
+    buffer, buffer_offset, own_start = "", 0, 0
+    pages = iter(pages)
+    exhausted = False
+    while True:
+        own_local = own_start - buffer_offset
+        while not exhausted and len(buffer) - own_local < chunk_chars + overlap_chars:
+            page = next(pages, None)
+            if page is None:
+                exhausted = True
+                break
+            page_starts.append(buffer_offset + len(buffer))
+            buffer += page
+        if own_local >= len(buffer):
+            return
+        if exhausted and len(buffer) - own_local <= chunk_chars:
+            cut = len(buffer)
+        else:
+            cut = _cut_point(buffer, own_local, own_local + chunk_chars)
+        context_start = max(0, own_local - overlap_chars)
+        chunk = buffer[context_start:min(len(buffer), cut + overlap_chars)]
+        yield chunk, (buffer_offset + context_start, own_start, buffer_offset + cut)
+        own_start = buffer_offset + cut
+        # keep only what the next chunk may use as left context
+        drop = max(0, cut - overlap_chars)
+        buffer, buffer_offset = buffer[drop:], buffer_offset + drop
+
+
+def analyze_chunks(pages: Iterable[str], top_keywords: int = 10, max_sentences: int = 3,
+                   profile: dict = None, chunk_chars: int = ANALYSIS_CHUNK_CHARS,
+                   overlap_chars: int = ANALYSIS_CHUNK_OVERLAP_CHARS) -> dict:
+    """
+    Streaming analyze_pages for very large documents: sentence_chunks feeds
+    nlp.pipe and clauses, entities, dates, keywords, summary candidates, the
+    token set and risk counts are merged chunk by chunk. Each chunk only
+    contributes what starts inside the range it owns, so the overlap never
+    double counts. The result has `units` (enough for comparison) but no
+    `text`, and always includes `risk`.
+
+    Only the text buffer and the Doc are bounded by the chunk size; the merged
+    result still grows with the document: its units are the whole text split
+    into sentences, and clauses, distinct entities and date contexts are kept
+    for every chunk.
+    """
+    if profile is None:
+        profile = _new_profile()
+    matchers = get_matchers()
+    page_starts = []
+    clauses, clause_pages, seen = [], {}, set()
+    entities, date_entities, tokens, units = {}, [], set(), []  # entities: distinct, in order
+    keyword_counts, risk_counts = Counter(), Counter()
+    summary = []  # heap of the best (score, sentence) pairs so far
+    total_chars = total_tokens = chunks = 0
+
+    chunked = sentence_chunks(pages, page_starts, chunk_chars, overlap_chars)
+    docs = get_nlp().pipe(chunked, as_tuples=True, batch_size=ANALYSIS_CHUNK_BATCH)
+    while True:
+        started = time.perf_counter()
+        item = next(docs, None)
+        if profile is not None:
+            profile['parse'] = profile.get('parse', 0.0) + time.perf_counter() - started
+        if item is None:
+            break
+        doc, (offset, own_start, own_end) = item
+        low, high = own_start - offset, own_end - offset
+        chunks += 1
+        with timed(profile, 'merge'):
+            owned_sents = [sent for sent in doc.sents if low <= sent.start_char < high]
+            for clause, start in _clause_spans(doc, owned_sents):
+                if clause.lower() not in seen:
+                    seen.add(clause.lower())
+                    clauses.append(clause)
+                    clause_pages[clause] = bisect_right(page_starts, offset + start)
+            for score in _summary_scores(doc, owned_sents):
+                if len(summary) < max_sentences:
+                    heapq.heappush(summary, score)
+                else:
+                    heapq.heappushpop(summary, score)
+            entities.update(dict.fromkeys(ent.text for ent in doc.ents if low <= ent.start_char < high))
+            date_entities.extend(_date_entities(doc, low, high))
+            keyword_counts.update(
+                chunk.text.strip().lower() for chunk in doc.noun_chunks if low <= chunk.start_char < high
+            )
+            for token in doc:
+                if low <= token.idx < high:
+                    total_tokens += 1
+                    if not token.is_stop and token.is_alpha:
+                        tokens.add(token.lemma_.lower())
+            owned_text = doc.text[low:high]
+            risk_counts.update(
+                term for start, term in matchers['risk'].find_all(doc.text.lower()) if low <= start < high
+            )
+            units.extend(split_units(owned_text))
+            total_chars += len(owned_text)
+
+    temporal = temporal_expressions(date_entities)
+    analysis = {
+        'clauses': clauses,
+        'clause_pages': clause_pages,
+        'risk': _score_risk(risk_counts, total_chars),
+        'keywords': [kw for kw, _ in keyword_counts.most_common(top_keywords)],
+        'summary': " ".join(s for _, s in sorted(summary, reverse=True)),
+        'entities': list(entities),
+        'dates': temporal['dates'],
+        'durations': temporal['durations'],
+        'deadlines': temporal['deadlines'],
+        'tokens': sorted(tokens),
+        'units': units,
+        'chunks': chunks,
+    }
+    if profile is not None:
+        analysis['_profile'] = profile
+        analysis['_stats'] = {'chars': total_chars, 'tokens': total_tokens}
+    return analysis
+
+
+_SEGMENT_BOUNDARY = re.compile(r'(?<=[.!?;:])[ \t]*\n\s*|\n[ \t]*\n\s*')
+
+
+def segment_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def text_segments(text: str, max_chars: int = VERSION_SEGMENT_MAX_CHARS):
+    """
+    Yield (start, segment) for the paragraphs of a text: runs ending at a line
+    break after a sentence, or at a blank line, with surrounding whitespace
+    stripped. Paragraphs longer than max_chars are cut at sentence boundaries,
+    so no sentence is ever split across two segments.
+    """
+    low = 0
+    for match in itertools.chain(_SEGMENT_BOUNDARY.finditer(text), [None]):
+        high = len(text) if match is None else match.start()
+        while low < high:
+            cut = high if high - low <= max_chars else _cut_point(text, low, low + max_chars)
+            segment = text[low:cut]
+            stripped = segment.lstrip()
+            if stripped.strip():
+                yield low + len(segment) - len(stripped), stripped.rstrip()
+            low = cut
+        low = len(text) if match is None else match.end()
+
+
+def analyze_segments(texts: List[str], max_sentences: int = 3) -> List[dict]:
+    """
+    Parse each paragraph on its own and keep what analyze_revision merges:
+    clause spans, the best summary sentences, entities, DATE contexts, noun
+    chunk and risk term counts, the token set and comparison units. Results
+    are plain JSON so they can be stored per segment and reused.
+    """
+    matchers = get_matchers()
+    results = []
+    for doc in get_nlp().pipe(texts, batch_size=VERSION_SEGMENT_BATCH):
+        results.append({
+            'clauses': list(_clause_spans(doc)),
+            'summary': heapq.nlargest(max_sentences, _summary_scores(doc)),
+            'entities': [ent.text for ent in doc.ents],
+            'dates': list(_date_entities(doc)),
+            'keywords': dict(Counter(chunk.text.strip().lower() for chunk in doc.noun_chunks)),
+            'risk': dict(matchers['risk'].count(doc.text.lower())),
+            'tokens': sorted({t.lemma_.lower() for t in doc if not t.is_stop and t.is_alpha}),
+            'units': split_units(doc.text),
+            'token_count': len(doc),
+        })
+    return results
+
+
+def analyze_revision(pages: List[str], reusable: dict = None, top_keywords: int = 10, max_sentences: int = 3,
+                     profile: dict = None) -> dict:
+    """
+    analyze_pages for documents that are revised over time. The text is cut
+    into text_segments and hashed; segments whose hash is in `reusable`
+    ({hash: stored segment result as JSON}, typically the previous version's)
+    are not parsed again, only the others go through analyze_segments. The
+    per-segment results are merged like analyze_chunks merges chunks: clauses
+    deduplicated in order, risk scored once from the summed term counts.
+
+    The result also has `segments` ({"total", "reused"}) and a private
+    `_segments` list of {hash, page, chars, result} for save_analysis, whose
+    stored rows feed the next version and cheap version diffs.
+    """
+    if profile is None:
+        profile = _new_profile()
+    reusable = reusable or {}
+    page_starts = _page_starts(pages)
+    text = "".join(pages)
+    with timed(profile, 'segment'):
+        segments = [(start, segment, segment_hash(segment)) for start, segment in text_segments(text)]
+        results = {h: json.loads(reusable[h]) for _, _, h in segments if h in reusable}
+        missing = list({h: segment for _, segment, h in segments if h not in results}.items())
+    started = time.perf_counter()
+    for (h, _), result in zip(missing, analyze_segments([segment for _, segment in missing], max_sentences)):
+        results[h] = result
+    if profile is not None:
+        profile['parse'] = profile.get('parse', 0.0) + time.perf_counter() - started
+
+    clauses, clause_pages, seen = [], {}, set()
+    entities, date_entities, tokens, units, summary = [], [], set(), [], []
+    keyword_counts, risk_counts = Counter(), Counter()
+    total_tokens = 0
+    stored = []
+    with timed(profile, 'merge'):
+        for start, segment, h in segments:
+            result = results[h]
+            for clause, offset in result['clauses']:
+                if clause.lower() not in seen:
+                    seen.add(clause.lower())
+                    clauses.append(clause)
+                    clause_pages[clause] = bisect_right(page_starts, start + offset)
+            for score in result['summary']:
+                if len(summary) < max_sentences:
+                    heapq.heappush(summary, tuple(score))
+                else:
+                    heapq.heappushpop(summary, tuple(score))
+            entities.extend(result['entities'])
+            date_entities.extend(map(tuple, result['dates']))
+            keyword_counts.update(result['keywords'])
+            risk_counts.update(result['risk'])
+            tokens.update(result['tokens'])
+            units.extend(result['units'])
+            total_tokens += result['token_count']
+            stored.append({'hash': h, 'page': bisect_right(page_starts, start), 'chars': len(segment), 'result': result})
+
+    temporal = temporal_expressions(date_entities)
+    analysis = {
+        'clauses': clauses,
+        'clause_pages': clause_pages,
+        'risk': _score_risk(risk_counts, len(text)),
+        'keywords': [kw for kw, _ in keyword_counts.most_common(top_keywords)],
+        'summary': " ".join(s for _, s in sorted(summary, reverse=True)),
+        'entities': entities,
+        'dates': temporal['dates'],
+        'durations': temporal['durations'],
+        'deadlines': temporal['deadlines'],
+        'tokens': sorted(tokens),
+        'units': units,
+        'segments': {'total': len(segments), 'reused': len(segments) - len(missing)},
+        '_segments': stored,
+    }
+    # like analyze_chunks, very large documents keep the units instead of the text
+    if len(text) < ANALYSIS_STREAMING_MIN_CHARS:
+        analysis['text'] = text
+    if profile is not None:
+        analysis['_profile'] = profile
+        analysis['_stats'] = {'chars': len(text), 'tokens': total_tokens}
+    return analysis
+
+
+def iter_pages(file_path: str):
+    """Page texts read lazily where the format allows it (PDF), else as extract_pages."""
+    if os.path.splitext(file_path)[1].lower() == '.pdf':
+        return (text for _, text in iter_pdf_pages(file_path))
+    return iter(extract_pages(file_path))
+
+
+def analyze_files(file_paths: List[str], batch_size: int = 8) -> List[dict]:
+    """
+    Analyze several stored files, feeding their texts through nlp.pipe in
+    batches instead of calling the pipeline once per document. Files that are
+    too large for one Doc are analyzed with analyze_chunks instead.
+    """
+    page_lists = [extract_pages(path) for path in file_paths]
+    large = {i for i, pages in enumerate(page_lists) if sum(map(len, pages)) >= ANALYSIS_STREAMING_MIN_CHARS}
+    small = [i for i in range(len(page_lists)) if i not in large]
+    texts = ["".join(page_lists[i]) for i in small]
+    docs = get_nlp().pipe(texts, batch_size=batch_size)
+    results = {
+        i: _analyze_doc(text, doc, page_starts=_page_starts(page_lists[i]), profile=_new_profile())
+        for i, text, doc in zip(small, texts, docs)
+    }
+    for i in large:
+        results[i] = analyze_chunks(page_lists[i])
+    return [results[i] for i in range(len(page_lists))]
+
+
+def analyze_file(file_path: str) -> dict:
+    """
+    Extract and analyze a stored file. Safe to run inside a worker process.
+    Pages are read lazily; once they add up to ANALYSIS_STREAMING_MIN_CHARS
+    the rest of the file streams through analyze_chunks.
+    """
+    profile = _new_profile()
+    pages, size = [], 0
+    stream = iter_pages(file_path)
+    with timed(profile, 'extract'):
+        for page in stream:
+            pages.append(page)
+            size += len(page)
+            if size >= ANALYSIS_STREAMING_MIN_CHARS:
+                break
+    if size >= ANALYSIS_STREAMING_MIN_CHARS:
+        return analyze_chunks(itertools.chain(pages, stream), profile=profile)
+    return analyze_pages(pages, profile=profile)
 
 
 async def process_document(upload_file):
     import tempfile
-    import os
     filename = upload_file.filename
     suffix = os.path.splitext(filename)[1]
-    file_bytes = await upload_file.read()
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(file_bytes)
-        tmp_path = tmp.name
-    if suffix == '.pdf':
-        text = extract_text_from_pdf(tmp_path)
-    elif suffix == '.docx':
-        text = extract_text_from_docx(tmp_path)
-    elif suffix == '.txt':
-        text = file_bytes.decode('utf-8')
-    else:
-        text = ''
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
     try:
-        os.unlink(tmp_path)
-    except Exception:
-        pass
-
-    clauses = extract_clauses(text)
-    risk = analyze_risk(text)
-    keywords = extract_keywords(text)
-    summary = summarize_text(text)
-    entities_all = [ent.text for ent in nlp(text).ents]
-    dates_raw = [ent.text for ent in nlp(text).ents if ent.label_ == 'DATE']
-    dates = normalize_dates(dates_raw)
-    return {
-        'filename': filename,
-        'clauses': clauses,
+        # Stream to disk once; the hash computed on the way keys the cache
+        stored = await save_upload_file(upload_file, tmp_path)
+        key = cache_key(stored['sha256'])
+        result, tier = await analysis_cache.get(key)
+        if result is None:
+            result = record_analysis(await run_nlp(analyze_file, tmp_path))
+            await analysis_cache.put(key, result)
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except Exception:
+            pass
+
+    # What a comparison reads, like a stored artifact: the text is dropped
+    # (legacy scores use the joined units) and entities are deduplicated
+    result = {key: value for key, value in result.items() if key != 'text'}
+    result['entities'] = sorted(set(result.get('entities') or []))
+    result['filename'] = filename
+    result['cache'] = tier or 'miss'
+    return result
+
+
+def analyze_text(text: str, with_risk: bool = True, page_starts: List[int] = None, profile: dict = None) -> dict:
+    """
+    Parse the text once and derive clauses, risk, keywords, summary, entities,
+    dates and the comparison token set from the same Doc. Callers that score
+    risk as a separate step can pass with_risk=False.
+
+    When metrics are enabled the result also carries private `_profile`
+    (seconds per stage) and `_stats` keys; callers in the API process hand it
+    to metrics.record_analysis, which records and removes them.
+    """
+    if profile is None:
+        profile = _new_profile()
+    with timed(profile, 'parse'):
+        doc = parse_text(text)
+    return _analyze_doc(text, doc, with_risk, page_starts, profile)
+
+
+def _analyze_doc(text: str, doc, with_risk: bool = True, page_starts: List[int] = None, profile: dict = None) -> dict:
+    with timed(profile, 'clauses'):
+        clause_spans = _dedupe_clauses(_clause_spans(doc))
+    page_starts = page_starts or [0]
+    with timed(profile, 'risk'):
+        risk = analyze_risk(text) if with_risk else None
+    with timed(profile, 'keywords'):
+        keywords = extract_keywords(text, doc=doc)
+    with timed(profile, 'summary'):
+        summary = summarize_text(text, doc=doc)
+    with timed(profile, 'entities'):
+        entities_all = [ent.text for ent in doc.ents]
+        temporal = temporal_expressions(_date_entities(doc))
+    with timed(profile, 'tokens'):
+        tokens = sorted(token_set(text, doc=doc))
+        units = split_units(text)
+    analysis = {
+        'clauses': [c for c, _ in clause_spans],
+        'clause_pages': {c: bisect_right(page_starts, start) for c, start in clause_spans},
         'risk': risk,
         'keywords': keywords,
         'summary': summary,
         'entities': entities_all,
-        'dates': dates,
+        'dates': temporal['dates'],
+        'durations': temporal['durations'],
+        'deadlines': temporal['deadlines'],
+        'tokens': tokens,
+        'units': units,
         'text': text
     }
+    if profile is not None:
+        analysis['_profile'] = profile
+        analysis['_stats'] = {'chars': len(text), 'tokens': len(doc)}
+    return analysis
 
 
 def jaccard_similarity(set_a, set_b):
@@ -170,22 +644,83 @@ def jaccard_similarity(set_a, set_b):
     return len(intersection) / len(union) if len(union) > 0 else 1.0
 
 
-def token_set(text: str):
-    doc = nlp(text.lower())
-    tokens = {t.lemma_ for t in doc if not t.is_stop and t.is_alpha}
+def token_set(text: str, doc=None):
+    if doc is None:
+        doc = get_nlp()(text)
+    # lemmas of the cased parse, lowercased; is_stop already ignores case
+    tokens = {t.lemma_.lower() for t in doc if not t.is_stop and t.is_alpha}
     return tokens
 
 
-def compare_documents(doc_a, doc_b):
+def _text(doc) -> str:
+    if not isinstance(doc, dict):
+        return str(doc or '')
+    # Stored artifacts keep only the units, which is enough for the legacy ratio
+    if 'text' not in doc and doc.get('units'):
+        return ' '.join(doc['units'])
+    return str(doc.get('text', ''))
+
+
+def _units(doc, text: str) -> List[str]:
+    stored = doc.get('units') if isinstance(doc, dict) else None
+    return stored if stored is not None else split_units(text)
+
+
+def _clauses_and_tokens(doc, text: str):
+    """Reuse the analysis stored by analyze_text, parsing only when it is missing."""
+    stored = doc if isinstance(doc, dict) else {}
+    if 'clauses' in stored and 'tokens' in stored:
+        return stored['clauses'], set(stored['tokens'])
+    parsed = parse_text(text)
+    return extract_clauses(text, doc=parsed), token_set(text, doc=parsed)
+
+
+# Analysis fields each part of a comparison report is computed from; any
+# other report field (scores, diagnostics) needs all of COMPARE_INPUTS
+COMPARE_INPUTS = ('clauses', 'tokens', 'units', 'risk', 'entities', 'dates', 'summary')
+_REPORT_INPUTS = {
+    'aligned_clauses': ('units',),
+    'missing_clauses_in_a': ('clauses',),
+    'missing_clauses_in_b': ('clauses',),
+    'risk_a': ('risk',),
+    'risk_b': ('risk',),
+    'entities_only_in_a': ('entities',),
+    'entities_only_in_b': ('entities',),
+    'dates_only_in_a': ('dates',),
+    'dates_only_in_b': ('dates',),
+    'summary': ('summary',),
+}
+
+
+def compare_inputs(fields: List[str] = None) -> tuple:
+    """The analysis fields compare_documents needs to produce the given report fields (dotted paths allowed)."""
+    if fields is None:
+        return COMPARE_INPUTS
+    needed = set()
+    for field in fields:
+        needed.update(_REPORT_INPUTS.get(field.split('.')[0], COMPARE_INPUTS))
+    return tuple(name for name in COMPARE_INPUTS if name in needed)
+
+
+def compare_documents(doc_a, doc_b, mode: str = COMPARE_MODE, profile: bool = False):
     """
     Improved comparison: clause diffs, entity/date diffs, multiple similarity metrics,
     combined weighted score, diagnostics and adjusted percent considering risk.
-    """
-    text_a = str(doc_a.get('text', '') if isinstance(doc_a, dict) else (doc_a or ''))
-    text_b = str(doc_b.get('text', '') if isinstance(doc_b, dict) else (doc_b or ''))
 
-    clauses_a = extract_clauses(text_a)
-    clauses_b = extract_clauses(text_b)
+    mode="clauses" scores text similarity on aligned sentence/clause units
+    (see clause_diff); mode="legacy" uses the character-level SequenceMatcher.
+    With profile=True (or metrics enabled) diagnostics['profile'] holds the
+    seconds spent in each stage.
+    """
+    if mode not in COMPARE_MODES:
+        raise ValueError(f"Unknown compare mode: {mode}")
+    timings = {} if profile or METRICS_ENABLED else None
+    text_a = _text(doc_a)
+    text_b = _text(doc_b)
+
+    with timed(timings, 'clauses_tokens'):
+        clauses_a, tokens_a = _clauses_and_tokens(doc_a, text_a)
+        clauses_b, tokens_b = _clauses_and_tokens(doc_b, text_b)
     set_clauses_a = {c.lower() for c in clauses_a}
     set_clauses_b = {c.lower() for c in clauses_b}
     missing_in_b = list(set_clauses_a - set_clauses_b)
@@ -204,14 +739,19 @@ def compare_documents(doc_a, doc_b):
     summary = {'doc_a': doc_a.get('summary'), 'doc_b': doc_b.get('summary')}
 
     # Similarity measures
-    seq_ratio = SequenceMatcher(None, text_a, text_b).ratio()
-    tokens_a = token_set(text_a)
-    tokens_b = token_set(text_b)
-    token_jaccard = jaccard_similarity(tokens_a, tokens_b)
-    clause_overlap = jaccard_similarity(set_clauses_a, set_clauses_b)
+    aligned = None
+    with timed(timings, 'text_similarity'):
+        if mode == 'legacy':
+            text_similarity = SequenceMatcher(None, text_a, text_b).ratio()
+        else:
+            aligned = diff_units(_units(doc_a, text_a), _units(doc_b, text_b))
+            text_similarity = aligned['similarity']
+    with timed(timings, 'token_similarity'):
+        token_jaccard = jaccard_similarity(tokens_a, tokens_b)
+        clause_overlap = jaccard_similarity(set_clauses_a, set_clauses_b)
 
     # combine with tunable weights
-    overall_score = (0.45 * seq_ratio) + (0.35 * token_jaccard) + (0.20 * clause_overlap)
+    overall_score = (0.45 * text_similarity) + (0.35 * token_jaccard) + (0.20 * clause_overlap)
     overall_similarity = max(0.0, min(1.0, overall_score))
     similarity_percent = int(round(overall_similarity * 100))
 
@@ -236,7 +776,8 @@ def compare_documents(doc_a, doc_b):
     diagnostics = {
         'len_a': len(text_a),
         'len_b': len(text_b),
-        'seq_ratio': seq_ratio,
+        'mode': mode,
+        'text_similarity': text_similarity,
         'token_jaccard': token_jaccard,
         'clause_overlap': clause_overlap,
         'raw_overall_score': overall_similarity,
@@ -246,7 +787,15 @@ def compare_documents(doc_a, doc_b):
         'clauses_count_b': len(clauses_b),
     }
 
+    if aligned is None:
+        diagnostics['seq_ratio'] = text_similarity
+    else:
+        diagnostics['aligned_counts'] = aligned['counts']
+    if timings is not None:
+        diagnostics['profile'] = timings
+
     return {
+        'aligned_clauses': aligned['pairs'] if aligned else [],
         'missing_clauses_in_b': missing_in_b,
         'missing_clauses_in_a': missing_in_a,
         'risk_a': risk_a,
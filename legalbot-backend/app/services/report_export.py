@@ -0,0 +1,293 @@
+import hashlib
+import html
+import io
+import json
+import re
+import time
+import zipfile
+from typing import Iterator, List, NamedTuple, Tuple
+from xml.sax.saxutils import escape
+
+import fitz  # PyMuPDF
+
+from app.core.config import EXPORT_CACHE_DIR, EXPORT_CACHE_MEMORY_MB, EXPORT_CACHE_DISK_MB, EXPORT_CHUNK_BYTES
+from app.core import metrics
+from app.services.analysis_cache import AnalysisCache
+from app.services.executor import run_nlp
+
+# Bump whenever the rendered layout changes so stale exports are never served
+EXPORT_VERSION = "1"
+FORMATS = {
+    "pdf": "application/pdf",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+# compare_documents builds these from sets; sorted, equal reports hash (and render) the same
+_UNORDERED = (
+    'missing_clauses_in_a', 'missing_clauses_in_b', 'entities_only_in_a', 'entities_only_in_b',
+    'dates_only_in_a', 'dates_only_in_b',
+)
+_CACHE_HELP = "Report export cache lookups by the tier that answered (or miss)"
+
+
+class Section(NamedTuple):
+    """One table of the report: a PDF section and an XLSX sheet."""
+    title: str
+    columns: Tuple[str, ...]
+    rows: List[tuple]
+
+
+def normalize_report(report: dict) -> dict:
+    """The report without per-request fields (cache tiers, timings), unordered lists sorted."""
+    normalized = {key: value for key, value in report.items() if key != 'cache'}
+    for key in _UNORDERED:
+        if isinstance(normalized.get(key), list):
+            normalized[key] = sorted(normalized[key], key=str)
+    if isinstance(normalized.get('diagnostics'), dict):
+        normalized['diagnostics'] = {k: v for k, v in normalized['diagnostics'].items() if k != 'profile'}
+    return normalized
+
+
+def report_hash(report: dict, fmt: str) -> str:
+    """Key a render by the normalized report, format and export layout version."""
+    canonical = json.dumps(normalize_report(report), sort_keys=True, default=str)
+    return hashlib.sha256(f"{fmt}:{EXPORT_VERSION}:{canonical}".encode()).hexdigest()
+
+
+def _percent(value) -> str:
+    return "" if value is None else f"{value}%"
+
+
+def _flatten(values: dict, prefix: str = ""):
+    for key, value in values.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
+
+def report_sections(report: dict) -> List[Section]:
+    """The normalized report as titled tables, shared by both renderers."""
+    report = normalize_report(report)
+    risks = [("Owner", report.get('risk_a') or {}), ("Tenant", report.get('risk_b') or {})]
+    summary = report.get('summary') or {}
+    return [
+        Section("Overview", ("Measure", "Value"), [
+            ("Similarity", _percent(report.get('similarity_percent'))),
+            ("Risk-adjusted similarity", _percent(report.get('adjusted_similarity_percent'))),
+            ("Agreement possible", "yes" if report.get('can_do_agreement') else "no"),
+        ] + [(f"{side} risk", f"{risk.get('level', '')} ({risk.get('score', '')})") for side, risk in risks]),
+        Section("Risk", ("Document", "Level", "Score", "Terms found"), [
+            (side, risk.get('level'), risk.get('score'), ", ".join(risk.get('found') or [])) for side, risk in risks
+        ]),
+        Section("Missing clauses", ("Missing in", "Clause"),
+                [("Tenant", c) for c in report.get('missing_clauses_in_b') or []]
+                + [("Owner", c) for c in report.get('missing_clauses_in_a') or []]),
+        Section("Aligned clauses", ("Status", "Owner", "Tenant", "Similarity"), [
+            (pair.get('status'), pair.get('a') or "", pair.get('b') or "", pair.get('similarity'))
+            for pair in report.get('aligned_clauses') or []
+        ]),
+        Section("Entities and dates", ("Kind", "Only in", "Value"),
+                [("Entity", "Owner", e) for e in report.get('entities_only_in_a') or []]
+                + [("Entity", "Tenant", e) for e in report.get('entities_only_in_b') or []]
+                + [("Date", "Owner", d) for d in report.get('dates_only_in_a') or []]
+                + [("Date", "Tenant", d) for d in report.get('dates_only_in_b') or []]),
+        Section("Summaries", ("Document", "Summary"), [
+            ("Owner", summary.get('doc_a') or ""), ("Tenant", summary.get('doc_b') or ""),
+        ]),
+        Section("Diagnostics", ("Measure", "Value"), list(_flatten(report.get('diagnostics') or {}))),
+    ]
+
+
+# PDF: text is laid out as real (vector) text by PyMuPDF's Story, flowing across A4 pages
+
+_PAGE = fitz.paper_rect("a4")
+_CONTENT = _PAGE + (42, 42, -42, -42)
+_CSS = """
+body { font-family: sans-serif; font-size: 9pt; }
+h1 { font-size: 16pt; }
+h2 { font-size: 12pt; margin-top: 12pt; }
+table { border-collapse: collapse; width: 100%; }
+th { text-align: left; background-color: #e8e8e8; }
+th, td { border: 0.5pt solid #999999; padding: 2pt; vertical-align: top; }
+p.empty { color: #777777; }
+"""
+
+
+def _cell(value) -> str:
+    if isinstance(value, float):
+        value = round(value, 4)
+    return html.escape("" if value is None else str(value))
+
+
+def _report_html(sections: List[Section]) -> str:
+    parts = ["<h1>Agreement comparison report</h1>"]
+    for section in sections:
+        parts.append(f"<h2>{html.escape(section.title)}</h2>")
+        if not section.rows:
+            parts.append('<p class="empty">None</p>')
+            continue
+        parts.append("<table><tr>" + "".join(f"<th>{html.escape(c)}</th>" for c in section.columns) + "</tr>")
+        parts.extend("<tr>" + "".join(f"<td>{_cell(v)}</td>" for v in row) + "</tr>" for row in section.rows)
+        parts.append("</table>")
+    return "".join(parts)
+
+
+def render_pdf(report: dict) -> bytes:
+    buffer = io.BytesIO()
+    writer = fitz.DocumentWriter(buffer, "compress")
+    story = fitz.Story(html=_report_html(report_sections(report)), user_css=_CSS)
+    more = True
+    while more:
+        device = writer.begin_page(_PAGE)
+        more, _ = story.place(_CONTENT)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+    return buffer.getvalue()
+
+
+# XLSX: one worksheet per section, written as SpreadsheetML with inline strings
+
+_SHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XML_ILLEGAL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_SHEET_NAME_ILLEGAL = re.compile(r"[\[\]:*?/\\]")
+
+
+def _column_name(index: int) -> str:
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = chr(65 + rem) + name
+    return name
+
+
+def _xlsx_cell(ref: str, value, style: int = 0) -> str:
+    style_attr = f' s="{style}"' if style else ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c r="{ref}"{style_attr}><v>{value}</v></c>'
+    text = escape(_XML_ILLEGAL.sub("", "" if value is None else str(value)))
+    return f'<c r="{ref}" t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _worksheet(section: Section) -> str:
+    rows = [
+        '<row r="1">' + "".join(
+            _xlsx_cell(f"{_column_name(i)}1", c, style=1) for i, c in enumerate(section.columns)
+        ) + "</row>"
+    ]
+    for r, row in enumerate(section.rows, start=2):
+        rows.append(f'<row r="{r}">' + "".join(
+            _xlsx_cell(f"{_column_name(i)}{r}", v) for i, v in enumerate(row)
+        ) + "</row>")
+    widths = "".join(
+        f'<col min="{i + 1}" max="{i + 1}" width="{18 if i < len(section.columns) - 1 else 80}" customWidth="1"/>'
+        for i in range(len(section.columns))
+    )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<worksheet xmlns="{_SHEET_NS}"><sheetViews><sheetView workbookViewId="0">'
+        f'<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+        f'<cols>{widths}</cols><sheetData>{"".join(rows)}</sheetData></worksheet>'
+    )
+
+
+def render_xlsx(report: dict) -> bytes:
+    sections = report_sections(report)
+    names = [_SHEET_NAME_ILLEGAL.sub(" ", s.title)[:31] for s in sections]
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for i in range(1, len(sections) + 1)
+            ) + "</Types>"
+        ))
+        archive.writestr("_rels/.rels", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><Relationships xmlns="{_PACKAGE_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/></Relationships>'
+        ))
+        archive.writestr("xl/workbook.xml", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<workbook xmlns="{_SHEET_NS}" xmlns:r="{_REL_NS}"><sheets>'
+            + "".join(
+                f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(names, start=1)
+            ) + "</sheets></workbook>"
+        ))
+        archive.writestr("xl/_rels/workbook.xml.rels", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><Relationships xmlns="{_PACKAGE_REL_NS}">'
+            + "".join(
+                f'<Relationship Id="rId{i}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                for i in range(1, len(sections) + 1)
+            )
+            + f'<Relationship Id="rId{len(sections) + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+            "</Relationships>"
+        ))
+        # style 1: bold header cells
+        archive.writestr("xl/styles.xml", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><styleSheet xmlns="{_SHEET_NS}">'
+            '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+            '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+            '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+            '<fill><patternFill patternType="gray125"/></fill></fills>'
+            '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+            '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+            "</styleSheet>"
+        ))
+        for i, section in enumerate(sections, start=1):
+            archive.writestr(f"xl/worksheets/sheet{i}.xml", _worksheet(section))
+    return buffer.getvalue()
+
+
+def render_report(report: dict, fmt: str) -> bytes:
+    """Render a compare_documents report as "pdf" or "xlsx". Safe to run inside a worker process."""
+    if fmt == "pdf":
+        return render_pdf(report)
+    if fmt == "xlsx":
+        return render_xlsx(report)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+export_cache = AnalysisCache(
+    EXPORT_CACHE_DIR,
+    EXPORT_CACHE_MEMORY_MB * 1024 * 1024,
+    EXPORT_CACHE_DISK_MB * 1024 * 1024,
+    suffix=".export",
+)
+
+
+async def export_report(report: dict, fmt: str):
+    """
+    (payload, key, tier) for a report render: served from export_cache when
+    the same report was exported before (tier "memory" or "disk"), otherwise
+    rendered in the worker pool and cached (tier None).
+    """
+    key = report_hash(report, fmt)
+    payload, tier = await export_cache.get_bytes(key)
+    metrics.inc("legalbot_export_cache_total", help=_CACHE_HELP, result=tier or "miss", format=fmt)
+    if payload is None:
+        started = time.perf_counter()
+        payload = await run_nlp(render_report, normalize_report(report), fmt)
+        metrics.observe("legalbot_export_render_seconds", time.perf_counter() - started,
+                        help="Report export render duration", format=fmt)
+        await export_cache.put_bytes(key, payload)
+    return payload, key, tier
+
+
+def iter_chunks(payload: bytes, size: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    view = memoryview(payload)
+    for start in range(0, len(view), size):
+        yield bytes(view[start:start + size])
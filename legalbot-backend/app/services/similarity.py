@@ -0,0 +1,131 @@
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from app.core.config import SIMILARITY_BLOCK_ROWS
+
+METRICS = ("jaccard", "cosine")
+
+
+class Vocabulary:
+    """Interns lemmas to consecutive integer IDs, the column index of token matrices."""
+
+    def __init__(self):
+        self._ids = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def encode(self, tokens: Iterable[str]) -> np.ndarray:
+        ids = self._ids
+        return np.unique(np.fromiter((ids.setdefault(t, len(ids)) for t in tokens), dtype=np.int32))
+
+
+def token_matrix(documents: Iterable[Iterable[str]], vocabulary: Vocabulary = None):
+    """
+    A binary (documents x vocabulary) CSR matrix of each document's token set,
+    and the vocabulary it was encoded with. Pass the same vocabulary to encode
+    more documents into comparable columns.
+    """
+    vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+    rows = [vocabulary.encode(tokens) for tokens in documents]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+    indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), len(vocabulary))), vocabulary
+
+
+def _widen(matrix, columns: int):
+    # matrices encoded earlier with a shared vocabulary have fewer columns
+    return sparse.csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], columns))
+
+
+def _scores(intersection, size_a, size_b, metric: str) -> np.ndarray:
+    intersection = np.asarray(intersection, dtype=np.float64)
+    if metric == "jaccard":
+        denominator = size_a + size_b - intersection
+    elif metric == "cosine":
+        denominator = np.sqrt(size_a * size_b, dtype=np.float64)
+    else:
+        raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, intersection / denominator, 0.0)
+
+
+def similarity_matrix(a, b=None, metric: str = "jaccard") -> np.ndarray:
+    """
+    Dense pairwise similarity of the rows of two token matrices (a with itself
+    when b is None), from one sparse product. Two empty token sets score 1.0,
+    as in jaccard_similarity.
+    """
+    b = a if b is None else b
+    columns = max(a.shape[1], b.shape[1])
+    a, b = _widen(a, columns), _widen(b, columns)
+    size_a = a.getnnz(axis=1).astype(np.float64)[:, None]
+    size_b = b.getnnz(axis=1).astype(np.float64)[None, :]
+    scores = _scores((a @ b.T).toarray(), size_a, size_b, metric)
+    scores[(size_a == 0) & (size_b == 0)] = 1.0
+    return scores
+
+
+def similar_pairs(matrix, threshold: float, metric: str = "jaccard",
+                  block_rows: int = SIMILARITY_BLOCK_ROWS) -> Iterator[Tuple[int, int, float]]:
+    """
+    (i, j, score) for every pair of rows i < j scoring at least threshold
+    (> 0). Rows are multiplied block_rows at a time and only pairs sharing a
+    token are scored, so memory follows the overlap, not N x N. Rows without
+    tokens never match.
+    """
+    if threshold <= 0:
+        raise ValueError("threshold must be greater than 0")
+    sizes = matrix.getnnz(axis=1).astype(np.float64)
+    transposed = matrix.T.tocsr()
+    for start in range(0, matrix.shape[0], block_rows):
+        overlap = (matrix[start:start + block_rows] @ transposed).tocoo()
+        rows, cols = overlap.row.astype(np.int64) + start, overlap.col.astype(np.int64)
+        upper = cols > rows
+        rows, cols, shared = rows[upper], cols[upper], overlap.data[upper]
+        scores = _scores(shared, sizes[rows], sizes[cols], metric)
+        hits = scores >= threshold
+        yield from zip(rows[hits].tolist(), cols[hits].tolist(), scores[hits].tolist())
+
+
+def duplicate_groups(pairs: Iterable[Tuple[int, int, float]], count: int) -> List[List[int]]:
+    """Connected components (of two or more rows) of the graph formed by the matched pairs."""
+    pairs = list(pairs)
+    if not pairs:
+        return []
+    rows, cols = np.array([p[0] for p in pairs]), np.array([p[1] for p in pairs])
+    graph = sparse.coo_matrix((np.ones(len(pairs), dtype=np.int8), (rows, cols)), shape=(count, count))
+    _, labels = connected_components(graph, directed=False)
+    sizes = np.bincount(labels)
+    groups = {}
+    for row in np.flatnonzero(sizes[labels] > 1).tolist():
+        groups.setdefault(labels[row], []).append(row)
+    return sorted(groups.values(), key=lambda group: (-len(group), group[0]))
+
+
+def portfolio_similarity(tokens_by_id: dict, metric: str = "jaccard", threshold: float = 0.9,
+                         include_matrix: bool = False) -> dict:
+    """
+    Near-duplicate pairs and groups across many documents' stored token sets,
+    plus the full pairwise matrix when asked for.
+    """
+    ids = list(tokens_by_id)
+    matrix, vocabulary = token_matrix(tokens_by_id[i] for i in ids)
+    pairs = list(similar_pairs(matrix, threshold, metric))
+    pairs.sort(key=lambda p: -p[2])
+    result = {
+        'file_ids': ids,
+        'metric': metric,
+        'threshold': threshold,
+        'vocabulary_size': len(vocabulary),
+        'duplicates': [{'file_id_a': ids[i], 'file_id_b': ids[j], 'score': s} for i, j, s in pairs],
+        'groups': [[ids[i] for i in group] for group in duplicate_groups(pairs, len(ids))],
+    }
+    if include_matrix:
+        result['matrix'] = np.round(similarity_matrix(matrix, metric=metric), 6).tolist()
+    return result
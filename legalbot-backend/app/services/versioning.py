@@ -0,0 +1,131 @@
+import json
+from difflib import SequenceMatcher
+from typing import List
+
+from sqlalchemy import select
+
+from app.core import metrics
+from app.core.config import VERSION_CHAIN_MAX
+from app.db.database import database
+from app.db.models import files, document_segments
+from app.services.analysis_cache import analysis_cache, cache_key
+from app.services.analysis_store import load_segment_results
+from app.services.executor import run_nlp
+from app.services.nlp_processing import analyze_revision, extract_pages_parallel
+
+
+async def previous_version(file_id: str):
+    """ID of the file the given one revises, or None."""
+    return await database.fetch_val(select(files.c.previous_file_id).where(files.c.id == file_id))
+
+
+async def reusable_segments(file_id: str) -> dict:
+    """Stored segment results of the file itself (re-runs) and of the version it revises."""
+    file_ids = [file_id]
+    previous = await previous_version(file_id)
+    if previous:
+        file_ids.append(previous)
+    return await load_segment_results(file_ids)
+
+
+async def analyze_version(file_id: str, path: str, pages: List[str] = None) -> dict:
+    """
+    Analyze a stored file with analyze_revision in the worker pool, reusing
+    the segments its previous version already analyzed.
+    """
+    if pages is None:
+        pages = await extract_pages_parallel(path)
+    return await run_nlp(analyze_revision, pages, await reusable_segments(file_id))
+
+
+async def cached_version_analysis(file_id: str, path: str, content_hash: str):
+    """
+    (analysis, cache tier) for a stored file: analyze_version's result for
+    identical bytes from the analysis cache, or a fresh one that is then
+    cached. Revision results have their own cache key, so a cached
+    analyze_file result (no segments) is never stored as a version.
+    """
+    key = cache_key(content_hash, "revision")
+    analysis, tier = await analysis_cache.get(key)
+    if analysis is None:
+        analysis = metrics.record_analysis(await analyze_version(file_id, path))
+        await analysis_cache.put(key, analysis)
+    return analysis, tier
+
+
+async def version_chain(file_id: str) -> List[dict]:
+    """The file and the versions it revises, newest first (at most VERSION_CHAIN_MAX)."""
+    chain, seen = [], set()
+    columns = (files.c.id, files.c.original_name, files.c.sha256, files.c.size, files.c.previous_file_id)
+    while file_id and file_id not in seen and len(chain) < VERSION_CHAIN_MAX:
+        row = await database.fetch_one(select(*columns).where(files.c.id == file_id))
+        if row is None:
+            break
+        seen.add(file_id)
+        chain.append({column.name: row[column.name] for column in columns})
+        file_id = row["previous_file_id"]
+    return chain
+
+
+async def _segment_hashes(file_id: str) -> List[tuple]:
+    query = (
+        select(document_segments.c.segment_hash, document_segments.c.page)
+        .where(document_segments.c.file_id == file_id)
+        .order_by(document_segments.c.position)
+    )
+    return [(row["segment_hash"], row["page"]) for row in await database.fetch_all(query)]
+
+
+async def _segment_clauses(file_id: str, positions: List[int]) -> List[str]:
+    """Clauses of the given segments, in order; only these segments' results are decoded."""
+    if not positions:
+        return []
+    query = (
+        select(document_segments.c.analysis)
+        .where(document_segments.c.file_id == file_id)
+        .where(document_segments.c.position.in_(positions))
+        .order_by(document_segments.c.position)
+    )
+    rows = await database.fetch_all(query)
+    return list(dict.fromkeys(clause for row in rows for clause, _ in json.loads(row["analysis"])["clauses"]))
+
+
+async def version_diff(old_id: str, new_id: str):
+    """
+    What changed between two analyzed versions, from their segment hashes:
+    inserted, deleted and replaced runs of paragraphs with their pages, and
+    the clauses that appear only on one side. Only the segments that changed
+    have their stored results read. None when either file has no segments.
+    """
+    old, new = await _segment_hashes(old_id), await _segment_hashes(new_id)
+    if not old or not new:
+        return None
+    matcher = SequenceMatcher(None, [h for h, _ in old], [h for h, _ in new], autojunk=False)
+    changes, removed_positions, added_positions = [], [], []
+    unchanged = 0
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "equal":
+            unchanged += i2 - i1
+            continue
+        changes.append({
+            "op": op,
+            "old_segments": [i1, i2], "new_segments": [j1, j2],
+            "old_pages": sorted({page for _, page in old[i1:i2]}),
+            "new_pages": sorted({page for _, page in new[j1:j2]}),
+        })
+        removed_positions.extend(range(i1, i2))
+        added_positions.extend(range(j1, j2))
+    removed = await _segment_clauses(old_id, removed_positions)
+    added = await _segment_clauses(new_id, added_positions)
+    removed_keys, added_keys = {c.lower() for c in removed}, {c.lower() for c in added}
+    return {
+        "old_file_id": old_id,
+        "new_file_id": new_id,
+        "old_segments": len(old),
+        "new_segments": len(new),
+        "unchanged_segments": unchanged,
+        "similarity": matcher.ratio(),
+        "changes": changes,
+        "clauses_removed": [c for c in removed if c.lower() not in added_keys],
+        "clauses_added": [c for c in added if c.lower() not in removed_keys],
+    }
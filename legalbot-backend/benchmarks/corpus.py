@@ -0,0 +1,119 @@
+"""
+Synthetic, reproducible contracts for the benchmarks. A given (pages, seed)
+always produces the same text, so runs on different machines or commits
+measure the same input.
+"""
+import os
+import random
+from typing import Dict, List
+
+CHARS_PER_PAGE = 3000
+LINES_PER_PDF_PAGE = 50
+
+PARTIES = ["Acme Holdings Ltd", "Birch Property Inc", "Cedar Lane LLC", "Delta Estates Ltd"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+CLAUSES = [
+    "The Tenant shall pay a penalty of {amount} for each day of late payment.",
+    "Either party may give notice of termination with {days} days written notice.",
+    "The Landlord shall indemnify the Tenant against all claims arising from the premises.",
+    "All confidential information shall remain confidential for {years} years after termination.",
+    "The warranty on fixtures expires on {date}.",
+    "The limitation of liability shall not exceed {amount} in aggregate.",
+    "Neither party is liable for delays caused by force majeure events.",
+    "Liquidated damages of {amount} apply if the premises are not vacated by {date}.",
+    "The Tenant has an obligation to maintain the premises in good repair.",
+    "Notification of any defect must be given within {days} days of discovery.",
+    "{party} agrees to the terms set out in this agreement as of {date}.",
+    "Rent is payable monthly in advance on the first business day of each month.",
+    "The premises may be used for residential purposes only.",
+]
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    return template.format(
+        amount=f"${rng.randint(1, 500) * 100:,}",
+        days=rng.choice([7, 14, 30, 60, 90]),
+        years=rng.randint(1, 10),
+        date=f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(2020, 2030)}",
+        party=rng.choice(PARTIES),
+    )
+
+
+def contract_pages(pages: int, seed: int = 0) -> List[str]:
+    """Text for each page, about CHARS_PER_PAGE characters of clause-like sentences."""
+    rng = random.Random(f"{pages}:{seed}")
+    out = []
+    for number in range(1, pages + 1):
+        sentences = [f"Section {number}."]
+        size = 0
+        while size < CHARS_PER_PAGE:
+            sentence = _fill(rng.choice(CLAUSES), rng)
+            sentences.append(sentence)
+            size += len(sentence) + 1
+        out.append(" ".join(sentences) + "\n")
+    return out
+
+
+def revise(pages: List[str], rate: float = 0.1, seed: int = 1) -> List[str]:
+    """A revised copy: about `rate` of the sentences are replaced, for comparison benchmarks."""
+    rng = random.Random(seed)
+    revised = []
+    for page in pages:
+        sentences = page.rstrip("\n").split(". ")
+        for i in range(len(sentences)):
+            if rng.random() < rate:
+                sentences[i] = _fill(rng.choice(CLAUSES), rng).rstrip(".")
+        revised.append(". ".join(sentences) + "\n")
+    return revised
+
+
+def write_txt(pages: List[str], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("".join(pages))
+
+
+def write_docx(pages: List[str], path: str) -> None:
+    from docx import Document
+    from docx.enum.text import WD_BREAK
+
+    document = Document()
+    for page in pages:
+        paragraph = document.add_paragraph(page.strip())
+        paragraph.add_run().add_break(WD_BREAK.PAGE)
+    document.save(path)
+
+
+def write_pdf(pages: List[str], path: str) -> None:
+    import fitz  # PyMuPDF
+    import textwrap
+
+    with fitz.open() as document:
+        for page_text in pages:
+            page = document.new_page()
+            lines = textwrap.wrap(page_text, 95)
+            # Text that does not fit on one physical page spills onto extra pages
+            for start in range(0, len(lines), LINES_PER_PDF_PAGE):
+                if start:
+                    page = document.new_page()
+                page.insert_text((40, 50), "\n".join(lines[start:start + LINES_PER_PDF_PAGE]), fontsize=8)
+        document.save(path)
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+
+def build_corpus(directory: str, sizes: List[int], formats: List[str], seed: int = 0) -> Dict[tuple, str]:
+    """Write one contract per (pages, format) and its revision; returns {(pages, fmt, variant): path}."""
+    os.makedirs(directory, exist_ok=True)
+    corpus = {}
+    for pages in sizes:
+        original = contract_pages(pages, seed)
+        variants = {"original": original, "revised": revise(original, seed=seed + 1)}
+        for fmt in formats:
+            for variant, text in variants.items():
+                path = os.path.join(directory, f"contract-{pages}p-s{seed}-{variant}.{fmt}")
+                if not os.path.exists(path):
+                    WRITERS[fmt](text, path)
+                corpus[(pages, fmt, variant)] = path
+    return corpus
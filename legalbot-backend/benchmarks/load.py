@@ -0,0 +1,138 @@
+"""
+End-to-end load run against the FastAPI app in-process. Each simulated
+client uploads an owner/tenant pair, queues the analysis, polls until it
+finishes, fetches the results and compares the pair by ID. The database is
+a throwaway SQLite file unless a DATABASE_URL is given.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.stages import peak_rss_mb, percentile
+
+POLL_INTERVAL = 0.1
+
+
+def _sync_url(url: str) -> str:
+    return url.replace("+asyncpg", "").replace("+aiosqlite", "")
+
+
+def _latency_stats(latencies) -> dict:
+    return {
+        "requests": len(latencies),
+        "p50_s": round(percentile(latencies, 50), 6),
+        "p99_s": round(percentile(latencies, 99), 6),
+        "max_s": round(max(latencies), 6) if latencies else 0.0,
+    }
+
+
+async def _client(http, owner_path: str, tenant_path: str, timings: dict, errors: list, job_timeout: float):
+    async def timed(name, method, url, **kwargs):
+        start = time.perf_counter()
+        response = await http.request(method, url, **kwargs)
+        timings[name].append(time.perf_counter() - start)
+        return response
+
+    with open(owner_path, "rb") as owner, open(tenant_path, "rb") as tenant:
+        files = {
+            "owner_file": (os.path.basename(owner_path), owner.read()),
+            "tenant_file": (os.path.basename(tenant_path), tenant.read()),
+        }
+    response = await timed("upload_agreements", "POST", "/api/upload/agreements", files=files)
+    if response.status_code != 200:
+        errors.append(f"upload: {response.status_code}")
+        return
+    upload = response.json()
+
+    started = time.perf_counter()
+    while True:
+        response = await timed("process_start", "POST", "/api/process/start", json={"uploadId": upload["uploadId"]})
+        if response.status_code != 503:
+            break
+        timings["rejected_503"].append(0.0)
+        await asyncio.sleep(POLL_INTERVAL)
+    if response.status_code != 200:
+        errors.append(f"process/start: {response.status_code}")
+        return
+    process_id = response.json()["processId"]
+
+    status = None
+    while time.perf_counter() - started < job_timeout:
+        response = await timed("process_status", "GET", f"/api/process/status/{process_id}")
+        status = response.json().get("status")
+        if status in ("completed", "failed"):
+            break
+        await asyncio.sleep(POLL_INTERVAL)
+    timings["job_end_to_end"].append(time.perf_counter() - started)
+    if status != "completed":
+        errors.append(f"job {process_id}: {status}")
+        return
+
+    await timed("results", "GET", f"/api/results/{process_id}")
+    response = await timed("compare_by_id", "POST", "/api/compare/by-id", json={
+        "upload_id_a": upload["ownerFileId"], "upload_id_b": upload["tenantFileId"],
+    })
+    if response.status_code != 200:
+        errors.append(f"compare/by-id: {response.status_code}")
+
+
+async def _run(owner_path: str, tenant_path: str, clients: int, concurrency: int, job_timeout: float) -> dict:
+    import httpx
+    from app.main import app
+
+    timings = defaultdict(list)
+    errors = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(http):
+        async with semaphore:
+            await _client(http, owner_path, tenant_path, timings, errors, job_timeout)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            started = time.perf_counter()
+            await asyncio.gather(*(limited(http) for _ in range(clients)))
+            elapsed = time.perf_counter() - started
+
+    completed = len(timings["job_end_to_end"]) - sum(1 for e in errors if e.startswith("job "))
+    return {
+        "clients": clients,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "jobs_completed": completed,
+        "jobs_per_s": round(completed / elapsed, 3) if elapsed else None,
+        "rejected_503": len(timings.pop("rejected_503", [])),
+        "endpoints": {name: _latency_stats(values) for name, values in timings.items()},
+        "errors": errors,
+        "api_peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_load(owner_path: str, tenant_path: str, clients: int = 20, concurrency: int = 4,
+             database_url: str = None, job_timeout: float = 600.0) -> dict:
+    """
+    Must run before anything imports app.*: the app reads its settings (and
+    binds the database) at import time.
+    """
+    import sqlalchemy
+
+    work_dir = tempfile.mkdtemp(prefix="legalbot-load-")
+    database_url = database_url or f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("NLP_WARM_ON_STARTUP", "0")
+    os.environ.setdefault("ANALYSIS_CACHE_DIR", os.path.join(work_dir, "cache"))
+    owner_path, tenant_path = os.path.abspath(owner_path), os.path.abspath(tenant_path)
+    # uploads/ is relative to the working directory
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        from app.db.models import metadata
+        metadata.create_all(sqlalchemy.create_engine(_sync_url(database_url)))
+        result = asyncio.run(_run(owner_path, tenant_path, clients, concurrency, job_timeout))
+    finally:
+        os.chdir(previous_dir)
+    result["database"] = database_url.split(":", 1)[0]
+    return result
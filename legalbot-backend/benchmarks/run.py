@@ -0,0 +1,129 @@
+"""
+Benchmark the NLP/comparison pipeline and save the results as JSON.
+
+    python -m benchmarks.run                        # stages on 1/10/100/500 pages, then a load run
+    python -m benchmarks.run --sizes 1 10 --formats txt --skip-load
+    python -m benchmarks.run --skip-stages --clients 50 --concurrency 8
+    python -m benchmarks.run --sizes 10 --baseline benchmarks/results/<earlier>.json
+
+Run from legalbot-backend/. Results go to benchmarks/results/<timestamp>.json
+(or --output) together with the commit and machine they were measured on.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+
+from benchmarks.corpus import build_corpus
+from benchmarks.stages import STAGES, run_stage
+
+DEFAULT_SIZES = [1, 10, 100, 500]
+DEFAULT_FORMATS = ["pdf", "docx", "txt"]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _environment() -> dict:
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "nlp_model": os.getenv("NLP_MODEL", "en_core_web_sm"),
+    }
+
+
+def compare_to_baseline(stages: list, baseline_path: str) -> list:
+    """p50 of each measured stage relative to the same stage/pages/format in an earlier run."""
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = {
+            (r["stage"], r["pages"], r["format"]): r for r in json.load(fh).get("stages", []) if "p50_s" in r
+        }
+    changes = []
+    for result in stages:
+        before = baseline.get((result["stage"], result["pages"], result["format"]))
+        if before and "p50_s" in result and before["p50_s"]:
+            changes.append({
+                "stage": result["stage"], "pages": result["pages"], "format": result["format"],
+                "p50_before_s": before["p50_s"], "p50_after_s": result["p50_s"],
+                "p50_ratio": round(result["p50_s"] / before["p50_s"], 3),
+            })
+    return changes
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="document sizes in pages")
+    parser.add_argument("--formats", nargs="+", default=DEFAULT_FORMATS, choices=DEFAULT_FORMATS)
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--repeats", type=int, default=5, help="measured runs per stage")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured runs per stage")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic corpus seed")
+    parser.add_argument("--corpus-dir", default=os.path.join(os.path.dirname(__file__), ".corpus"))
+    parser.add_argument("--skip-stages", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--load-pages", type=int, default=10, help="pages per document in the load run")
+    parser.add_argument("--load-format", default="docx", choices=["pdf", "docx"])
+    parser.add_argument("--clients", type=int, default=20, help="simulated upload/analyze/compare flows")
+    parser.add_argument("--concurrency", type=int, default=4, help="flows in flight at once")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--output", default=None, help="JSON file to write")
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare stage p50s against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": _environment(), "args": vars(args)}
+
+    sizes = sorted(set(args.sizes + ([] if args.skip_load else [args.load_pages])))
+    formats = sorted(set(args.formats + ([] if args.skip_load else [args.load_format])))
+    corpus = build_corpus(args.corpus_dir, sizes, formats, seed=args.seed)
+
+    if not args.skip_stages:
+        stages = []
+        for pages in args.sizes:
+            for fmt in args.formats:
+                original, revised = corpus[(pages, fmt, "original")], corpus[(pages, fmt, "revised")]
+                for stage in args.stages:
+                    result = run_stage(stage, original, revised, pages, args.repeats, args.warmup)
+                    result.update(stage=stage, pages=pages, format=fmt)
+                    stages.append(result)
+                    print(json.dumps(result), flush=True)
+        report["stages"] = stages
+        if args.baseline:
+            report["baseline"] = {"path": args.baseline, "changes": compare_to_baseline(stages, args.baseline)}
+            for change in report["baseline"]["changes"]:
+                print(json.dumps(change), flush=True)
+
+    if not args.skip_load:
+        # Imported here: the load run configures the app through the environment before importing it
+        from benchmarks.load import run_load
+        report["load"] = run_load(
+            corpus[(args.load_pages, args.load_format, "original")],
+            corpus[(args.load_pages, args.load_format, "revised")],
+            clients=args.clients,
+            concurrency=args.concurrency,
+            database_url=args.database_url,
+        )
+        print(json.dumps(report["load"]), flush=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Per-stage micro benchmarks. Each (stage, document) measurement runs in a
+fresh spawned process so its peak RSS is not inflated by earlier stages.
+"""
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+STAGES = ("extract", "parse", "analyze_risk", "analyze_text", "compare_documents", "process_document")
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1)
+
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), math.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, pages: int, chars: int) -> dict:
+    total = sum(latencies)
+    return {
+        "runs": len(latencies),
+        "p50_s": round(percentile(latencies, 50), 6),
+        "p99_s": round(percentile(latencies, 99), 6),
+        "mean_s": round(total / len(latencies), 6),
+        "pages_per_s": round(pages * len(latencies) / total, 2) if total else None,
+        "chars_per_s": round(chars * len(latencies) / total) if total else None,
+    }
+
+
+def _upload(path: str):
+    from fastapi import UploadFile
+    return UploadFile(file=open(path, "rb"), filename=os.path.basename(path))
+
+
+def _prepare(stage: str, path: str, revised_path: str):
+    """Build the zero-argument callable for a stage; setup cost is not measured."""
+    from app.services import nlp_processing as nlp
+
+    if stage == "extract":
+        return lambda: nlp.extract_text(path)
+    text = nlp.extract_text(path)
+    if stage == "parse":
+        return lambda: nlp.parse_text(text)
+    if stage == "analyze_risk":
+        return lambda: nlp.analyze_risk(text)
+    if stage == "analyze_text":
+        return lambda: nlp.analyze_text(text)
+    if stage == "compare_documents":
+        doc_a = nlp.analyze_text(text)
+        doc_b = nlp.analyze_text(nlp.extract_text(revised_path))
+        return lambda: nlp.compare_documents(doc_a, doc_b)
+    if stage == "process_document":
+        def run():
+            upload = _upload(path)
+            try:
+                return asyncio.run(nlp.process_document(upload))
+            finally:
+                upload.file.close()
+        return run
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def measure_stage(stage: str, path: str, revised_path: str, pages: int, repeats: int, warmup: int) -> dict:
+    """Runs inside a fresh worker process."""
+    from app.services.model_registry import get_nlp
+    from app.services.nlp_processing import extract_text
+
+    get_nlp()  # model load is not part of any stage
+    chars = len(extract_text(path))
+    func = _prepare(stage, path, revised_path)
+    for _ in range(warmup):
+        func()
+    baseline = peak_rss_mb()
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    result = summarize(latencies, pages, chars)
+    result.update(chars=chars, baseline_rss_mb=baseline, peak_rss_mb=peak_rss_mb())
+    return result
+
+
+def _child_env():
+    # In-process NLP and no analysis cache, so every run really does the work
+    os.environ["NLP_WORKERS"] = "0"
+    os.environ["ANALYSIS_CACHE_MEMORY_MB"] = "0"
+    os.environ["ANALYSIS_CACHE_DISK_MB"] = "0"
+    os.environ["METRICS_ENABLED"] = "0"
+
+
+def run_stage(stage: str, path: str, revised_path: str, pages: int, repeats: int = 5, warmup: int = 1) -> dict:
+    """Measure one stage on one document in its own process; errors are reported, not raised."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_child_env) as pool:
+        try:
+            return pool.submit(measure_stage, stage, path, revised_path, pages, repeats, warmup).result()
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
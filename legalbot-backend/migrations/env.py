@@ -0,0 +1,38 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.core.config import DATABASE_URL
+from app.db.models import metadata
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+
+def sync_url(url: str) -> str:
+    """Migrations run on a sync driver: asyncpg -> psycopg2, aiosqlite -> sqlite3."""
+    return url.replace("asyncpg", "psycopg2").replace("+aiosqlite", "")
+
+
+def run_migrations_offline() -> None:
+    context.configure(url=sync_url(DATABASE_URL), target_metadata=metadata, literal_binds=True,
+                      render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    engine = create_engine(sync_url(DATABASE_URL), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        # batch mode lets ALTER TABLE work on SQLite as well
+        context.configure(connection=connection, target_metadata=metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
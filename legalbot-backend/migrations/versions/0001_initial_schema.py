@@ -0,0 +1,44 @@
+"""Initial schema, as created by init_db.py before migrations existed
+
+Databases created that way should be marked as migrated with
+`alembic stamp 0001` before running `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+STATUS = sa.Enum("pending", "processing", "completed", "failed", name="processingstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "files",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("original_name", sa.String(), nullable=False),
+    )
+    op.create_table(
+        "process_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.Column("status", STATUS, nullable=False),
+        sa.Column("extracted_text", sa.Text(), nullable=True),
+        sa.Column("extracted_clauses", sa.Text(), nullable=True),
+        sa.Column("risk_level", sa.String(10), nullable=True),
+        sa.Column("keywords", sa.Text(), nullable=True),
+        sa.Column("summary", sa.Text(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("process_jobs")
+    op.drop_table("files")
+    STATUS.drop(op.get_bind(), checkfirst=True)
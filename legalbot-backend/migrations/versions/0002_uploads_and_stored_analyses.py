@@ -0,0 +1,60 @@
+"""Uploads, queued job progress, file hashes and stored analyses
+
+Adds the uploads table, the content hash and size of each file, the upload,
+stage and result of queued jobs, the per-file analysis artifact and the
+clause signatures behind clause search.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("files") as batch:
+        batch.add_column(sa.Column("sha256", sa.String(64), nullable=True))
+        batch.add_column(sa.Column("size", sa.Integer(), nullable=True))
+    with op.batch_alter_table("process_jobs") as batch:
+        batch.add_column(sa.Column("upload_id", sa.String(), nullable=True))
+        batch.add_column(sa.Column("stage", sa.String(20), nullable=True))
+        batch.add_column(sa.Column("result", sa.Text(), nullable=True))
+
+    op.create_table(
+        "uploads",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("owner_file_id", sa.String(), nullable=False),
+        sa.Column("tenant_file_id", sa.String(), nullable=False),
+    )
+    op.create_table(
+        "document_analyses",
+        sa.Column("file_id", sa.String(), primary_key=True),
+        sa.Column("process_id", sa.String(), nullable=False),
+        sa.Column("analysis", sa.Text(), nullable=False),
+    )
+    op.create_table(
+        "clause_signatures",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.Column("clause", sa.Text(), nullable=False),
+        sa.Column("signature", sa.LargeBinary(), nullable=False),
+    )
+    op.create_index("ix_clause_signatures_file_id", "clause_signatures", ["file_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_clause_signatures_file_id", table_name="clause_signatures")
+    for table in ("clause_signatures", "document_analyses", "uploads"):
+        op.drop_table(table)
+    with op.batch_alter_table("process_jobs") as batch:
+        for column in ("result", "stage", "upload_id"):
+            batch.drop_column(column)
+    with op.batch_alter_table("files") as batch:
+        batch.drop_column("size")
+        batch.drop_column("sha256")
@@ -0,0 +1,84 @@
+"""Normalized, indexed result storage
+
+Moves extracted text out of process_jobs into document_texts, adds clause,
+entity and date tables, indexes files.filename and adds a covering index for
+status polling.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_files_filename", "files", ["filename"])
+    op.create_index("ix_process_jobs_status_lookup", "process_jobs", ["id", "status", "stage"])
+    op.create_index("ix_process_jobs_upload_id", "process_jobs", ["upload_id"])
+
+    op.create_table(
+        "document_texts",
+        sa.Column("file_id", sa.String(), primary_key=True),
+        sa.Column("process_id", sa.String(), nullable=False),
+        sa.Column("chars", sa.Integer(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+    )
+    # keep the text of the latest job per file
+    op.execute(
+        "INSERT INTO document_texts (file_id, process_id, chars, text) "
+        "SELECT p.file_id, p.id, length(p.extracted_text), p.extracted_text FROM process_jobs p "
+        "WHERE p.extracted_text IS NOT NULL AND p.id = ("
+        "SELECT MAX(p2.id) FROM process_jobs p2 WHERE p2.file_id = p.file_id AND p2.extracted_text IS NOT NULL)"
+    )
+    with op.batch_alter_table("process_jobs") as batch:
+        batch.drop_column("extracted_text")
+
+    op.create_table(
+        "analysis_clauses",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("page", sa.Integer(), nullable=True),
+        sa.Column("clause", sa.Text(), nullable=False),
+    )
+    op.create_index("ix_analysis_clauses_file_position", "analysis_clauses", ["file_id", "position"])
+    op.create_table(
+        "analysis_entities",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("occurrences", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_analysis_entities_file_entity", "analysis_entities", ["file_id", "entity"])
+    op.create_index("ix_analysis_entities_entity", "analysis_entities", ["entity"])
+    op.create_table(
+        "analysis_dates",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.Column("kind", sa.String(10), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.Column("detail", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_analysis_dates_file_kind", "analysis_dates", ["file_id", "kind"])
+    op.create_index("ix_analysis_dates_value", "analysis_dates", ["value"])
+
+
+def downgrade() -> None:
+    for table in ("analysis_dates", "analysis_entities", "analysis_clauses"):
+        op.drop_table(table)
+    with op.batch_alter_table("process_jobs") as batch:
+        batch.add_column(sa.Column("extracted_text", sa.Text(), nullable=True))
+    op.execute(
+        "UPDATE process_jobs SET extracted_text = "
+        "(SELECT t.text FROM document_texts t WHERE t.process_id = process_jobs.id)"
+    )
+    op.drop_table("document_texts")
+    op.drop_index("ix_process_jobs_upload_id", table_name="process_jobs")
+    op.drop_index("ix_process_jobs_status_lookup", table_name="process_jobs")
+    op.drop_index("ix_files_filename", table_name="files")
@@ -0,0 +1,42 @@
+"""Document versions and per-segment analysis results
+
+Links each file to the version it revises and stores the analysis of every
+paragraph segment, so a new version only re-analyzes what changed.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("files") as batch:
+        batch.add_column(sa.Column("previous_file_id", sa.String(), nullable=True))
+    op.create_index("ix_files_previous_file_id", "files", ["previous_file_id"])
+
+    op.create_table(
+        "document_segments",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("segment_hash", sa.String(64), nullable=False),
+        sa.Column("page", sa.Integer(), nullable=True),
+        sa.Column("chars", sa.Integer(), nullable=False),
+        sa.Column("pipeline", sa.String(), nullable=False),
+        sa.Column("analysis", sa.Text(), nullable=False),
+    )
+    op.create_index("ix_document_segments_file_position", "document_segments", ["file_id", "position"])
+
+
+def downgrade() -> None:
+    op.drop_table("document_segments")
+    op.drop_index("ix_files_previous_file_id", table_name="files")
+    with op.batch_alter_table("files") as batch:
+        batch.drop_column("previous_file_id")
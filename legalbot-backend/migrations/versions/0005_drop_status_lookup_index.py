@@ -0,0 +1,23 @@
+"""Drop the (id, status, stage) index on process_jobs
+
+Status polling looks jobs up by primary key, and both SQLite and Postgres
+answer it from the primary key index, so this index only cost writes.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_process_jobs_status_lookup", table_name="process_jobs")
+
+
+def downgrade() -> None:
+    op.create_index("ix_process_jobs_status_lookup", "process_jobs", ["id", "status", "stage"])
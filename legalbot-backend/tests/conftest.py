@@ -0,0 +1,61 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+import sqlalchemy
+
+# app.db.database binds its handle when imported; tests never need the Postgres default
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='legalbot-tests-')}/app.db")
+
+
+@pytest.fixture
+def run_db():
+    """Run an async test body against the app's database handle, on freshly created tables."""
+    from app.db.database import database
+    from app.db.models import metadata
+
+    engine = sqlalchemy.create_engine(str(database.url))
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    engine.dispose()
+
+    def run(body):
+        async def connected():
+            await database.connect()
+            try:
+                return await body()
+            finally:
+                await database.disconnect()
+        return asyncio.run(connected())
+
+    return run
+
+
+@pytest.fixture
+def blank_nlp(monkeypatch):
+    """
+    A blank English pipeline with sentence splitting and rule-based DATE/ORG
+    entities in place of NLP_MODEL, so merge logic is tested without the model.
+    """
+    import spacy
+    from app.services import nlp_processing
+
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([
+        {"label": "DATE", "pattern": [{"TEXT": {"REGEX": "^(January|March|June)$"}}, {"IS_DIGIT": True},
+                                      {"TEXT": ",", "OP": "?"}, {"IS_DIGIT": True}]},
+        {"label": "ORG", "pattern": [{"IS_TITLE": True}, {"LOWER": {"IN": ["ltd", "inc"]}}]},
+    ])
+
+    def noun_chunks(doclike):
+        label = doclike.doc.vocab.strings.add("NP")
+        for token in doclike:
+            if token.is_alpha and not token.is_stop:
+                yield token.i, token.i + 1, label
+
+    nlp.vocab.get_noun_chunks = noun_chunks
+    monkeypatch.setattr(nlp_processing, "get_nlp", lambda exclude=(): nlp)
+    return nlp
@@ -0,0 +1,65 @@
+import asyncio
+import os
+
+from app.services.analysis_cache import AnalysisCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_memory_tier_is_an_lru_bounded_by_bytes(tmp_path):
+    cache = AnalysisCache(str(tmp_path), memory_bytes=25, disk_bytes=0)
+
+    async def body():
+        for key in ("a", "b"):
+            await cache.put_bytes(key, b"x" * 10)
+        await cache.get_bytes("a")  # "b" is now the least recently used
+        await cache.put_bytes("c", b"x" * 10)
+        await cache.put_bytes("big", b"x" * 26)  # larger than the whole tier
+        return [(await cache.get_bytes(key))[1] for key in ("a", "b", "c", "big")]
+
+    assert run(body()) == ["memory", None, "memory", None]
+    assert cache._memory_size == 20
+
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    cache = AnalysisCache(str(tmp_path), memory_bytes=0, disk_bytes=25)
+
+    async def body():
+        for age, key in enumerate(("a", "b")):
+            await cache.put_bytes(key, b"x" * 10)
+            os.utime(cache._path(key), (1000 + age, 1000 + age))
+        await cache.get_bytes("a")  # touching "a" leaves "b" the oldest
+        await cache.put_bytes("c", b"x" * 10)
+        return [(await cache.get_bytes(key))[1] for key in ("a", "b", "c")]
+
+    assert run(body()) == ["disk", None, "disk"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.json", "c.json"]
+
+
+def test_disk_hits_are_promoted_to_memory(tmp_path):
+    cache = AnalysisCache(str(tmp_path), memory_bytes=1 << 20, disk_bytes=1 << 20)
+    fresh = AnalysisCache(str(tmp_path), memory_bytes=1 << 20, disk_bytes=1 << 20)
+
+    async def body():
+        await cache.put("k", {"clauses": ["a"]})
+        # a new process (empty memory tier) finds it on disk, then in memory
+        return await fresh.get("k"), await fresh.get("k"), await fresh.get("missing")
+
+    (first, first_tier), (again, again_tier), (missing, missing_tier) = run(body())
+    assert first == again == {"clauses": ["a"]}
+    assert (first_tier, again_tier) == ("disk", "memory")
+    assert missing is None and missing_tier is None
+
+
+def test_a_file_evicted_during_a_read_is_a_miss(tmp_path, monkeypatch):
+    cache = AnalysisCache(str(tmp_path), memory_bytes=0, disk_bytes=1 << 20)
+    run(cache.put_bytes("k", b"payload"))
+
+    def utime_after_eviction(path, *args):
+        os.unlink(path)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", utime_after_eviction)
+    assert run(cache.get_bytes("k")) == (None, None)
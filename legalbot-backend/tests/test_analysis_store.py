@@ -0,0 +1,115 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.api.endpoints.results import get_result_section
+from app.db.database import database
+from app.db.models import (
+    ProcessingStatus, analysis_clauses, analysis_dates, analysis_entities, document_texts, process_jobs, uploads
+)
+from app.services.analysis_store import count_analyses, load_analysis, load_tokens, save_analysis
+
+
+def _analysis(clauses=30):
+    clause_list = [f"Clause {i} sets a notice period." for i in range(clauses)]
+    return {
+        'clauses': clause_list,
+        'clause_pages': {clause: 1 + i // 10 for i, clause in enumerate(clause_list)},
+        'risk': {'level': 'Low', 'score': 10},
+        'keywords': ['notice'],
+        'summary': 'Notice periods.',
+        'entities': ['Acme Ltd', 'Bob', 'Acme Ltd'],
+        'dates': ['2024-01-05'],
+        'durations': [{'value': 30, 'unit': 'days', 'text': '30 days'}],
+        'deadlines': [],
+        'tokens': ['notice', 'period'],
+        'units': clause_list,
+        'text': ' '.join(clause_list),
+    }
+
+
+async def _count(table, file_id):
+    return await database.fetch_val(select(func.count()).select_from(table).where(table.c.file_id == file_id))
+
+
+def test_save_analysis_replaces_the_rows_of_a_file(run_db):
+    async def body():
+        await save_analysis("f1", "p1", _analysis(30))
+        await save_analysis("f2", "p2", _analysis(5))
+        await save_analysis("f1", "p3", _analysis(12))
+        counts = {table.name: await _count(table, "f1")
+                  for table in (analysis_clauses, analysis_entities, analysis_dates, document_texts)}
+        entities = await database.fetch_all(
+            select(analysis_entities.c.entity, analysis_entities.c.occurrences).where(analysis_entities.c.file_id == "f1")
+        )
+        return counts, sorted((r["entity"], r["occurrences"]) for r in entities), await load_analysis("f1")
+
+    counts, entities, artifact = run_db(body)
+    assert counts == {"analysis_clauses": 12, "analysis_entities": 2, "analysis_dates": 2, "document_texts": 1}
+    assert entities == [("Acme Ltd", 2), ("Bob", 1)]
+    assert len(artifact['clauses']) == 12 and 'text' not in artifact
+    assert artifact['entities'] == ['Acme Ltd', 'Bob']
+
+
+def test_result_sections_are_paged_per_role(run_db):
+    async def body():
+        await save_analysis("owner", "p1", _analysis(30))
+        await save_analysis("tenant", "p1", _analysis(3))
+        await database.execute(uploads.insert().values(id="u1", owner_file_id="owner", tenant_file_id="tenant"))
+        await database.execute(process_jobs.insert().values(
+            id="p1", file_id="owner", upload_id="u1", status=ProcessingStatus.completed
+        ))
+        page = await get_result_section("p1", "clauses", role="owner", offset=10, limit=5)
+        tenant = await get_result_section("p1", "dates", role="tenant", offset=0, limit=50)
+        with pytest.raises(HTTPException) as unknown:
+            await get_result_section("p1", "keywords", role="owner", offset=0, limit=5)
+        with pytest.raises(HTTPException) as missing:
+            await get_result_section("nope", "clauses", role="owner", offset=0, limit=5)
+        return page, tenant, unknown.value.status_code, missing.value.status_code
+
+    page, tenant, unknown, missing = run_db(body)
+    assert (page["total"], page["offset"], page["limit"]) == (30, 10, 5)
+    assert [item["position"] for item in page["items"]] == [10, 11, 12, 13, 14]
+    assert page["items"][0] == {"position": 10, "page": 2, "clause": "Clause 10 sets a notice period."}
+    assert tenant["file_id"] == "tenant"
+    assert [(item["kind"], item["value"]) for item in tenant["items"]] == [("date", "2024-01-05"), ("duration", "30 days")]
+    assert tenant["items"][1]["detail"]["unit"] == "days"
+    assert (unknown, missing) == (404, 404)
+
+
+def test_load_tokens_reads_only_the_token_lists(run_db):
+    async def body():
+        for file_id, clauses in (("f1", 3), ("f2", 1)):
+            await save_analysis(file_id, "p1", _analysis(clauses))
+        return await count_analyses(), await count_analyses(["f1", "nope"]), await load_tokens(), await load_tokens(["f2"])
+
+    total, some, tokens, selected = run_db(body)
+    assert (total, some) == (2, 1)
+    assert tokens == {"f1": ["notice", "period"], "f2": ["notice", "period"]}
+    assert selected == {"f2": ["notice", "period"]}
+
+
+def test_clauses_are_indexed_only_after_the_transaction_commits(run_db, monkeypatch):
+    from app.services import analysis_store
+    from app.services.clause_index import ClauseIndex
+
+    index = ClauseIndex()
+    monkeypatch.setattr(analysis_store, "clause_index", index)
+
+    async def body():
+        await index.search("notice")  # loaded, so later documents go straight into memory
+        with pytest.raises(RuntimeError):
+            async with database.transaction():
+                await save_analysis("f1", "p1", _analysis(3))
+                raise RuntimeError("job failed")
+        rolled_back = (list(index._meta), await load_analysis("f1"))
+        async with database.transaction():
+            index_clauses = await save_analysis("f1", "p1", _analysis(3))
+            pending = list(index._meta)
+        index_clauses()
+        return rolled_back, pending, {file_id for file_id, _ in index._meta}
+
+    (meta, artifact), pending, indexed = run_db(body)
+    assert meta == [] and artifact is None
+    assert pending == []
+    assert indexed == {"f1"}
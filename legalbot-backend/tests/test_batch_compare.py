@@ -0,0 +1,83 @@
+import hashlib
+import importlib
+import io
+import json
+
+from starlette.datastructures import UploadFile
+
+from app.services import batch_compare
+from app.services.analysis_cache import AnalysisCache, cache_key
+from app.services.analysis_store import save_analysis
+
+# the endpoints package re-exports each module's router under the module's name
+comparison = importlib.import_module("app.api.endpoints.comparison")
+
+
+def _analysis(text):
+    return {'clauses': [text], 'tokens': text.lower().split(), 'units': [text], 'risk': {'level': 'Low', 'score': 0}}
+
+
+def _compare(reference, analysis, mode):
+    shared = len(set(reference['tokens']) & set(analysis['tokens']))
+    return {
+        'similarity_percent': shared * 10, 'adjusted_similarity_percent': shared * 10, 'can_do_agreement': shared > 5,
+        'missing_clauses_in_b': [], 'missing_clauses_in_a': [], 'risk_b': analysis['risk'],
+        'diagnostics': {'mode': mode}, 'aligned_clauses': [{'status': 'matched'}],
+    }
+
+
+def test_batch_streams_one_line_per_candidate_then_a_ranking(run_db, monkeypatch, tmp_path):
+    async def run_nlp(func, *args):
+        return func(*args)
+
+    analyzed = []
+
+    def analyze_files(paths, batch_size):
+        texts = [open(path).read() for path in paths]
+        analyzed.extend(texts)
+        if "unreadable" in texts:
+            raise ValueError("cannot read file")
+        return [_analysis(text) for text in texts]
+
+    cache = AnalysisCache(str(tmp_path), 1 << 20, 0)
+    monkeypatch.setattr(batch_compare, "analysis_cache", cache)
+    monkeypatch.setattr(batch_compare, "run_nlp", run_nlp)
+    monkeypatch.setattr(batch_compare, "analyze_files", analyze_files)
+    monkeypatch.setattr(batch_compare, "compare_documents", _compare)
+    monkeypatch.setattr(batch_compare, "COMPARE_BATCH_SIZE", 1)
+
+    candidates = {
+        "close.docx": "the tenant shall pay rent monthly and give notice",
+        "far.docx": "the landlord repairs",
+        "cached.docx": "the tenant shall pay rent monthly",
+        "broken.docx": "unreadable",
+    }
+
+    async def body():
+        await save_analysis("ref", "p1", _analysis("the tenant shall pay rent monthly and give notice"))
+        cached = candidates["cached.docx"].encode()
+        await cache.put(cache_key(hashlib.sha256(cached).hexdigest()), _analysis(candidates["cached.docx"]))
+        uploads = [UploadFile(io.BytesIO(text.encode()), filename=name) for name, text in candidates.items()]
+        response = await comparison.compare_batch(candidates=uploads, reference_file=None, reference_id="ref",
+                                                  mode="clauses")
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        return response.media_type, body
+
+    media_type, body = run_db(body)
+    assert media_type == "application/x-ndjson"
+    assert "the tenant shall pay rent monthly" not in analyzed  # answered from the analysis cache
+    assert body.endswith(b"\n")
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+
+    results = {line["filename"]: line for line in lines if line["type"] == "result"}
+    assert set(results) == {"close.docx", "far.docx", "cached.docx"}
+    for line in results.values():
+        assert set(line) == {"type", "filename", *batch_compare.RESULT_FIELDS}
+    assert [line for line in lines if line["type"] == "error"] == [
+        {"type": "error", "filename": "broken.docx", "detail": "cannot read file"}
+    ]
+
+    summary = lines[-1]
+    assert summary["type"] == "summary" and summary["count"] == 3
+    assert [r["filename"] for r in summary["ranking"]] == ["close.docx", "cached.docx", "far.docx"]
+    assert set(summary["ranking"][0]) == {"filename", "adjusted_similarity_percent", "similarity_percent"}
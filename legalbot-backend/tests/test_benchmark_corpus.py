@@ -0,0 +1,24 @@
+from benchmarks.corpus import CHARS_PER_PAGE, contract_pages, revise
+from benchmarks.stages import percentile
+
+
+def test_contract_pages_are_reproducible():
+    pages = contract_pages(3, seed=7)
+    assert pages == contract_pages(3, seed=7)
+    assert pages != contract_pages(3, seed=8)
+    assert len(pages) == 3
+    assert all(len(page) >= CHARS_PER_PAGE for page in pages)
+
+
+def test_revise_changes_some_sentences():
+    pages = contract_pages(5)
+    revised = revise(pages, rate=0.2)
+    assert len(revised) == len(pages)
+    assert revised != pages
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
@@ -0,0 +1,82 @@
+from app.services.nlp_processing import _page_starts, analyze_chunks, sentence_chunks
+
+
+def _pages():
+    sentence = "The tenant shall give notice of termination within thirty days. "
+    return [f"Section {n}. " + sentence * 40 for n in range(1, 30)]
+
+
+def test_chunks_tile_the_text_and_track_pages():
+    pages = _pages()
+    text = "".join(pages)
+    page_starts = []
+    expected_start = 0
+    for chunk, (offset, own_start, own_end) in sentence_chunks(pages, page_starts, chunk_chars=5000, overlap_chars=300):
+        assert own_start == expected_start
+        assert text[offset:offset + len(chunk)] == chunk
+        assert own_end - own_start <= 5000
+        expected_start = own_end
+    assert expected_start == len(text)
+    assert page_starts == _page_starts(pages)
+
+
+def test_chunks_cut_at_sentence_boundaries_with_overlap():
+    pages = _pages()
+    text = "".join(pages)
+    chunks = list(sentence_chunks(pages, [], chunk_chars=5000, overlap_chars=300))
+    assert len(chunks) > 1
+    for chunk, (offset, own_start, own_end) in chunks[:-1]:
+        assert text[own_end - 2:own_end] == ". "
+        # right-hand context runs past the owned range
+        assert offset + len(chunk) > own_end
+
+
+def test_short_text_is_a_single_chunk():
+    chunks = list(sentence_chunks(["One clause. Two clauses."], []))
+    assert chunks == [("One clause. Two clauses.", (0, 0, 24))]
+
+
+def _contract_pages():
+    filler = "The parties agree on the following terms. " * 20
+    return [
+        "Section 1. The tenant shall give notice of termination. " + filler,
+        "Section 2. The landlord carries the liability for Acme Ltd repairs. " + filler
+        + "The tenant shall give notice of termination. ",
+        "Section 3. A penalty applies from January 5, 2024 onwards. " + filler + "Acme Ltd keeps the warranty. ",
+    ]
+
+
+def test_chunked_analysis_matches_a_single_chunk(blank_nlp):
+    pages = _contract_pages()
+    whole = analyze_chunks(pages, chunk_chars=10 ** 6, profile=None)
+    chunked = analyze_chunks(pages, chunk_chars=400, overlap_chars=150, profile=None)
+    assert whole['chunks'] == 1 and chunked['chunks'] > 3
+    for field in ('clauses', 'clause_pages', 'entities', 'dates', 'units', 'tokens', 'risk'):
+        assert chunked[field] == whole[field], field
+
+
+def test_chunk_merge_dedupes_clauses_and_maps_pages(blank_nlp):
+    chunked = analyze_chunks(_contract_pages(), chunk_chars=400, overlap_chars=150, profile=None)
+    # the repeated notice clause, also seen again in each overlap, is kept once, on its first page
+    assert chunked['clauses'] == [
+        "The tenant shall give notice of termination.",
+        "The landlord carries the liability for Acme Ltd repairs.",
+        "A penalty applies from January 5, 2024 onwards.",
+        "Acme Ltd keeps the warranty.",
+    ]
+    assert [chunked['clause_pages'][clause] for clause in chunked['clauses']] == [1, 2, 3, 3]
+    assert chunked['entities'] == ["Acme Ltd", "January 5, 2024"]
+    assert chunked['dates'] == ["2024-01-05"]
+
+
+def test_clauses_keep_their_page_numbers(blank_nlp):
+    from app.services.nlp_processing import analyze_pages
+
+    pages = ["Cover page without terms.\n", "The tenant shall give notice of termination.\n",
+             "Rent is due monthly.\n", "A penalty applies to late rent. The warranty ends after a year.\n"]
+    analysis = analyze_pages(pages, with_risk=False, profile=None)
+    assert analysis['clause_pages'] == {
+        "The tenant shall give notice of termination.": 2,
+        "A penalty applies to late rent.": 4,
+        "The warranty ends after a year.": 4,
+    }
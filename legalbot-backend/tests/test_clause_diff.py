@@ -0,0 +1,31 @@
+from app.services.clause_diff import diff_texts, split_units
+
+
+def test_split_units_on_sentences_and_blank_lines():
+    text = "First clause applies. Second clause; third part\n\nHeading only"
+    assert split_units(text) == ["First clause applies.", "Second clause;", "third part", "Heading only"]
+
+
+def test_diff_classifies_matched_modified_and_missing():
+    text_a = (
+        "The tenant shall pay rent monthly in advance. "
+        "Either party may terminate this lease with thirty days written notice to the other party. "
+        "The landlord keeps the security deposit."
+    )
+    text_b = (
+        "The tenant shall pay rent monthly in advance. "
+        "Either party may terminate this lease with sixty days written notice to the other party. "
+        "Pets are not allowed on the premises."
+    )
+    result = diff_texts(text_a, text_b)
+    statuses = sorted(p['status'] for p in result['pairs'])
+    assert statuses == ['matched', 'missing_in_a', 'missing_in_b', 'modified']
+    assert result['counts']['matched'] == 1
+    assert 0.0 < result['similarity'] < 1.0
+
+
+def test_identical_texts_are_fully_similar():
+    text = "Rent is due on the first day. Notice must be in writing."
+    result = diff_texts(text, text)
+    assert result['similarity'] == 1.0
+    assert all(p['status'] == 'matched' for p in result['pairs'])
@@ -0,0 +1,69 @@
+from sqlalchemy import select
+
+from app.db.database import database
+from app.db.models import clause_signatures
+from app.services.clause_index import ClauseIndex, clause_signature
+
+RENT = "The tenant shall pay the monthly rent on the first day of each month."
+REPAIR = "The landlord shall repair structural damage to the building within thirty days."
+NOTICE = "Either party may terminate this lease by giving sixty days written notice."
+
+
+def test_new_documents_are_added_to_the_loaded_index(run_db):
+    async def body():
+        index = ClauseIndex()
+        await index.add_document("f1", [RENT])
+        await index.search(RENT)  # loads the index from the table
+        meta = list(index._meta)
+        await index.add_document("f2", [REPAIR])
+        return meta, list(index._meta), await index.search(REPAIR, k=1)
+
+    before, after, hits = run_db(body)
+    assert before == [("f1", RENT)]
+    assert after == [("f1", RENT), ("f2", REPAIR)]
+    assert hits[0]["file_id"] == "f2" and hits[0]["score"] == 1.0
+
+
+def test_reindexing_a_file_replaces_its_clauses(run_db):
+    async def body():
+        index = ClauseIndex()
+        await index.add_document("f1", [RENT, REPAIR])
+        await index.add_document("f2", [NOTICE])
+        await index.search(RENT)
+        await index.add_document("f1", [REPAIR])
+        stored = await database.fetch_all(select(clause_signatures.c.file_id, clause_signatures.c.clause))
+        return (
+            list(index._meta), index._file_rows, set().union(*index._buckets.values()),
+            [(r["file_id"], r["clause"]) for r in stored], await index.search(RENT), await index.search(NOTICE, k=1),
+        )
+
+    meta, file_rows, bucketed, stored, rent_hits, notice_hits = run_db(body)
+    # the old rows are tombstoned in place, the rest keep their row numbers
+    assert meta == [None, None, ("f2", NOTICE), ("f1", REPAIR)]
+    assert file_rows == {"f2": [2], "f1": [3]}
+    assert bucketed == {2, 3}
+    assert sorted(stored) == sorted(m for m in meta if m)
+    assert all(hit["clause"] != RENT for hit in rent_hits)
+    assert notice_hits[0]["clause"] == NOTICE and notice_hits[0]["score"] == 1.0
+
+
+def test_documents_stored_while_loading_are_not_lost(run_db, monkeypatch):
+    index = ClauseIndex()
+    build = ClauseIndex._build
+
+    def slow_build(rows):
+        # another request finishes storing a document while the table is being read
+        index.index_document("f2", [REPAIR], [clause_signature(REPAIR)])
+        index.index_document("f1", [NOTICE], [clause_signature(NOTICE)])
+        return build(rows)
+
+    monkeypatch.setattr(index, "_build", slow_build)
+
+    async def body():
+        await index.store_document("f1", [RENT])
+        await index.load()
+        return [m for m in index._meta if m], index._updates
+
+    meta, updates = run_db(body)
+    assert meta == [("f2", REPAIR), ("f1", NOTICE)]
+    assert updates is None
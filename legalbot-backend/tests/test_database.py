@@ -0,0 +1,97 @@
+import asyncio
+import sqlite3
+
+import pytest
+import sqlalchemy
+from sqlalchemy import select, func
+
+from app.db.database import AppDatabase, pool_options
+from app.db.models import metadata, files, analysis_clauses
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    metadata.create_all(sqlalchemy.create_engine(url))
+    return url
+
+
+async def _with_database(url, body, **options):
+    database = AppDatabase(url, **{**pool_options(url), **options})
+    await database.connect()
+    try:
+        return await body(database)
+    finally:
+        await database.disconnect()
+
+
+def test_insert_many_writes_rows_in_batches(database_url, monkeypatch):
+    monkeypatch.setattr("app.db.database.DB_INSERT_BATCH_ROWS", 7)
+    rows = [{"file_id": "f1", "position": i, "page": 1, "clause": f"clause {i}"} for i in range(50)]
+
+    async def body(database):
+        statements = []
+        execute = database.execute
+
+        async def counting(query, *args, **kwargs):
+            statements.append(query)
+            return await execute(query, *args, **kwargs)
+
+        database.execute = counting
+        await database.insert_many(analysis_clauses, rows)
+        await database.insert_many(analysis_clauses, [])
+        return len(statements), await database.fetch_val(select(func.count()).select_from(analysis_clauses))
+
+    statements, count = run(_with_database(database_url, body))
+    assert statements == 8  # ceil(50 / 7)
+    assert count == 50
+
+
+def test_failed_transaction_leaves_no_rows(database_url):
+    async def body(database):
+        with pytest.raises(sqlite3.IntegrityError):
+            async with database.transaction():
+                await database.insert_many(files, [
+                    {"id": "a", "filename": "a.pdf", "original_name": "a.pdf"},
+                    {"id": "b", "filename": "b.pdf", "original_name": "b.pdf"},
+                ])
+                await database.execute(files.insert().values(id="a", filename="dup", original_name="dup"))
+        return await database.fetch_val(select(func.count()).select_from(files))
+
+    assert run(_with_database(database_url, body)) == 0
+
+
+def test_sqlite_connections_are_reused_up_to_the_pool_size(database_url):
+    async def body(database):
+        pool = database._backend._pool
+        opened = []
+        open_connection = pool._open
+
+        async def counting_open():
+            connection = await open_connection()
+            opened.append(connection)
+            return connection
+
+        pool._open = counting_open
+
+        async def query(i):
+            # each task gets its own connection from the pool
+            return await database.fetch_val(select(func.count()).select_from(files))
+
+        for _ in range(5):
+            await asyncio.gather(*(query(i) for i in range(20)))
+        return len(opened), len(pool._idle)
+
+    opened, idle = run(_with_database(database_url, body, min_size=1, max_size=3))
+    assert opened <= 2  # one was opened on connect
+    assert idle <= 3
+
+
+def test_pool_options_respect_the_url():
+    assert pool_options("sqlite:///x.db?max_size=1").keys() == {"min_size", "cached_statements"}
+    assert "statement_cache_size" in pool_options("postgresql+asyncpg://u:p@localhost/db")
+    assert pool_options("mysql://u:p@localhost/db") == {}
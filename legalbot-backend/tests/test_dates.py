@@ -0,0 +1,52 @@
+from app.services.dates import normalize_dates, parse_date, parse_deadline, parse_duration, temporal_expressions
+
+
+def test_fast_path_formats():
+    assert parse_date("January 5, 2024") == "2024-01-05"
+    assert parse_date("Jan. 5th 2024") == "2024-01-05"
+    assert parse_date("the 5th day of January, 2024") == "2024-01-05"
+    assert parse_date("2024-01-05") == "2024-01-05"
+    assert parse_date("01/05/2024") == "2024-01-05"
+    assert parse_date("25/12/2024") == "2024-12-25"
+    # ISO dates are never read day first
+    assert parse_date("2024-13-05") is None
+    assert parse_date("February 30, 2024") is None
+
+
+def test_only_slash_dates_fall_back_to_day_first():
+    assert parse_date("05.01.2024") == "2024-05-01"
+    assert parse_date("05-01-2024") == "2024-05-01"
+    # an out-of-range month is rejected, not swapped, unless the date uses slashes
+    assert parse_date("13.05.2024") is None
+    assert parse_date("13-05-2024") is None
+    assert parse_date("13/05/2024") == "2024-05-13"
+
+
+def test_durations_are_not_dates():
+    assert parse_date("thirty (30) days") is None
+    assert parse_date("monthly") is None
+    assert parse_duration("thirty (30) days") == {"value": 30, "unit": "day", "business_days": False}
+    assert parse_duration("forty-five business days") == {"value": 45, "unit": "day", "business_days": True}
+    assert parse_duration("six months") == {"value": 6, "unit": "month", "business_days": False}
+    assert parse_duration("January 5, 2024") is None
+
+
+def test_deadline_from_context():
+    deadline = parse_deadline("thirty (30) days", "Rent shall be repaid within ", " after termination of the lease.")
+    assert deadline["cue"] == "within"
+    assert deadline["relation"] == "after"
+    assert deadline["anchor"] == "termination of the lease"
+    assert deadline["value"] == 30
+
+
+def test_temporal_expressions_and_normalize_dates():
+    result = temporal_expressions([
+        ("January 5, 2024", "", ""),
+        ("January 5, 2024", "", ""),
+        ("thirty (30) days", "no later than ", " of receipt"),
+        ("ten days", "", ""),
+    ])
+    assert result["dates"] == ["2024-01-05"]
+    assert [d["value"] for d in result["durations"]] == [30, 10]
+    assert len(result["deadlines"]) == 1 and result["deadlines"][0]["cue"] == "no later than"
+    assert sorted(normalize_dates(["March 1, 2023", "1 March 2023", "quarterly"])) == ["2023-03-01"]
@@ -0,0 +1,60 @@
+import docx
+from docx.enum.text import WD_BREAK
+from docx.shared import Inches
+
+from app.services.docx_extractor import iter_docx_blocks, docx_pages, docx_text
+
+
+def _save(document, tmp_path, name="doc.docx"):
+    path = str(tmp_path / name)
+    document.save(path)
+    return path
+
+
+def test_plain_paragraphs_match_python_docx(tmp_path):
+    document = docx.Document()
+    paragraph = document.add_paragraph("Rent is due\ton the first day. ")
+    paragraph.add_run("Bold part").bold = True
+    paragraph.add_run().add_break()
+    paragraph.add_run("after a line break")
+    paragraph.paragraph_format.tab_stops.add_tab_stop(Inches(1))
+    document.add_paragraph("")
+    document.add_paragraph("Second clause.")
+    path = _save(document, tmp_path)
+
+    expected = "\n".join(p.text for p in docx.Document(path).paragraphs)
+    assert docx_text(path) == expected
+
+
+def test_tables_headers_and_footers_in_document_order(tmp_path):
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = "Notices go to 1 Main St"
+    document.sections[0].footer.paragraphs[0].text = "Initials: ____"
+    document.add_paragraph("Rent schedule:")
+    table = document.add_table(rows=2, cols=2)
+    for row, values in zip(table.rows, (("Year 1", "$1,000"), ("Year 2", "$1,100"))):
+        for cell, value in zip(row.cells, values):
+            cell.text = value
+    document.add_paragraph("Signed.")
+    path = _save(document, tmp_path)
+
+    blocks = list(iter_docx_blocks(path))
+    assert [(b.part, b.kind) for b in blocks] == [
+        ("header", "paragraph"), ("body", "paragraph"), ("body", "row"), ("body", "row"),
+        ("body", "paragraph"), ("footer", "paragraph"),
+    ]
+    assert blocks[2].cells == ("Year 1", "$1,000") and (blocks[3].table, blocks[3].row) == (0, 1)
+    assert docx_text(path) == (
+        "Notices go to 1 Main St\nRent schedule:\nYear 1 | $1,000\nYear 2 | $1,100\nSigned.\nInitials: ____"
+    )
+
+
+def test_pages_split_at_hard_page_breaks(tmp_path):
+    document = docx.Document()
+    for text in ("Page one.", "Page two.", "Page three."):
+        document.add_paragraph(text).add_run().add_break(WD_BREAK.PAGE)
+    path = _save(document, tmp_path)
+
+    pages = docx_pages(path)
+    assert pages == ["Page one.", "\nPage two.", "\nPage three.", ""]
+    assert "".join(pages) == docx_text(path)
@@ -0,0 +1,63 @@
+import asyncio
+
+from app.services.job_events import LocalJobEvents
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_subscriber_starts_from_current_state_and_follows_updates():
+    async def body():
+        bus = LocalJobEvents()
+        bus.publish("p1", status="pending", stage="queued")
+        bus.publish("p1", status="processing", stage="parsing")
+        with bus.subscribe("p1") as subscription:
+            first = await subscription.next(1)
+            bus.publish("p1", stage="scoring", owner={"clauses_found": 3})
+            bus.publish("p1", stage="comparing", owner={"risk": {"level": "Low", "score": 10}})
+            bus.publish("p1", status="completed", stage="done")
+            return first, [await subscription.next(1) for _ in range(3)], bus.state("p1")
+
+    first, events, state = run(body())
+    assert (first["status"], first["stage"]) == ("processing", "parsing")
+    assert [e["stage"] for e in events] == ["scoring", "comparing", "done"]
+    assert events[1]["status"] == "processing" and events[1]["owner"] == {"risk": {"level": "Low", "score": 10}}
+    # partial results accumulate in the retained state
+    assert state["owner"] == {"clauses_found": 3, "risk": {"level": "Low", "score": 10}}
+    assert state["status"] == "completed"
+
+
+def test_events_fan_out_only_to_the_jobs_subscribers():
+    async def body():
+        bus = LocalJobEvents()
+        with bus.subscribe("a") as a1, bus.subscribe("a") as a2, bus.subscribe("b") as b:
+            assert bus.subscriber_count() == 3
+            bus.publish("a", status="processing", stage="extracting")
+            got = (await a1.next(1), await a2.next(1), await b.next(0.01))
+        return got, bus.subscriber_count()
+
+    (a1, a2, b), remaining = run(body())
+    assert a1 == a2 and a1["stage"] == "extracting"
+    assert b is None
+    assert remaining == 0
+
+
+def test_slow_subscriber_keeps_the_newest_events():
+    async def body():
+        bus = LocalJobEvents(queue_size=2)
+        with bus.subscribe("p1") as subscription:
+            for stage in ("extracting", "parsing", "scoring"):
+                bus.publish("p1", status="processing", stage=stage)
+            bus.publish("p1", status="completed", stage="done")
+            return [(await subscription.next(1))["stage"] for _ in range(2)]
+
+    assert run(body()) == ["scoring", "done"]
+
+
+def test_finished_jobs_are_retained_up_to_the_limit():
+    bus = LocalJobEvents(retain=2)
+    for process_id in ("p1", "p2", "p3"):
+        bus.publish(process_id, status="completed", stage="done")
+    assert bus.state("p1") is None
+    assert bus.state("p3")["status"] == "completed"
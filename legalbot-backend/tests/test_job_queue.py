@@ -0,0 +1,148 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.db.database import database
+from app.db.models import ProcessingStatus, files, process_jobs, uploads
+from app.services import job_queue
+
+# the endpoints package re-exports each module's router under the module's name
+process = importlib.import_module("app.api.endpoints.process")
+
+
+class RecordingEvents:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, process_id, **update):
+        self.events.append(update)
+
+
+def _analysis(name):
+    clauses = [f"{name} shall give notice of termination."]
+    return {
+        'clauses': clauses, 'clause_pages': {clauses[0]: 1}, 'risk': None, 'keywords': ['notice'],
+        'summary': clauses[0], 'entities': [name], 'dates': [], 'durations': [], 'deadlines': [],
+        'tokens': ['notice', 'termination'], 'units': clauses, 'text': clauses[0],
+        '_segments': [], 'segments': {'total': 1, 'reused': 0},
+    }
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    """run_job with every worker-pool call made in-process on canned analyses."""
+    async def run_nlp(func, *args):
+        return func(*args)
+
+    async def extract_pages_parallel(path):
+        if path == "broken.pdf":
+            raise ValueError("cannot read broken.pdf")
+        return [path]
+
+    async def reusable_segments(file_id):
+        return {}
+
+    events = RecordingEvents()
+    monkeypatch.setattr(job_queue, "job_events", events)
+    monkeypatch.setattr(job_queue, "run_nlp", run_nlp)
+    monkeypatch.setattr(job_queue, "extract_pages_parallel", extract_pages_parallel)
+    monkeypatch.setattr(job_queue, "reusable_segments", reusable_segments)
+    monkeypatch.setattr(job_queue, "analyze_revision", lambda pages, reusable: _analysis(pages[0]))
+    monkeypatch.setattr(job_queue, "analyze_risk", lambda text: {'level': 'Medium', 'score': 40})
+    monkeypatch.setattr(job_queue, "compare_documents", lambda a, b: {
+        'similarity_percent': 90, 'can_do_agreement': True, 'diagnostics': {'profile': {'total': 0.1}},
+    })
+    return events
+
+
+async def _job_row(process_id):
+    return await database.fetch_one(
+        select(process_jobs.c.status, process_jobs.c.stage, process_jobs.c.result).where(process_jobs.c.id == process_id)
+    )
+
+
+def test_job_moves_through_each_stage(run_db, fake_pipeline):
+    async def body():
+        await database.execute(process_jobs.insert().values(
+            id="p1", file_id="owner", upload_id="u1", status=ProcessingStatus.pending, stage="queued"
+        ))
+        await job_queue.run_job("p1", {"id": "owner", "path": "Owner"}, {"id": "tenant", "path": "Tenant"})
+        return await _job_row("p1")
+
+    row = run_db(body)
+    events = fake_pipeline.events
+    assert [e.get("stage") for e in events] == ["extracting", "parsing", "scoring", "comparing", "done"]
+    assert events[0]["status"] == "processing" and events[-1]["status"] == "completed"
+    assert events[2]["owner"]["clauses_found"] == 1
+    assert events[3]["tenant"] == {"risk": {"level": "Medium", "score": 40}}
+    assert events[-1]["similarity_percent"] == 90
+    assert (row["status"], row["stage"]) == (ProcessingStatus.completed, "done")
+    result = json.loads(row["result"])
+    assert result["ownerResults"]["risk_level"] == "Medium"
+    assert result["comparisonResults"] == {'similarity_percent': 90, 'can_do_agreement': True, 'diagnostics': {}}
+
+
+def test_failed_job_records_the_error(run_db, fake_pipeline):
+    async def body():
+        await database.execute(process_jobs.insert().values(
+            id="p1", file_id="owner", upload_id="u1", status=ProcessingStatus.pending, stage="queued"
+        ))
+        await job_queue.run_job("p1", {"id": "owner", "path": "broken.pdf"}, {"id": "tenant", "path": "Tenant"})
+        return await _job_row("p1")
+
+    row = run_db(body)
+    assert row["status"] == ProcessingStatus.failed
+    assert json.loads(row["result"]) == {"error": "cannot read broken.pdf"}
+    assert fake_pipeline.events[-1] == {"status": "failed", "error": "cannot read broken.pdf"}
+
+
+def test_enqueue_refuses_work_when_the_queue_is_full(monkeypatch):
+    async def body():
+        monkeypatch.setattr(job_queue, "_queue", asyncio.Queue(maxsize=1))
+        job_queue.enqueue("p1", {}, {})
+        full, depth = job_queue.is_full(), job_queue.depth()
+        with pytest.raises(job_queue.QueueFullError):
+            job_queue.enqueue("p2", {}, {})
+        return full, depth
+
+    assert asyncio.run(body()) == (True, 1)
+
+
+def test_start_returns_503_when_the_queue_is_full(run_db, monkeypatch, tmp_path):
+    monkeypatch.setattr(process, "UPLOAD_DIR", tmp_path)
+    for name in ("owner.pdf", "tenant.pdf"):
+        (tmp_path / name).write_bytes(b"%PDF")
+
+    def refuse(*args):
+        raise job_queue.QueueFullError("Analysis queue is full, try again later")
+
+    async def body():
+        await database.insert_many(files, [
+            {"id": "owner", "filename": "owner.pdf", "original_name": "owner.pdf"},
+            {"id": "tenant", "filename": "tenant.pdf", "original_name": "tenant.pdf"},
+        ])
+        await database.execute(uploads.insert().values(id="u1", owner_file_id="owner", tenant_file_id="tenant"))
+        request = process.StartAnalysisRequest(uploadId="u1")
+
+        # full before anything is written
+        monkeypatch.setattr(job_queue, "is_full", lambda: True)
+        with pytest.raises(HTTPException) as early:
+            await process.start_analysis(request)
+        jobs_after_early = await database.fetch_all(select(process_jobs.c.id))
+
+        # filled up between the check and enqueue: the job row is marked failed
+        monkeypatch.setattr(job_queue, "is_full", lambda: False)
+        monkeypatch.setattr(job_queue, "enqueue", refuse)
+        with pytest.raises(HTTPException) as late:
+            await process.start_analysis(request)
+        statuses = [row["status"] for row in await database.fetch_all(select(process_jobs.c.status))]
+        return early.value.status_code, len(jobs_after_early), late.value.status_code, statuses
+
+    early, jobs_after_early, late, statuses = run_db(body)
+    assert (early, jobs_after_early) == (503, 0)
+    assert late == 503
+    assert statuses == [ProcessingStatus.failed]
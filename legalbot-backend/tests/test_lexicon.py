@@ -0,0 +1,27 @@
+from app.services.lexicon import KeywordMatcher, terms_in_span
+
+
+def test_finds_overlapping_and_prefix_terms_with_offsets():
+    matcher = KeywordMatcher(["notice", "notice period", "liability", "limitation of liability"])
+    text = "the notice period and limitation of liability"
+    assert matcher.find_all(text) == [
+        (4, "notice period"),
+        (4, "notice"),
+        (22, "limitation of liability"),
+        (36, "liability"),
+    ]
+
+
+def test_count_matches_substring_semantics():
+    matcher = KeywordMatcher(["notice", "penalty"])
+    counts = matcher.count("notices, notice and a penalty")
+    assert counts == {"notice": 2, "penalty": 1}
+
+
+def test_terms_in_span_only_counts_terms_inside_the_span():
+    matcher = KeywordMatcher(["rent", "deposit"])
+    text = "pay rent. keep deposit."
+    matches = matcher.find_all(text)
+    starts = [start for start, _ in matches]
+    assert terms_in_span(matches, starts, 0, 9) == {"rent"}
+    assert terms_in_span(matches, starts, 10, len(text)) == {"deposit"}
@@ -1,13 +1,88 @@
-from gpt4all import GPT4All
+import asyncio
+import threading
 
-model_path = r"D:\gpt4\download\mistral-7b-instruct-v0.1.Q4_0.gguf"
-gpt4all_model = GPT4All(model_path)
+import pytest
 
-def generate_llm_response(prompt: str, max_tokens=512):
-    return gpt4all_model.generate(prompt, max_tokens=max_tokens)
+from app.services.llm_service import LLMService, LLMQueueFullError, StubBackend
 
-# Simple test
-if __name__ == "__main__":
-    prompt = "Summarize this agreement: The agreement is between Company A and Company B to..."
-    output = generate_llm_response(prompt)
-    print("LLM output:\n", output)
+
+class CountingBackend(StubBackend):
+    def __init__(self, gate=None):
+        self.calls = 0
+        self.gate = gate
+
+    def stream(self, prompt, max_tokens, temperature):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        yield from super().stream(prompt, max_tokens, temperature)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _with_service(service, body):
+    await service.start()
+    try:
+        return await body(service)
+    finally:
+        await service.stop()
+
+
+def test_generate_with_stub_backend():
+    async def body(service):
+        return await service.generate("Summarize this agreement", max_tokens=4, temperature=0.0)
+
+    assert run(_with_service(LLMService(StubBackend()), body)) == "[stub t=0.0] Summarize this"
+
+
+def test_tokens_stream_in_order():
+    async def body(service):
+        return [token async for token in service.submit("one two three", temperature=0.0).tokens()]
+
+    tokens = run(_with_service(LLMService(StubBackend()), body))
+    assert tokens == ["[stub", " t=0.0]", " one", " two", " three"]
+
+
+def test_repeated_prompt_is_served_from_cache():
+    backend = CountingBackend()
+
+    async def body(service):
+        first = await service.generate("notice period", temperature=0.0)
+        request = service.submit("notice period", temperature=0.0)
+        second = await request.text()
+        other = await service.generate("notice period", temperature=0.5)
+        return first, second, request.cached, other
+
+    first, second, cached, other = run(_with_service(LLMService(backend), body))
+    assert first == second and cached
+    assert other != first
+    assert backend.calls == 2
+
+
+def test_identical_prompts_in_a_batch_share_one_generation():
+    backend = CountingBackend()
+
+    async def body(service):
+        return await asyncio.gather(*(service.generate("same prompt") for _ in range(4)))
+
+    texts = run(_with_service(LLMService(backend, max_batch=8, batch_wait=0.05), body))
+    assert len(set(texts)) == 1
+    assert backend.calls == 1
+
+
+def test_full_queue_is_rejected():
+    gate = threading.Event()
+    backend = CountingBackend(gate)
+
+    async def body(service):
+        busy = service.submit("first")
+        await asyncio.sleep(0.05)  # the worker is now blocked inside the backend
+        service.submit("second")
+        with pytest.raises(LLMQueueFullError):
+            service.submit("third")
+        gate.set()
+        return await busy.text()
+
+    assert run(_with_service(LLMService(backend, queue_size=1, batch_wait=0), body)).endswith("first")
@@ -0,0 +1,63 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    for name in ("_histograms", "_counters", "_gauges", "_help", "_buckets"):
+        monkeypatch.setattr(metrics, name, {})
+
+
+def test_render_uses_the_prometheus_text_format():
+    metrics.inc("jobs_total", help="Jobs", result="ok")
+    metrics.inc("jobs_total", 2, result="ok")
+    metrics.observe("stage_seconds", 0.3, buckets=(0.1, 0.5), help="Stage latency", stage="parse")
+    metrics.observe("stage_seconds", 0.05, buckets=(0.1, 0.5), stage="parse")
+    metrics.gauge("queue_depth", lambda: 4, help="Queued jobs")
+
+    assert metrics.render().splitlines() == [
+        "# HELP jobs_total Jobs",
+        "# TYPE jobs_total counter",
+        'jobs_total{result="ok"} 3',
+        "# HELP stage_seconds Stage latency",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="parse",le="0.1"} 1',
+        'stage_seconds_bucket{stage="parse",le="0.5"} 2',
+        'stage_seconds_bucket{stage="parse",le="+Inf"} 2',
+        'stage_seconds_sum{stage="parse"} 0.35',
+        'stage_seconds_count{stage="parse"} 2',
+        "# HELP queue_depth Queued jobs",
+        "# TYPE queue_depth gauge",
+        "queue_depth 4",
+    ]
+
+
+def test_nothing_is_recorded_when_disabled(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+    metrics.inc("jobs_total")
+    metrics.observe("stage_seconds", 1.0)
+    assert metrics.render() == "\n"
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="No item")
+        return {"id": item_id}
+
+    client = TestClient(app)
+    for path in ("/items/1", "/items/2", "/items/0", "/nowhere"):
+        client.get(path)
+
+    series = metrics._histograms["legalbot_http_request_seconds"]
+    counts = {dict(labels)["path"] + f' {dict(labels)["status"]}': state[-1] for labels, state in series.items()}
+    assert counts == {"/items/{item_id} 200": 2, "/items/{item_id} 404": 1, "unmatched 404": 1}
+    assert all(dict(labels)["method"] == "GET" for labels in series)
@@ -0,0 +1,65 @@
+import importlib
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.db.database import database
+from app.db.models import ProcessingStatus, files, process_jobs
+from app.services import versioning
+from app.services.analysis_cache import AnalysisCache
+
+# the endpoints package re-exports each module's router under the module's name
+process = importlib.import_module("app.api.endpoints.process")
+
+
+def _analysis():
+    clauses = ["The tenant shall give sixty days notice of termination."]
+    return {
+        'clauses': clauses, 'clause_pages': {clauses[0]: 1}, 'risk': {'level': 'Low', 'score': 10},
+        'keywords': ['notice'], 'summary': clauses[0], 'entities': [], 'dates': [], 'durations': [],
+        'deadlines': [], 'tokens': ['notice', 'termination'], 'units': clauses, 'text': clauses[0],
+        '_segments': [], 'segments': {'total': 1, 'reused': 0},
+    }
+
+
+def test_process_returns_the_analysis_and_its_cache_tier(run_db, monkeypatch, tmp_path):
+    analyzed = []
+
+    async def analyze_version(file_id, path):
+        analyzed.append(file_id)
+        return _analysis()
+
+    monkeypatch.setattr(process, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(versioning, "analysis_cache", AnalysisCache(str(tmp_path / "cache"), 1 << 20, 0))
+    monkeypatch.setattr(versioning, "analyze_version", analyze_version)
+    (tmp_path / "lease.pdf").write_bytes(b"%PDF lease")
+
+    async def seed():
+        await database.execute(files.insert().values(id="f1", filename="lease.pdf", original_name="lease.pdf"))
+
+    run_db(seed)
+
+    app = FastAPI()
+    app.include_router(process.router, prefix="/api")
+    app.on_event("startup")(database.connect)
+    app.on_event("shutdown")(database.disconnect)
+    with TestClient(app) as client:
+        first = client.post("/api/process/", json={"filename": "lease.pdf"})
+        second = client.post("/api/process/", json={"filename": "lease.pdf"})
+        missing = client.post("/api/process/", json={"filename": "nope.pdf"})
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert (first.json()["cache"], second.json()["cache"]) == ("miss", "memory")
+    assert analyzed == ["f1"]
+    body = first.json()
+    assert body["status"] == "completed" and body["risk_level"] == "Low"
+    assert body["clauses"] == _analysis()['clauses']
+    assert missing.status_code == 404
+
+    async def jobs():
+        return await database.fetch_all(select(process_jobs.c.id, process_jobs.c.status))
+
+    rows = {row["id"]: row["status"] for row in run_db(jobs)}
+    assert rows == {body["process_id"]: ProcessingStatus.completed,
+                    second.json()["process_id"]: ProcessingStatus.completed}
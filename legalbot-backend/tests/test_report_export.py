@@ -0,0 +1,59 @@
+import io
+import zipfile
+
+import fitz
+
+from app.services.report_export import render_pdf, render_xlsx, report_hash, report_sections
+
+
+def _report(clauses=3):
+    return {
+        'aligned_clauses': [
+            {'status': 'modified', 'a': 'Rent is due monthly.', 'b': 'Rent is due weekly.', 'similarity': 0.8},
+        ],
+        'missing_clauses_in_b': [f"The tenant shall repair damage {i} & wear." for i in range(clauses)],
+        'missing_clauses_in_a': ['The landlord may enter with notice.'],
+        'risk_a': {'level': 'High', 'score': 70, 'found': ['penalty (high)']},
+        'risk_b': {'level': 'Low', 'score': 10, 'found': []},
+        'entities_only_in_a': ['Acme Ltd', 'Bob'],
+        'entities_only_in_b': [],
+        'dates_only_in_a': ['2024-01-05'],
+        'dates_only_in_b': [],
+        'summary': {'doc_a': 'Owner summary.', 'doc_b': 'Tenant summary.'},
+        'overall_similarity': 0.61,
+        'similarity_percent': 61,
+        'adjusted_similarity_percent': 38,
+        'diagnostics': {'mode': 'clauses', 'aligned_counts': {'matched': 0, 'modified': 1}, 'profile': {'total': 0.1}},
+        'can_do_agreement': False,
+    }
+
+
+def test_hash_ignores_timings_cache_and_set_order():
+    report = _report()
+    other = dict(_report(), cache={'doc_a': 'memory'}, entities_only_in_a=['Bob', 'Acme Ltd'])
+    other['diagnostics'] = dict(other['diagnostics'], profile={'total': 9.9})
+    assert report_hash(report, "pdf") == report_hash(other, "pdf")
+    assert report_hash(report, "pdf") != report_hash(report, "xlsx")
+    assert report_hash(report, "pdf") != report_hash(dict(report, similarity_percent=62), "pdf")
+
+
+def test_sections_flatten_diagnostics_without_profile():
+    diagnostics = [s for s in report_sections(_report()) if s.title == "Diagnostics"][0]
+    assert diagnostics.rows == [("mode", "clauses"), ("aligned_counts.matched", 0), ("aligned_counts.modified", 1)]
+
+
+def test_pdf_is_text_and_flows_over_pages():
+    with fitz.open(stream=render_pdf(_report(clauses=200)), filetype="pdf") as doc:
+        assert doc.page_count > 1
+        text = "".join(page.get_text() for page in doc)
+    assert "The tenant shall repair damage 199 & wear." in text
+    assert "Risk-adjusted similarity" in text
+
+
+def test_xlsx_has_one_sheet_per_section():
+    with zipfile.ZipFile(io.BytesIO(render_xlsx(_report()))) as archive:
+        workbook = archive.read("xl/workbook.xml").decode()
+        missing = archive.read("xl/worksheets/sheet3.xml").decode()
+        assert len([n for n in archive.namelist() if n.startswith("xl/worksheets/")]) == 7
+    assert 'name="Missing clauses"' in workbook
+    assert "The tenant shall repair damage 2 &amp; wear." in missing
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.responses import FastJSONResponse, parse_fields, project
+from app.services.nlp_processing import COMPARE_INPUTS, compare_inputs
+
+
+def test_negotiate_encoding_prefers_brotli_and_honours_q_values():
+    assert negotiate_encoding("gzip, deflate, br", brotli_available=True) == "br"
+    assert negotiate_encoding("gzip, deflate, br", brotli_available=False) == "gzip"
+    assert negotiate_encoding("br;q=0.5, gzip", brotli_available=True) == "gzip"
+    assert negotiate_encoding("*;q=0.1", brotli_available=True) == "br"
+    assert negotiate_encoding("gzip;q=0, identity", brotli_available=False) is None
+    assert negotiate_encoding("", brotli_available=True) is None
+
+
+def test_parse_fields_and_project():
+    assert parse_fields(None) is None
+    assert parse_fields(" a, b.c ,a,") == ["a", "b.c"]
+    with pytest.raises(HTTPException) as e:
+        parse_fields(" , ")
+    assert e.value.status_code == 400
+    with pytest.raises(HTTPException) as e:
+        parse_fields("a,zz.y", allowed=("a", "b"))
+    assert "zz.y" in e.value.detail
+
+    content = {"a": 1, "b": {"c": [1, 2], "d": "x"}, "e": None}
+    assert project(content, None) is content
+    assert project(content, ["b.c", "e", "b.missing", "a.deeper"]) == {"b": {"c": [1, 2]}, "e": None}
+
+
+def test_compare_inputs_narrow_to_what_the_fields_need():
+    assert compare_inputs(None) == COMPARE_INPUTS
+    assert compare_inputs(["risk_a", "summary.doc_a"]) == ("risk", "summary")
+    assert compare_inputs(["entities_only_in_b", "similarity_percent"]) == COMPARE_INPUTS
+
+
+def test_fast_json_response_compressed_for_large_bodies():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/big")
+    def big():
+        # returned directly, so numpy values and sets reach orjson as they are
+        return FastJSONResponse({"values": np.arange(400), "score": np.float32(0.5), "tags": {"x"}})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    client = TestClient(app)
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == {"values": list(range(400)), "score": 0.5, "tags": ["x"]}
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    response = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
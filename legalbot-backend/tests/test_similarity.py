@@ -0,0 +1,65 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.services.nlp_processing import jaccard_similarity
+from app.services.similarity import (
+    Vocabulary, token_matrix, similarity_matrix, similar_pairs, duplicate_groups, portfolio_similarity
+)
+
+WORDS = [f"w{i}" for i in range(60)]
+
+
+def _documents(count, seed=7):
+    rng = random.Random(seed)
+    return [set(rng.sample(WORDS, rng.randint(0, 20))) for _ in range(count)]
+
+
+def test_jaccard_matrix_matches_pairwise_sets():
+    documents = _documents(25) + [set(), set()]
+    matrix, _ = token_matrix(documents)
+    scores = similarity_matrix(matrix)
+    expected = np.array([[jaccard_similarity(a, b) for b in documents] for a in documents])
+    assert np.allclose(scores, expected)
+
+
+def test_cosine_matrix_and_shared_vocabulary():
+    vocabulary = Vocabulary()
+    a, _ = token_matrix([{"lease", "rent"}], vocabulary)
+    b, _ = token_matrix([{"rent", "deposit", "notice", "term"}], vocabulary)
+    assert a.shape[1] < b.shape[1]
+    assert similarity_matrix(a, b, "cosine")[0, 0] == pytest.approx(1 / np.sqrt(2 * 4))
+    assert similarity_matrix(a, b)[0, 0] == pytest.approx(1 / 5)
+
+
+def test_similar_pairs_match_the_dense_matrix_in_any_block_size():
+    documents = _documents(40, seed=3)
+    documents[5] = set(documents[2])
+    matrix, _ = token_matrix(documents)
+    dense = similarity_matrix(matrix)
+    expected = {
+        (i, j) for i in range(40) for j in range(i + 1, 40)
+        if dense[i, j] >= 0.3 and documents[i] and documents[j]
+    }
+    for block_rows in (1, 7, 1024):
+        pairs = list(similar_pairs(matrix, 0.3, block_rows=block_rows))
+        assert {(i, j) for i, j, _ in pairs} == expected
+        assert all(s == pytest.approx(dense[i, j]) for i, j, s in pairs)
+
+
+def test_duplicate_groups_are_connected_components():
+    pairs = [(0, 3, 1.0), (3, 5, 0.95), (1, 2, 0.9)]
+    assert duplicate_groups(pairs, 7) == [[0, 3, 5], [1, 2]]
+    assert duplicate_groups([], 7) == []
+
+
+def test_portfolio_similarity_reports_duplicates_by_file_id():
+    result = portfolio_similarity({
+        "a": ["lease", "rent", "deposit"],
+        "b": ["lease", "rent", "deposit"],
+        "c": ["loan", "interest"],
+    }, threshold=0.9, include_matrix=True)
+    assert result["duplicates"] == [{"file_id_a": "a", "file_id_b": "b", "score": 1.0}]
+    assert result["groups"] == [["a", "b"]]
+    assert result["matrix"][0][2] == 0.0
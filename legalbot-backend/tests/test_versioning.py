@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+from app.services import nlp_processing
+from app.services.nlp_processing import analyze_revision, text_segments
+
+
+def _pages():
+    return [
+        "Section 1. The tenant shall pay rent monthly.\nLate payment incurs a penalty.\n\n",
+        "Section 2. The landlord may terminate this lease.\nNotice must be given in writing.\n",
+    ]
+
+
+def _fake_segments(parsed):
+    # stands in for spaCy: every segment is one clause and one entity
+    def analyze_segments(texts, max_sentences=3):
+        parsed.extend(texts)
+        return [
+            {
+                'clauses': [(text, 0)], 'summary': [(len(text), text)], 'entities': [text.split()[0]], 'dates': [],
+                'keywords': {}, 'risk': {}, 'tokens': sorted(text.lower().split()), 'units': [text],
+                'token_count': len(text.split()),
+            }
+            for text in texts
+        ]
+    return analyze_segments
+
+
+def _reusable(analysis):
+    return {segment['hash']: json.dumps(segment['result']) for segment in analysis['_segments']}
+
+
+def test_segments_are_stripped_paragraphs_with_offsets():
+    text = "".join(_pages())
+    segments = list(text_segments(text))
+    assert [s for _, s in segments] == [
+        "Section 1. The tenant shall pay rent monthly.",
+        "Late payment incurs a penalty.",
+        "Section 2. The landlord may terminate this lease.",
+        "Notice must be given in writing.",
+    ]
+    for start, segment in segments:
+        assert text[start:start + len(segment)] == segment
+
+
+def test_long_paragraphs_are_cut_at_sentence_boundaries():
+    text = "The tenant shall pay rent. " * 20
+    segments = list(text_segments(text, max_chars=100))
+    assert len(segments) > 1
+    assert all(len(s) <= 100 and s.endswith(".") for _, s in segments)
+
+
+def test_revision_only_parses_changed_segments(monkeypatch):
+    parsed = []
+    monkeypatch.setattr(nlp_processing, "analyze_segments", _fake_segments(parsed))
+    first = analyze_revision(_pages())
+    assert first['segments'] == {'total': 4, 'reused': 0}
+    assert [s['page'] for s in first['_segments']] == [1, 1, 2, 2]
+
+    parsed.clear()
+    revised = _pages()
+    revised[1] = revised[1].replace("in writing", "by registered mail")
+    second = analyze_revision(revised, _reusable(first))
+    assert parsed == ["Notice must be given by registered mail."]
+    assert second['segments'] == {'total': 4, 'reused': 3}
+    assert second['clauses'][:3] == first['clauses'][:3]
+    assert second['clauses'][3] == "Notice must be given by registered mail."
+    assert second['clause_pages']["Notice must be given by registered mail."] == 2
+    assert second['text'] == "".join(revised)
+
+
+def test_cached_revisions_keep_their_segments(tmp_path, monkeypatch):
+    from app.services import versioning
+    from app.services.analysis_cache import AnalysisCache, cache_key
+
+    cache = AnalysisCache(str(tmp_path), 1 << 20, 1 << 20)
+    monkeypatch.setattr(versioning, "analysis_cache", cache)
+    monkeypatch.setattr(nlp_processing, "analyze_segments", _fake_segments([]))
+    runs = []
+
+    async def analyze_version(file_id, path):
+        runs.append(file_id)
+        return analyze_revision(_pages())
+
+    monkeypatch.setattr(versioning, "analyze_version", analyze_version)
+
+    async def body():
+        # the same bytes seen first through /compare: an analyze_file result without segments
+        await cache.put(cache_key("sha"), {'clauses': [], 'units': []})
+        first = await versioning.cached_version_analysis("f1", "a.docx", "sha")
+        again = await versioning.cached_version_analysis("f2", "a.docx", "sha")
+        return first, again, await cache.get(cache_key("sha"))
+
+    (first, tier), (again, again_tier), (compared, _) = asyncio.run(body())
+    assert runs == ["f1"]
+    assert tier is None and again_tier == "memory"
+    assert [s['hash'] for s in again['_segments']] == [s['hash'] for s in first['_segments']]
+    assert len(again['_segments']) == 4
+    assert '_segments' not in compared
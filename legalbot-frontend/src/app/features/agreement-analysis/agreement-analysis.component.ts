@@ -3,7 +3,7 @@ import { CommonModule } from '@angular/common';
 import { FormsModule } from '@angular/forms';
 import { HttpClient } from '@angular/common/http';
 import { ApiService } from '../../services/api.service';
-import { interval, Subscription, firstValueFrom } from 'rxjs';
+import { interval, Observable, Subscription, firstValueFrom } from 'rxjs';
 
 export interface AnalysisStep {
   id: string;
@@ -18,6 +18,8 @@ export interface AnalysisData {
   processId: string;
   fileA: File | null;
   fileB: File | null;
+  ownerFileId?: string;
+  tenantFileId?: string;
   status?: string;
   ownerResults?: any;
   tenantResults?: any;
@@ -229,6 +231,8 @@ export class AgreementAnalysisComponent implements OnInit, OnDestroy {
       
       const response = await firstValueFrom(this.apiService.uploadAgreements(this.ownerFile!, this.tenantFile!));
       this.analysisData.uploadId = response.uploadId ?? response.upload_id ?? response.id;
+      this.analysisData.ownerFileId = response.ownerFileId;
+      this.analysisData.tenantFileId = response.tenantFileId;
       this.successMessage = 'Agreements uploaded successfully!';
       this.completeStep('upload');
 
@@ -287,12 +291,17 @@ export class AgreementAnalysisComponent implements OnInit, OnDestroy {
     // Start processing progress simulation
     this.simulateProcessingProgress();
 
-    // Start with a longer initial delay for better UX
-    setTimeout(() => {
-      this.statusPollingSubscription = interval(3000).subscribe(() => {
-        this.checkProcessingStatus();
-      });
-    }, 2000); // 2 second initial delay
+    // Status is pushed by the server; fall back to polling if the stream cannot be opened
+    this.statusPollingSubscription = this.apiService.watchProcessStatus(this.analysisData.processId).subscribe({
+      next: (event: any) => this.handleProcessingStatus(event),
+      error: () => this.pollProcessingStatus()
+    });
+  }
+
+  private pollProcessingStatus() {
+    this.statusPollingSubscription = interval(3000).subscribe(() => {
+      this.checkProcessingStatus();
+    });
   }
 
   private stopStatusPolling() {
@@ -305,33 +314,35 @@ export class AgreementAnalysisComponent implements OnInit, OnDestroy {
     if (!this.analysisData.processId) return;
 
     try {
-      // Add a small delay to simulate network request
-      await this.delay(500);
-      
       const response = await this.apiService.getProcessStatus(this.analysisData.processId).toPromise();
-      this.analysisData.status = response.status;
-
-      if (response.status === 'completed') {
-        this.stopStatusPolling();
-        this.completeStep('processing');
-        
-        // set stage for template
-        this.stage = 'results';
-
-        // Add delay before showing results
-        await this.delay(1200);
-        this.activateStep('results');
-        await this.fetchAnalysisResults();
-      } else if (response.status === 'failed') {
-        this.stopStatusPolling();
-        this.errorMessage = 'Processing failed. Please try again.';
-        this.updateStepStatus('processing', 'error');
-      }
+      await this.handleProcessingStatus(response);
     } catch (error: any) {
       console.error('Status check failed:', error);
     }
   }
 
+  private async handleProcessingStatus(response: any) {
+    if (this.analysisData.status === 'completed' || this.analysisData.status === 'failed') return;
+    this.analysisData.status = response.status;
+
+    if (response.status === 'completed') {
+      this.stopStatusPolling();
+      this.completeStep('processing');
+
+      // set stage for template
+      this.stage = 'results';
+
+      // Add delay before showing results
+      await this.delay(1200);
+      this.activateStep('results');
+      await this.fetchAnalysisResults();
+    } else if (response.status === 'failed') {
+      this.stopStatusPolling();
+      this.errorMessage = 'Processing failed. Please try again.';
+      this.updateStepStatus('processing', 'error');
+    }
+  }
+
   private async fetchAnalysisResults() {
     if (!this.analysisData.processId) return;
 
@@ -366,7 +377,8 @@ export class AgreementAnalysisComponent implements OnInit, OnDestroy {
     this.analysisData.fileB = fileB;
   }
   async runComparison() {
-    if (!this.analysisData.fileA || !this.analysisData.fileB) {
+    const { ownerFileId, tenantFileId } = this.analysisData;
+    if (!(ownerFileId && tenantFileId) && (!this.analysisData.fileA || !this.analysisData.fileB)) {
       this.errorMessage = 'Files are missing for comparison.';
       this.updateStepStatus('comparison', 'error');
       return;
@@ -375,7 +387,11 @@ export class AgreementAnalysisComponent implements OnInit, OnDestroy {
     this.isLoading = true;
     this.updateStepStatus('comparison', 'loading');
 
-    this.apiService.compareFiles(this.analysisData.fileA!, this.analysisData.fileB!).subscribe({
+    // Both files were analyzed by the job, so compare their stored analyses instead of re-uploading
+    const comparison: Observable<any> = ownerFileId && tenantFileId
+      ? this.apiService.compareByIds(ownerFileId, tenantFileId)
+      : this.apiService.compareFiles(this.analysisData.fileA!, this.analysisData.fileB!);
+    comparison.subscribe({
       next: (res: any) => {
         // mark comparison step completed
         const comparisonIndex = this.steps.findIndex(s => s.id === 'comparison' || (s.title && s.title.toLowerCase().includes('auto comparison')));
@@ -16,6 +16,7 @@ export class ComparisonReportComponent implements AfterViewInit {
   loading = false;
   errorMessage = '';
   dealScore = 0;
+  exporting = false;
 
   @ViewChild('leftPane') leftPane!: ElementRef<HTMLDivElement>;
   @ViewChild('rightPane') rightPane!: ElementRef<HTMLDivElement>;
@@ -75,27 +76,26 @@ export class ComparisonReportComponent implements AfterViewInit {
     });
   }
 
-  async downloadPdf() {
-    if (!document) return;
-    try {
-      const html2canvasModule: any = await import('html2canvas');
-      const jspdfModule: any = await import('jspdf');
-      const html2canvas = html2canvasModule.default ?? html2canvasModule;
-      const jsPDF = jspdfModule.jsPDF ?? jspdfModule.default ?? jspdfModule;
-
-      const el = document.getElementById('comparison-root')!;
-      if (!el) return;
-      const canvas: any = await html2canvas(el, { scale: 2 });
-      const imgData = canvas.toDataURL('image/png');
-      const doc = new jsPDF('p', 'mm', 'a4');
-      const imgProps = (doc as any).getImageProperties(imgData);
-      const pdfWidth = 190;
-      const pdfHeight = (imgProps.height * pdfWidth) / imgProps.width;
-      (doc as any).addImage(imgData, 'PNG', 10, 10, pdfWidth, pdfHeight);
-      doc.save('comparison-report.pdf');
-    } catch (e) {
-      console.error('PDF export failed', e);
-    }
+  downloadReport(format: 'pdf' | 'xlsx') {
+    if (!this.comparisonReport || this.exporting) return;
+    this.exporting = true;
+    // rendered on the server as a vector document; repeat downloads come from its cache
+    this.apiService.exportComparison(this.comparisonReport, format).subscribe({
+      next: (blob: Blob) => {
+        const url = URL.createObjectURL(blob);
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = `comparison-report.${format}`;
+        link.click();
+        URL.revokeObjectURL(url);
+        this.exporting = false;
+      },
+      error: (err: any) => {
+        console.error('Report export failed', err);
+        this.errorMessage = 'Report export failed.';
+        this.exporting = false;
+      }
+    });
   }
 
   acceptAgreement() {
@@ -1,5 +1,6 @@
-import { Component, EventEmitter, Output } from '@angular/core';
+import { Component, EventEmitter, OnDestroy, Output } from '@angular/core';
 import { CommonModule, JsonPipe } from '@angular/common';
+import { interval, Observable, Subscription } from 'rxjs';
 import { ApiService } from '../../services/api.service';
 
 @Component({
@@ -9,10 +10,12 @@ import { ApiService } from '../../services/api.service';
   standalone: true,
   imports: [CommonModule, JsonPipe]
 })
-export class FileUploadComponent {
+export class FileUploadComponent implements OnDestroy {
   ownerFile: File | null = null;
   tenantFile: File | null = null;
   uploadId: string | null = null;
+  ownerFileId: string | null = null;
+  tenantFileId: string | null = null;
   processId: string | null = null;
   
   loading = false;
@@ -23,11 +26,17 @@ export class FileUploadComponent {
   ownerResult: any = null;
   tenantResult: any = null;
   comparisonResult: any = null;
+
+  private statusSubscription: Subscription | null = null;
   
   @Output() uploaded = new EventEmitter<string>();
 
   constructor(private api: ApiService) {}
 
+  ngOnDestroy() {
+    this.stopStatusUpdates();
+  }
+
   onDropFile(event: DragEvent, fileType: 'owner' | 'tenant') {
     event.preventDefault();
     event.stopPropagation();
@@ -69,6 +78,8 @@ export class FileUploadComponent {
     this.api.uploadAgreements(this.ownerFile, this.tenantFile).subscribe({
       next: (res: any) => {
         this.uploadId = res.upload_id ?? res.id ?? res.uploadId ?? null;
+        this.ownerFileId = res.ownerFileId ?? null;
+        this.tenantFileId = res.tenantFileId ?? null;
         this.successMessage = 'Files uploaded successfully!';
         this.loading = false;
         this.uploaded.emit(this.uploadId ?? '');
@@ -109,22 +120,41 @@ export class FileUploadComponent {
 
   pollAnalysisStatus() {
     if (!this.processId) return;
-    
-    const pollInterval = setInterval(() => {
-      this.api.getProcessStatus(this.processId!).subscribe({
-        next: (res: any) => {
-          this.analysisStage = res.stage ?? 'Processing...';
-          if (res.status === 'completed' || res.status === 'done') {
-            clearInterval(pollInterval);
-            this.fetchResults();
-          }
-        },
-        error: (err: any) => {
-          clearInterval(pollInterval);
-          this.errorMessage = 'Status check failed.';
-        }
+
+    // Status is pushed by the server; fall back to polling if the stream cannot be opened
+    this.statusSubscription = this.api.watchProcessStatus(this.processId).subscribe({
+      next: (res: any) => this.handleStatus(res),
+      error: () => this.pollStatusInterval()
+    });
+  }
+
+  private pollStatusInterval() {
+    this.statusSubscription = interval(3000).subscribe(() => {
+      if (!this.processId) return;
+      this.api.getProcessStatus(this.processId).subscribe({
+        next: (res: any) => this.handleStatus(res),
+        error: (err: any) => console.error('Status check failed', err)
       });
-    }, 2000);
+    });
+  }
+
+  private stopStatusUpdates() {
+    this.statusSubscription?.unsubscribe();
+    this.statusSubscription = null;
+  }
+
+  private handleStatus(res: any) {
+    // polls still in flight can report the end of a job that was already handled
+    if (!this.statusSubscription) return;
+    this.analysisStage = res.stage ?? 'Processing...';
+    if (res.status === 'completed') {
+      this.stopStatusUpdates();
+      this.fetchResults();
+    } else if (res.status === 'failed') {
+      this.stopStatusUpdates();
+      this.errorMessage = res.error || 'Analysis failed.';
+      this.loading = false;
+    }
   }
 
   fetchResults() {
@@ -147,9 +177,17 @@ export class FileUploadComponent {
   }
 
   startComparison() {
-    if (!this.ownerFile || !this.tenantFile) return;
-    
-    this.api.compareFiles(this.ownerFile, this.tenantFile).subscribe({
+    // Both files were analyzed by the job, so compare their stored analyses instead of re-uploading
+    let comparison: Observable<any>;
+    if (this.ownerFileId && this.tenantFileId) {
+      comparison = this.api.compareByIds(this.ownerFileId, this.tenantFileId);
+    } else if (this.ownerFile && this.tenantFile) {
+      comparison = this.api.compareFiles(this.ownerFile, this.tenantFile);
+    } else {
+      return;
+    }
+
+    comparison.subscribe({
       next: (res: any) => {
         this.comparisonResult = res;
       },
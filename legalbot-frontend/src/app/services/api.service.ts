@@ -28,6 +28,30 @@ export class ApiService {
     return this.http.get<any>(`${this.baseUrl}/process/status/${processId}`);
   }
 
+  // Stream status updates (stage transitions and partial results) pushed by the server;
+  // completes after the 'completed' or 'failed' event
+  watchProcessStatus(processId: string): Observable<any> {
+    return new Observable<any>(subscriber => {
+      const source = new EventSource(`${this.baseUrl}/process/events/${processId}`);
+      const handle = (message: MessageEvent) => {
+        const event = JSON.parse(message.data);
+        subscriber.next(event);
+        if (event.status === 'completed' || event.status === 'failed') {
+          source.close();
+          subscriber.complete();
+        }
+      };
+      source.onmessage = handle;
+      source.addEventListener('completed', handle as EventListener);
+      source.addEventListener('failed', handle as EventListener);
+      source.onerror = err => {
+        source.close();
+        subscriber.error(err);
+      };
+      return () => source.close();
+    });
+  }
+
   // Fetch analysis results
   getAnalysisResults(processId: string): Observable<any> {
     return this.http.get<any>(`${this.baseUrl}/results/${processId}`);
@@ -42,6 +66,17 @@ export class ApiService {
     return this.http.post(`${this.baseUrl}/compare`, formData);
   }
 
+  // Server-rendered PDF/XLSX of a comparison report (cached by the backend per report)
+  exportComparison(report: any, format: 'pdf' | 'xlsx'): Observable<Blob> {
+    return this.http.post(`${this.baseUrl}/compare/export`, report, { params: { format }, responseType: 'blob' });
+  }
+
+  // Compare two already processed files by file ID (ownerFileId/tenantFileId; no re-upload, no re-analysis).
+  // The backend's upload_id_* field names take file IDs.
+  compareByIds(fileIdA: string, fileIdB: string): Observable<any> {
+    return this.http.post<any>(`${this.baseUrl}/compare/by-id`, { upload_id_a: fileIdA, upload_id_b: fileIdB });
+  }
+
   // Persist user decision (accept / flag) - backend endpoint should be implemented
   submitDecision(processId: string, decision: 'accept' | 'flag'): Observable<any> {
     return this.http.post<any>(`${this.baseUrl}/process/${processId}/decision`, { decision });